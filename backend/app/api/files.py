@@ -8,6 +8,7 @@ import shutil
 import logging
 
 from ..schemas.file import FileCreate, FileUpdate, FileResponse
+from ..schemas._fast import FileResponseFast, struct_list_response
 from ..services.file_service import FileService
 from ..database.session import get_db
 from ..services.search_service import SearchService
@@ -29,7 +30,7 @@ def read_files_api(skip: int = 0, limit: int = 100, include_deleted: bool = Fals
     """获取文件列表"""
     file_service = FileService(db)
     files = file_service.get_files(skip=skip, limit=limit, include_deleted=include_deleted)
-    return files
+    return struct_list_response(FileResponseFast, files)
 
 @router.get("/files/by-path/{file_path:path}", response_model=FileResponse)
 def read_file_by_path_api(file_path: str, db: Session = Depends(get_db)):
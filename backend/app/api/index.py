@@ -167,11 +167,11 @@ def get_system_status(db: Session = Depends(get_db)):
         )
 
 @router.get("/processor/status", response_model=Dict[str, Any])
-def get_processor_status(db: Session = Depends(get_db)):
+async def get_processor_status(db: Session = Depends(get_db)):
     """获取任务处理器运行状态"""
     try:
         task_processor = TaskProcessorService(db)
-        processor_status = task_processor.get_processor_status()
+        processor_status = await task_processor.get_processor_status_async()
         
         return {
             "success": True,
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from ..schemas.link import LinkCreate, LinkUpdate, LinkResponse
+from ..schemas.link import LinkCreate, LinkUpdate, LinkResponse, LINK_LIST_ADAPTER
+from ..schemas.base import orm_list_response
 from ..services.link_service import LinkService
 from ..database.session import get_db
 
@@ -26,13 +27,13 @@ def read_link_api(link_id: int, db: Session = Depends(get_db)):
 def read_links_by_file_api(file_id: int, db: Session = Depends(get_db)):
     link_service = LinkService(db)
     links = link_service.get_links_by_source_file(file_id)
-    return links
+    return orm_list_response(LinkResponse, links, LINK_LIST_ADAPTER)
 
 @router.get("/links", response_model=List[LinkResponse])
 def read_all_links_api(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     link_service = LinkService(db)
     links = link_service.get_all_links(skip=skip, limit=limit)
-    return links
+    return orm_list_response(LinkResponse, links, LINK_LIST_ADAPTER)
 
 @router.put("/links/{link_id}", response_model=LinkResponse)
 def update_link_api(link_id: int, link: LinkUpdate, db: Session = Depends(get_db)):
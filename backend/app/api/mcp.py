@@ -2,7 +2,9 @@
 MCP (Model Context Protocol) 相关API接口
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import delete, exists, select, update
 from sqlalchemy.orm import Session
 
 from ..database.session import get_db
@@ -10,8 +12,10 @@ from ..models.mcp_server import MCPServer, MCPTool, MCPToolCall
 from ..schemas.mcp import (
     MCPServerCreate, MCPServerUpdate, MCPServerResponse, MCPServerWithTools,
     MCPToolResponse, MCPToolCallResponse, MCPServerStatus,
-    MCPToolCallRequest, MCPToolCallResult
+    MCPToolCallRequest, MCPToolCallResult, MCPToolCallFeedback
 )
+from ..schemas.base import orm_list_response
+from ..schemas._fast import MCPToolResponseFast, MCPToolCallResponseFast, struct_list_response
 from ..services.mcp_service import MCPClientService
 import logging
 
@@ -20,14 +24,25 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/mcp", tags=["MCP"])
 
 
+def get_http_client(request: Request) -> Optional[httpx.AsyncClient]:
+    """获取应用级共享的HTTP客户端"""
+    return getattr(request.app.state, "http", None)
+
+
+def _exists(db: Session, model, id_: int) -> bool:
+    """仅判断记录是否存在，不加载ORM对象"""
+    return db.execute(select(exists().where(model.id == id_))).scalar()
+
+
 @router.post("/servers", response_model=MCPServerResponse)
 async def create_mcp_server(
     server_data: MCPServerCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    http: Optional[httpx.AsyncClient] = Depends(get_http_client)
 ):
     """创建MCP Server配置"""
     try:
-        mcp_service = MCPClientService(db)
+        mcp_service = MCPClientService(db, http=http)
         server = await mcp_service.create_server(server_data)
         return server
     except ValueError as e:
@@ -41,7 +56,7 @@ async def create_mcp_server(
 def get_mcp_servers(db: Session = Depends(get_db)):
     """获取所有MCP Server列表"""
     servers = db.query(MCPServer).all()
-    return servers
+    return orm_list_response(MCPServerResponse, servers)
 
 
 @router.get("/servers/{server_id}", response_model=MCPServerWithTools)
@@ -51,10 +66,8 @@ def get_mcp_server(server_id: int, db: Session = Depends(get_db)):
     if not server:
         raise HTTPException(status_code=404, detail="MCP Server不存在")
     
-    # 构造响应数据
-    server_data = MCPServerWithTools.model_validate(server)
-    server_data.tools = server.tools
-    return server_data
+    # 构造响应数据（tools 通过 from_attributes 从关联关系读取）
+    return MCPServerWithTools.model_validate(server)
 
 
 @router.put("/servers/{server_id}", response_model=MCPServerResponse)
@@ -64,6 +77,9 @@ async def update_mcp_server(
     db: Session = Depends(get_db)
 ):
     """更新MCP Server配置"""
+    if not _exists(db, MCPServer, server_id):
+        raise HTTPException(status_code=404, detail="MCP Server不存在")
+
     try:
         mcp_service = MCPClientService(db)
         server = await mcp_service.update_server(server_id, update_data)
@@ -78,14 +94,19 @@ async def update_mcp_server(
 @router.delete("/servers/{server_id}")
 def delete_mcp_server(server_id: int, db: Session = Depends(get_db)):
     """删除MCP Server"""
-    server = db.query(MCPServer).filter(MCPServer.id == server_id).first()
-    if not server:
-        raise HTTPException(status_code=404, detail="MCP Server不存在")
-    
     try:
-        db.delete(server)
+        # SQLite未开启外键约束，需手动级联删除工具及其调用记录
+        tool_ids = select(MCPTool.id).where(MCPTool.server_id == server_id)
+        db.execute(delete(MCPToolCall).where(MCPToolCall.tool_id.in_(tool_ids)))
+        db.execute(delete(MCPTool).where(MCPTool.server_id == server_id))
+        result = db.execute(delete(MCPServer).where(MCPServer.id == server_id))
+        if result.rowcount == 0:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="MCP Server不存在")
         db.commit()
         return {"message": "MCP Server删除成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"删除MCP Server失败: {e}")
@@ -93,10 +114,14 @@ def delete_mcp_server(server_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/servers/{server_id}/connect")
-async def connect_mcp_server(server_id: int, db: Session = Depends(get_db)):
+async def connect_mcp_server(
+    server_id: int,
+    db: Session = Depends(get_db),
+    http: Optional[httpx.AsyncClient] = Depends(get_http_client)
+):
     """连接MCP Server"""
     try:
-        mcp_service = MCPClientService(db)
+        mcp_service = MCPClientService(db, http=http)
         success = await mcp_service.connect_server(server_id)
         if success:
             return {"message": "连接成功"}
@@ -133,10 +158,14 @@ def get_mcp_server_status(server_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/servers/{server_id}/discover-tools")
-async def discover_mcp_tools(server_id: int, db: Session = Depends(get_db)):
+async def discover_mcp_tools(
+    server_id: int,
+    db: Session = Depends(get_db),
+    http: Optional[httpx.AsyncClient] = Depends(get_http_client)
+):
     """发现MCP Server的工具"""
     try:
-        mcp_service = MCPClientService(db)
+        mcp_service = MCPClientService(db, http=http)
         tools = await mcp_service.discover_tools(server_id)
         return {"message": f"发现 {len(tools)} 个工具", "tools_count": len(tools)}
     except Exception as e:
@@ -149,7 +178,7 @@ def get_available_tools(db: Session = Depends(get_db)):
     """获取所有可用的MCP工具"""
     mcp_service = MCPClientService(db)
     tools = mcp_service.get_available_tools()
-    return tools
+    return struct_list_response(MCPToolResponseFast, tools)
 
 
 @router.get("/tools/{tool_id}", response_model=MCPToolResponse)
@@ -164,11 +193,12 @@ def get_mcp_tool(tool_id: int, db: Session = Depends(get_db)):
 @router.post("/tools/call", response_model=MCPToolCallResult)
 async def call_mcp_tool(
     request: MCPToolCallRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    http: Optional[httpx.AsyncClient] = Depends(get_http_client)
 ):
     """调用MCP工具"""
     try:
-        mcp_service = MCPClientService(db)
+        mcp_service = MCPClientService(db, http=http)
         result = await mcp_service.call_tool(request)
         return result
     except Exception as e:
@@ -192,7 +222,7 @@ def get_tool_calls(
         query = query.filter(MCPToolCall.session_id == session_id)
     
     calls = query.order_by(MCPToolCall.created_at.desc()).limit(limit).all()
-    return calls
+    return struct_list_response(MCPToolCallResponseFast, calls)
 
 
 @router.get("/tool-calls/{call_id}", response_model=MCPToolCallResponse)
@@ -207,21 +237,23 @@ def get_tool_call(call_id: int, db: Session = Depends(get_db)):
 @router.post("/tool-calls/{call_id}/feedback")
 def update_tool_call_feedback(
     call_id: int,
-    feedback: int,  # 1为好评，0为差评
+    body: MCPToolCallFeedback,
     db: Session = Depends(get_db)
 ):
     """更新工具调用反馈"""
-    if feedback not in [0, 1]:
-        raise HTTPException(status_code=400, detail="反馈值必须为0或1")
-    
-    call = db.query(MCPToolCall).filter(MCPToolCall.id == call_id).first()
-    if not call:
-        raise HTTPException(status_code=404, detail="工具调用记录不存在")
-    
     try:
-        call.user_feedback = feedback
+        result = db.execute(
+            update(MCPToolCall)
+            .where(MCPToolCall.id == call_id)
+            .values(user_feedback=body.feedback)
+        )
+        if result.rowcount == 0:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="工具调用记录不存在")
         db.commit()
         return {"message": "反馈更新成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"更新工具调用反馈失败: {e}")
@@ -2,7 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 
-from ..schemas.tag import TagCreate, TagUpdate, TagResponse, FileTagCreate, FileTagResponse, FileTagWithTagResponse
+from ..schemas.tag import (
+    TagCreate, TagUpdate, TagResponse, FileTagCreate, FileTagResponse, FileTagWithTagResponse,
+    FILE_TAG_LIST_ADAPTER, FILE_TAG_WITH_TAG_LIST_ADAPTER,
+)
+from ..schemas.base import orm_list_response
+from ..schemas._fast import TagResponseFast, struct_list_response
 from ..services.tag_service import TagService, FileTagService
 from ..database.session import get_db
 
@@ -26,7 +31,7 @@ def read_tag_api(tag_id: int, db: Session = Depends(get_db)):
 def read_all_tags_api(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     tag_service = TagService(db)
     tags = tag_service.get_all_tags(skip=skip, limit=limit)
-    return tags
+    return struct_list_response(TagResponseFast, tags)
 
 @router.get("/tags-with-stats", response_model=List[Dict[str, Any]])
 def read_tags_with_stats_api(skip: int = 0, limit: int = 100, include_recent_files: bool = False, db: Session = Depends(get_db)):
@@ -69,14 +74,14 @@ def create_file_tag_api(file_tag: FileTagCreate, db: Session = Depends(get_db)):
 def get_file_tags_api(file_id: int, db: Session = Depends(get_db)):
     file_tag_service = FileTagService(db)
     file_tags = file_tag_service.get_file_tags_by_file(file_id)
-    return file_tags
+    return orm_list_response(FileTagResponse, file_tags, FILE_TAG_LIST_ADAPTER)
 
 @router.get("/files/{file_id}/tags/with-details", response_model=List[FileTagWithTagResponse])
 def get_file_tags_with_details_api(file_id: int, db: Session = Depends(get_db)):
     """获取文件标签及完整标签信息"""
     file_tag_service = FileTagService(db)
     file_tags_with_details = file_tag_service.get_file_tags_with_details(file_id)
-    return file_tags_with_details
+    return orm_list_response(FileTagWithTagResponse, file_tags_with_details, FILE_TAG_WITH_TAG_LIST_ADAPTER)
 
 @router.delete("/files/{file_id}/tags/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_file_tag_api(file_id: int, tag_id: int, db: Session = Depends(get_db)):
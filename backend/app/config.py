@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     
     # 向量数据库配置
     chroma_db_path: str = "./data/chroma_db"
+    chroma_batch_size: int = 100  # 每次写入ChromaDB的分块数量（建议50-250）
     
     # OpenAI配置
     openai_api_key: Optional[str] = None
@@ -24,6 +25,11 @@ class Settings(BaseSettings):
     embedding_model_name: str = "text-embedding-ada-002"  # 默认OpenAI模型
     embedding_base_url: Optional[str] = None  # 嵌入模型专用API地址，为空时使用openai_base_url
     embedding_api_key: Optional[str] = None   # 嵌入模型专用API密钥，为空时使用openai_api_key
+    embedding_batch_size: int = 64  # 单次嵌入请求合并的文本数量
+    embedding_concurrency: int = 8  # 并发发送的嵌入请求数量
+    embedding_sort_by_length: bool = True  # 按文本长度排序后再分批，减少批内长度差异（结果仍按原顺序返回）
+    embedding_cache_path: Optional[str] = None  # 嵌入向量磁盘缓存路径，未设置时位于data_directory下，设为空字符串时禁用
+    embedding_cache_max_entries: int = 200000  # 嵌入缓存最多保留的向量数量，超出后淘汰最早写入的条目
     
     # 文件存储配置
     notes_directory: str = "./notes"  # 相对于backend目录，在Docker中指向挂载的/app/notes
@@ -69,6 +75,12 @@ class Settings(BaseSettings):
     def get_embedding_api_key(self) -> Optional[str]:
         """获取嵌入模型API密钥，优先使用专用配置，否则回退到通用配置"""
         return self.embedding_api_key or self.openai_api_key
+    
+    def get_embedding_cache_path(self) -> Optional[str]:
+        """获取嵌入缓存路径，未设置时默认放在数据目录下，设为空字符串时返回None（禁用缓存）"""
+        if self.embedding_cache_path is None:
+            return str(Path(self.data_directory) / "embedding_cache.db")
+        return self.embedding_cache_path or None
 
     class Config:
         env_file = ".env"
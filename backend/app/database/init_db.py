@@ -1,6 +1,6 @@
 from sqlalchemy.schema import CreateTable
 from sqlalchemy import text
-from ..models.base import Base, engine
+from ..models.base import Base, engine, SessionLocal
 from ..models.file import File
 from ..models.link import Link
 from ..models.embedding import Embedding
@@ -12,18 +12,122 @@ from ..models.chat_message import ChatMessage
 from ..models.system_config import SystemConfig
 from ..models.pending_task import PendingTask
 from ..models.mcp_server import MCPServer, MCPTool, MCPToolCall
+from ..services.index_service import IndexService
+from ..services.task_processor_service import TaskProcessorService
+from ..services.tag_service import TagService
 import logging
 import os
+import re
 import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from ..config import settings
 from sqlalchemy import inspect
 
 logger = logging.getLogger(__name__)
 
-def check_database_health() -> dict:
-    """检查数据库健康状态"""
-    logger.info("开始检查数据库健康状态...")
+# 数据库文件与向量库目录路径（配置在进程内不变，模块加载时解析一次）
+_DB_PATH = settings.database_url.removeprefix("sqlite:///")
+_CHROMA_PATH = Path(settings.chroma_db_path)
+
+# 启动扫描完成事件（后台任务处理需等待扫描创建完任务）
+_scan_finished = threading.Event()
+_scan_finished.set()
+
+def wait_for_startup_scan(timeout: float = None) -> bool:
+    """等待启动时的后台扫描完成，返回是否已完成"""
+    return _scan_finished.wait(timeout)
+
+# 启动/健康检查/修复中使用的固定SQL语句，模块加载时构造一次
+_PRAGMA_QUICK_CHECK = text("PRAGMA quick_check")
+_PRAGMA_INTEGRITY_CHECK = text("PRAGMA integrity_check")
+_PRAGMA_OPTIMIZE = text("PRAGMA optimize")
+_PRAGMA_WAL_CHECKPOINT = text("PRAGMA wal_checkpoint(TRUNCATE)")
+_REINDEX = text("REINDEX")
+_SELECT_ONE = text("SELECT 1")
+_SELECT_INDEX_NAMES = text("SELECT name FROM sqlite_master WHERE type = 'index'")
+_SELECT_INDEX_NAME = text("SELECT name FROM sqlite_master WHERE type = 'index' AND name = :name")
+_SELECT_FILES_FTS = text("SELECT name FROM sqlite_master WHERE name = 'files_fts'")
+_FTS_REBUILD = text("INSERT INTO files_fts(files_fts) VALUES('rebuild')")
+
+# IN 子句单批最大参数数量（低于SQLite默认的999上限）
+_IN_CLAUSE_BATCH_SIZE = 500
+
+# 启动扫描时每批写入数据库的文件数量（限制同时驻留内存的文件内容）
+_SCAN_BATCH_SIZE = 500
+
+# 健康检查结果缓存（同一次启动中会被多次调用）
+_health_cache = {
+    "data": None,
+    "last_update": 0.0,
+    "cache_duration": 5  # 缓存5秒
+}
+
+def _invalidate_health_cache():
+    """数据库状态发生变化（修复/重建）后使健康检查缓存失效"""
+    _health_cache["data"] = None
+
+# 单次初始化流程内的文件状态缓存：路径 -> (是否存在, 是否目录, mode)
+_stat_cache = {}
+
+def _cached_stat(path) -> tuple:
+    """获取路径状态，同一路径在缓存失效前只stat一次"""
+    key = str(path)
+    if key not in _stat_cache:
+        try:
+            st = os.stat(key)
+            _stat_cache[key] = (True, stat.S_ISDIR(st.st_mode), st.st_mode)
+        except OSError:
+            _stat_cache[key] = (False, False, 0)
+    return _stat_cache[key]
+
+def _cached_exists(path) -> bool:
+    """带缓存的 os.path.exists"""
+    return _cached_stat(path)[0]
+
+def _cached_read_write(path) -> bool:
+    """根据同一次stat得到的mode位判断属主是否可读写，无需额外的 os.access 调用"""
+    exists, _, mode = _cached_stat(path)
+    return exists and bool(mode & stat.S_IRUSR) and bool(mode & stat.S_IWUSR)
+
+def _invalidate_stat_cache(path=None):
+    """路径被创建/删除/修改权限后使缓存失效；不传路径时清空全部"""
+    if path is None:
+        _stat_cache.clear()
+        return
+    _stat_cache.pop(str(path), None)
+
+def check_database_health(only: list = None) -> dict:
+    """
+    检查数据库健康状态（带短时缓存）
+    
+    Args:
+        only: 仅重新执行指定的检查项（'tables'、'integrity'、'chroma'），
+              用于修复后的定向复查；未指定的检查项视为已通过，结果不缓存
+    """
+    if only is not None:
+        return _run_health_check(only)
+    
+    now = time.monotonic()
+    if _health_cache["data"] is not None and now - _health_cache["last_update"] < _health_cache["cache_duration"]:
+        logger.info("使用缓存的数据库健康状态")
+        return _health_cache["data"]
+    
+    health_status = _run_health_check()
+    _health_cache["data"] = health_status
+    _health_cache["last_update"] = time.monotonic()
+    return health_status
+
+def _run_health_check(only: list = None) -> dict:
+    """执行数据库健康检查"""
+    checks = set(only) if only is not None else {"tables", "integrity", "chroma"}
+    if only is not None:
+        logger.info(f"开始定向复查数据库健康状态: {sorted(checks)}")
+    else:
+        logger.info("开始检查数据库健康状态...")
     
     health_status = {
         "sqlite_healthy": False,
@@ -37,60 +141,69 @@ def check_database_health() -> dict:
     
     try:
         # 1. 检查SQLite数据库文件是否存在
-        db_path = settings.database_url.replace("sqlite:///", "")
-        if not os.path.exists(db_path):
+        db_path = _DB_PATH
+        if not _cached_exists(db_path):
             health_status["error_message"] = f"SQLite数据库文件不存在: {db_path}"
             logger.warning(health_status["error_message"])
             return health_status
         
         # 2. 检查数据库连接
-        try:
-            inspector = inspect(engine)
-            table_names = inspector.get_table_names()
+        if "tables" in checks:
+            try:
+                inspector = inspect(engine)
+                table_names = inspector.get_table_names()
+                health_status["can_connect"] = True
+                logger.info("SQLite数据库连接正常")
+            except Exception as e:
+                health_status["error_message"] = f"无法连接SQLite数据库: {e}"
+                logger.error(health_status["error_message"])
+                return health_status
+        else:
             health_status["can_connect"] = True
-            logger.info("SQLite数据库连接正常")
-        except Exception as e:
-            health_status["error_message"] = f"无法连接SQLite数据库: {e}"
-            logger.error(health_status["error_message"])
-            return health_status
         
         # 3. 检查核心表是否存在
-        required_tables = ['files', 'tags', 'links', 'embeddings', 'pending_tasks']
-        missing_tables = [table for table in required_tables if table not in table_names]
-        
-        if missing_tables:
-            health_status["error_message"] = f"缺少核心表: {missing_tables}"
-            health_status["missing_tables"] = missing_tables
-            logger.warning(health_status["error_message"])
+        if "tables" in checks:
+            required_tables = ['files', 'tags', 'links', 'embeddings', 'pending_tasks']
+            missing_tables = [table for table in required_tables if table not in table_names]
+            
+            if missing_tables:
+                health_status["error_message"] = f"缺少核心表: {missing_tables}"
+                health_status["missing_tables"] = missing_tables
+                logger.warning(health_status["error_message"])
+            else:
+                health_status["tables_exist"] = True
+                logger.info("SQLite数据库表结构完整")
         else:
             health_status["tables_exist"] = True
-            logger.info("SQLite数据库表结构完整")
         
-        # 4. 检查数据库完整性
-        try:
-            with engine.connect() as conn:
-                result = conn.execute(text("PRAGMA integrity_check"))
-                integrity_result = result.fetchone()
-                if integrity_result and integrity_result[0] != "ok":
-                    health_status["integrity_issues"].append(str(integrity_result[0]))
-                    health_status["error_message"] = f"数据库完整性检查失败: {integrity_result[0]}"
-                    logger.warning(health_status["error_message"])
-                else:
-                    logger.info("数据库完整性检查通过")
-        except Exception as e:
-            health_status["integrity_issues"].append(str(e))
-            health_status["error_message"] = f"数据库完整性检查异常: {e}"
-            logger.warning(health_status["error_message"])
+        # 4. 检查数据库完整性（quick_check 跳过索引交叉校验，索引问题由修复阶段的 REINDEX 处理）
+        if "integrity" in checks:
+            try:
+                with engine.connect() as conn:
+                    result = conn.execute(_PRAGMA_QUICK_CHECK)
+                    integrity_result = result.fetchone()
+                    if integrity_result and integrity_result[0] != "ok":
+                        health_status["integrity_issues"].append(str(integrity_result[0]))
+                        health_status["error_message"] = f"数据库完整性检查失败: {integrity_result[0]}"
+                        logger.warning(health_status["error_message"])
+                    else:
+                        logger.info("数据库完整性检查通过")
+            except Exception as e:
+                health_status["integrity_issues"].append(str(e))
+                health_status["error_message"] = f"数据库完整性检查异常: {e}"
+                logger.warning(health_status["error_message"])
         
         # 5. 检查ChromaDB目录
-        chroma_path = Path(settings.chroma_db_path)
-        if not chroma_path.exists():
+        chroma_path = _CHROMA_PATH
+        if "chroma" not in checks:
+            health_status["chromadb_healthy"] = True
+        elif not _cached_exists(chroma_path):
             health_status["error_message"] = f"ChromaDB目录不存在: {chroma_path}"
             logger.warning(health_status["error_message"])
         else:
             # 测试ChromaDB目录访问权限
             try:
-                if os.access(chroma_path, os.R_OK | os.W_OK):
+                if _cached_read_write(chroma_path):
                     health_status["chromadb_healthy"] = True
                     logger.info("ChromaDB目录访问正常")
                 else:
@@ -101,20 +214,17 @@ def check_database_health() -> dict:
                 logger.warning(health_status["error_message"])
                 health_status["chromadb_healthy"] = False
         
-        # 6. 执行数据库查询测试
-        try:
-            from ..database.session import get_db
-            db = next(get_db())
-            
-            # 测试查询files表
-            file_count = db.query(File).count()
-            logger.info(f"数据库查询测试成功，文件记录数: {file_count}")
-            
-            db.close()
-        except Exception as e:
-            health_status["error_message"] = f"数据库查询测试失败: {e}"
-            logger.error(health_status["error_message"])
-            return health_status
+        # 6. 执行数据库查询测试（定向复查时跳过）
+        if only is None:
+            try:
+                with SessionLocal() as db:
+                    # 连通性探测，无需对files表做全表COUNT
+                    db.execute(_SELECT_ONE).scalar()
+                logger.info("数据库查询测试成功")
+            except Exception as e:
+                health_status["error_message"] = f"数据库查询测试失败: {e}"
+                logger.error(health_status["error_message"])
+                return health_status
         
         # 7. 综合评估健康状态
         if (health_status["can_connect"] and 
@@ -133,6 +243,28 @@ def check_database_health() -> dict:
         logger.error(health_status["error_message"])
         return health_status
 
+def _find_reindex_indexes(conn, index_issues: list) -> list:
+    """
+    从完整性检查信息中提取出问题的索引名，并确认其确实存在。
+    
+    例如 "wrong # of entries in index ix_files_file_path" -> ["ix_files_file_path"]。
+    只要有一条信息无法定位到具体索引，就返回空列表，由调用方回退为整库REINDEX。
+    """
+    indexes = []
+    for issue in index_issues:
+        match = re.search(r"index\s+([\w$]+)", issue)
+        if not match:
+            return []
+        row = conn.execute(
+            _SELECT_INDEX_NAME,
+            {"name": match.group(1)}
+        ).fetchone()
+        if not row:
+            return []
+        if row[0] not in indexes:
+            indexes.append(row[0])
+    return indexes
+
 def repair_database(health_status: dict) -> bool:
     """尝试修复数据库问题"""
     logger.info("开始尝试修复数据库...")
@@ -154,13 +286,33 @@ def repair_database(health_status: dict) -> bool:
         if health_status.get("integrity_issues"):
             logger.info("尝试修复数据库完整性问题...")
             try:
-                with engine.connect() as conn:
-                    # 尝试重建索引
-                    conn.execute(text("REINDEX"))
-                    logger.info("重建数据库索引完成")
+                with engine.begin() as conn:
+                    # FTS5全文索引使用专用的rebuild命令重建，远快于REINDEX
+                    if conn.execute(_SELECT_FILES_FTS).fetchone():
+                        conn.execute(_FTS_REBUILD)
+                        logger.info("重建FTS全文索引完成")
+                    
+                    index_issues = [
+                        issue for issue in health_status["integrity_issues"]
+                        if "index" in issue and "files_fts" not in issue
+                    ]
+                    if index_issues:
+                        # 仅重建出问题的索引；无法定位时才整库重建
+                        indexes = _find_reindex_indexes(conn, index_issues)
+                        if indexes:
+                            for index in indexes:
+                                conn.execute(text(f'REINDEX "{index}"'))
+                            logger.info(f"重建索引完成: {indexes}")
+                        else:
+                            conn.execute(_REINDEX)
+                            logger.info("重建数据库索引完成")
+                    else:
+                        # 问题与普通索引无关，只做低成本的统计信息优化
+                        conn.execute(_PRAGMA_OPTIMIZE)
+                        logger.info("完整性问题与普通索引无关，跳过REINDEX，已执行PRAGMA optimize")
                     
                     # 再次检查完整性
-                    result = conn.execute(text("PRAGMA integrity_check"))
+                    result = conn.execute(_PRAGMA_INTEGRITY_CHECK)
                     integrity_result = result.fetchone()
                     if integrity_result and integrity_result[0] == "ok":
                         logger.info("数据库完整性修复成功")
@@ -172,21 +324,23 @@ def repair_database(health_status: dict) -> bool:
                 repair_success = False
         
         # 3. 修复ChromaDB目录问题
-        chroma_path = Path(settings.chroma_db_path)
-        if not chroma_path.exists():
+        chroma_path = _CHROMA_PATH
+        if not _cached_exists(chroma_path):
             logger.info("尝试修复ChromaDB目录...")
             try:
                 chroma_path.mkdir(parents=True, exist_ok=True)
+                _invalidate_stat_cache(chroma_path)
                 logger.info(f"成功创建ChromaDB目录: {chroma_path}")
             except Exception as e:
                 logger.error(f"创建ChromaDB目录失败: {e}")
                 repair_success = False
         
         # 4. 修复ChromaDB目录权限
-        if chroma_path.exists() and not os.access(chroma_path, os.R_OK | os.W_OK):
+        if _cached_exists(chroma_path) and not _cached_read_write(chroma_path):
             logger.info("尝试修复ChromaDB目录权限...")
             try:
                 os.chmod(chroma_path, 0o755)
+                _invalidate_stat_cache(chroma_path)
                 logger.info("ChromaDB目录权限修复成功")
             except Exception as e:
                 logger.error(f"修复ChromaDB目录权限失败: {e}")
@@ -194,17 +348,22 @@ def repair_database(health_status: dict) -> bool:
         
         # 5. 清理可能损坏的临时文件
         try:
-            db_path = settings.database_url.replace("sqlite:///", "")
+            db_path = _DB_PATH
             db_dir = os.path.dirname(db_path)
             
-            # 清理SQLite临时文件
-            for temp_file in [f"{db_path}-wal", f"{db_path}-shm", f"{db_path}-journal"]:
-                if os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                        logger.info(f"已清理临时文件: {temp_file}")
-                    except Exception as e:
-                        logger.warning(f"清理临时文件失败: {temp_file}, 错误: {e}")
+            # WAL模式下 -wal/-shm 属于正在使用的数据库，先检查点合并回主库而不是直接删除
+            with engine.connect() as conn:
+                conn.execute(_PRAGMA_WAL_CHECKPOINT)
+            
+            # 清理SQLite残留的回滚日志
+            temp_file = f"{db_path}-journal"
+            if os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                    _invalidate_stat_cache(temp_file)
+                    logger.info(f"已清理临时文件: {temp_file}")
+                except Exception as e:
+                    logger.warning(f"清理临时文件失败: {temp_file}, 错误: {e}")
         except Exception as e:
             logger.warning(f"清理临时文件时出错: {e}")
         
@@ -219,34 +378,267 @@ def repair_database(health_status: dict) -> bool:
         logger.error(f"数据库修复过程异常: {e}")
         return False
 
+def _remove_sqlite_files():
+    """删除SQLite数据库文件（连同WAL模式的 -wal/-shm 文件，先释放连接池中的连接）"""
+    db_path = _DB_PATH
+    engine.dispose()
+    for path in [db_path, f"{db_path}-wal", f"{db_path}-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"已删除SQLite数据库文件: {path}")
+
+def _remove_chroma_dir():
+    """删除ChromaDB向量数据库目录：先改名移走，再在后台线程中递归删除"""
+    chroma_path = _CHROMA_PATH
+    if not chroma_path.exists():
+        return
+    
+    old_path = chroma_path.with_name(f"{chroma_path.name}.old.{time.time_ns()}")
+    try:
+        os.rename(chroma_path, old_path)
+    except OSError as e:
+        # 无法改名（如目录为挂载点）时退回同步删除
+        logger.warning(f"ChromaDB目录改名失败，改为同步删除: {e}")
+        shutil.rmtree(chroma_path)
+        logger.info(f"已删除ChromaDB向量数据库目录: {chroma_path}")
+    else:
+        threading.Thread(
+            target=shutil.rmtree,
+            args=(old_path,),
+            kwargs={"ignore_errors": True},
+            daemon=True
+        ).start()
+        logger.info(f"已移走ChromaDB向量数据库目录，后台删除中: {old_path}")
+
 def clean_existing_data():
     """清理现有的数据库和向量库文件"""
     logger.info("开始清理现有数据...")
     
     try:
-        # 1. 删除SQLite数据库文件
-        db_path = settings.database_url.replace("sqlite:///", "")
-        if os.path.exists(db_path):
-            os.remove(db_path)
-            logger.info(f"已删除SQLite数据库文件: {db_path}")
-        
-        # 2. 删除ChromaDB向量数据库目录
-        chroma_path = Path(settings.chroma_db_path)
-        if chroma_path.exists():
-            shutil.rmtree(chroma_path)
-            logger.info(f"已删除ChromaDB向量数据库目录: {chroma_path}")
+        # 1. 并行删除SQLite数据库文件和ChromaDB向量数据库目录（两者互不依赖，均为I/O操作）
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(_remove_sqlite_files),
+                executor.submit(_remove_chroma_dir)
+            ]
+        # 退出with时已等待两者完成；任一删除失败时抛出异常
+        for future in futures:
+            future.result()
         
-        # 3. 重新创建ChromaDB向量数据库目录
+        # 2. 重新创建ChromaDB向量数据库目录
+        chroma_path = _CHROMA_PATH
         chroma_path.mkdir(parents=True, exist_ok=True)
         logger.info(f"ChromaDB向量数据库目录已重新创建: {chroma_path}")
         
+        # 已删除/重建的路径状态全部失效
+        _invalidate_stat_cache()
+        
         logger.info("数据清理完成")
         return True
         
     except Exception as e:
+        _invalidate_stat_cache()
         logger.error(f"清理数据失败: {e}")
         return False
 
+def _content_changed(file_info: dict, existing_file) -> bool:
+    """
+    判断磁盘文件相对数据库记录是否有内容变化。
+    
+    优先比较内容哈希（等长修改也能识别，未修改的保存不会误触发重建索引）；
+    旧记录没有哈希时退回到比较文件大小。
+    """
+    if existing_file.content_hash:
+        return file_info['content_hash'] != existing_file.content_hash
+    return file_info['file_size'] != existing_file.file_size
+
+def _bulk_insert_new_files(db, file_mappings: list) -> dict:
+    """
+    批量插入新文件记录并解析其ID。
+    
+    先通过一次 executemany 写入 files 表，再按路径分批查回ID，
+    避免逐个文件 add/flush。
+    
+    Returns:
+        文件路径 -> 文件ID
+    """
+    db.bulk_insert_mappings(File, file_mappings)
+    
+    # 分批解析新记录ID，避免超出SQLite单条语句的参数上限
+    paths = [m["file_path"] for m in file_mappings]
+    path_to_id = {}
+    for i in range(0, len(paths), _IN_CLAUSE_BATCH_SIZE):
+        batch = paths[i:i + _IN_CLAUSE_BATCH_SIZE]
+        rows = db.query(File.id, File.file_path).filter(File.file_path.in_(batch)).all()
+        path_to_id.update({file_path: file_id for file_id, file_path in rows})
+    
+    return path_to_id
+
+def _create_missing_tables():
+    """
+    在单个事务中创建缺失的表及其索引。
+    
+    先通过一次 sqlite_master 查询得到已有表，再以 checkfirst=False 只创建缺失的表，
+    避免 create_all 对每张表逐一探测。已有表上后来新增的索引也在同一事务中补建。
+    """
+    existing_tables = set(inspect(engine).get_table_names())
+    missing = [
+        table for table in Base.metadata.sorted_tables
+        if table.name not in existing_tables
+    ]
+    
+    with engine.begin() as conn:
+        existing_indexes = {row[0] for row in conn.execute(_SELECT_INDEX_NAMES)}
+        missing_indexes = [
+            index
+            for table in Base.metadata.sorted_tables if table.name in existing_tables
+            for index in table.indexes if index.name not in existing_indexes
+        ]
+        if missing:
+            Base.metadata.create_all(bind=conn, tables=missing, checkfirst=False)
+            logger.info(f"已创建数据库表: {[table.name for table in missing]}")
+        for index in missing_indexes:
+            index.create(conn)
+        if missing_indexes:
+            logger.info(f"已创建数据库索引: {[index.name for index in missing_indexes]}")
+
+def _background_scan(need_rebuild: bool, need_repair: bool):
+    """
+    扫描笔记目录，同步文件记录并创建后台索引任务。
+    
+    在独立线程中运行并使用自己的数据库会话，完成后设置 _scan_finished。
+    """
+    logger.info("开始扫描笔记目录并创建后台索引任务...")
+    try:
+        with SessionLocal() as db:
+            index_service = IndexService(db)
+            task_service = TaskProcessorService(db)
+            
+            # 校准标签使用次数（运行期间由文件标签增删同步维护）
+            TagService(db).recalculate_usage_counts()
+            
+            # 为每个文件创建数据库记录（如果不存在）
+            scanned_count = 0
+            created_count = 0
+            updated_count = 0
+            to_insert = []
+            to_update = []
+            pending_tasks = []
+            
+            # 一次性加载已有文件的路径索引，替代逐个文件查询
+            existing_files = {
+                row.file_path: row
+                for row in db.query(File.id, File.file_path, File.file_size, File.content_hash).all()
+            }
+            
+            def flush_batch():
+                """写入当前批次的文件记录，使已处理文件的内容可被回收"""
+                nonlocal created_count
+                if to_update:
+                    db.bulk_update_mappings(File, to_update)
+                    db.commit()
+                    to_update.clear()
+                if to_insert:
+                    try:
+                        path_to_id = _bulk_insert_new_files(db, to_insert)
+                        db.commit()
+                        created_count += len(path_to_id)
+                        # 新文件的向量索引任务优先级为1
+                        pending_tasks.extend(
+                            {
+                                "file_id": file_id,
+                                "file_path": file_path,
+                                "task_type": "vector_index",
+                                "priority": 1
+                            }
+                            for file_path, file_id in path_to_id.items()
+                        )
+                    except Exception as e:
+                        db.rollback()
+                        logger.error(f"批量创建文件记录失败: {e}")
+                    to_insert.clear()
+            
+            # 流式扫描notes目录，每累计一批就写入数据库
+            for file_info in index_service.iter_notes_directory():
+                scanned_count += 1
+                try:
+                    # 检查文件是否已存在于数据库中
+                    existing_file = existing_files.get(file_info['file_path'])
+                    
+                    if not existing_file:
+                        # 新文件先收集起来，循环结束后批量插入
+                        to_insert.append({
+                            "title": file_info['title'],
+                            "content": file_info['content'],
+                            "file_path": file_info['file_path'],
+                            "parent_folder": file_info['parent_folder'],
+                            "file_size": file_info['file_size'],
+                            "content_hash": file_info['content_hash']
+                        })
+                        
+                    else:
+                        # 文件已存在，检查是否需要更新索引
+                        if _content_changed(file_info, existing_file):
+                            # 内容哈希变化，更新记录并重建索引
+                            to_update.append({
+                                "id": existing_file.id,
+                                "content": file_info['content'],
+                                "title": file_info['title'],
+                                "file_size": file_info['file_size'],
+                                "content_hash": file_info['content_hash']
+                            })
+                            
+                            pending_tasks.append({
+                                "file_id": existing_file.id,
+                                "file_path": file_info['file_path'],
+                                "task_type": "vector_index",
+                                "priority": 2
+                            })
+                            updated_count += 1
+                        else:
+                            if not existing_file.content_hash:
+                                # 旧记录缺少内容哈希，补齐以便下次按哈希比较
+                                to_update.append({
+                                    "id": existing_file.id,
+                                    "content_hash": file_info['content_hash']
+                                })
+                            if need_rebuild:
+                                # 如果是重建模式，为所有文件创建索引任务
+                                pending_tasks.append({
+                                    "file_id": existing_file.id,
+                                    "file_path": file_info['file_path'],
+                                    "task_type": "vector_index",
+                                    "priority": 3
+                                })
+                
+                except Exception as e:
+                    logger.error(f"处理文件失败: {file_info.get('file_path', '未知')}, 错误: {e}")
+                    continue
+                
+                if len(to_insert) + len(to_update) >= _SCAN_BATCH_SIZE:
+                    flush_batch()
+            
+            flush_batch()
+            logger.info(f"扫描完成，发现 {scanned_count} 个文件")
+            
+            # 所有索引任务一次性批量创建（去重规则与单个添加一致）
+            task_count = task_service.create_pending_tasks_bulk(pending_tasks)
+            
+            logger.info(f"数据库记录处理完成: 新建 {created_count} 个，更新 {updated_count} 个")
+            logger.info(f"后台任务创建完成: 创建 {task_count} 个索引任务")
+            
+            if need_rebuild:
+                logger.info("重建模式：系统将在后台重建所有向量索引")
+            elif need_repair:
+                logger.info("修复模式：系统将在后台处理受影响的文件索引")
+            else:
+                logger.info("增量模式：系统将在后台处理新增和修改的文件索引")
+        
+    except Exception as e:
+        logger.error(f"创建后台索引任务失败: {e}")
+    finally:
+        _scan_finished.set()
+
 def init_db():
     """
     智能初始化数据库：检查健康状态 -> 尝试修复 -> 重建（如果修复失败）。
@@ -255,6 +647,9 @@ def init_db():
     logger.info("开始智能初始化数据库...")
     logger.info("架构说明: SQLite存储元数据，ChromaDB存储向量数据")
     
+    # 文件状态缓存只在本次初始化流程内有效
+    _invalidate_stat_cache()
+    
     try:
         # 1. 检查数据库健康状态
         health_status = check_database_health()
@@ -283,11 +678,19 @@ def init_db():
         if need_repair and not need_rebuild:
             logger.info("开始尝试修复数据库...")
             repair_success = repair_database(health_status)
+            _invalidate_health_cache()
             
             if repair_success:
-                # 修复后重新检查健康状态
+                # 修复后只复查之前失败的检查项
+                failed_checks = []
+                if health_status["missing_tables"] or not health_status["tables_exist"]:
+                    failed_checks.append("tables")
+                if health_status["integrity_issues"]:
+                    failed_checks.append("integrity")
+                if not health_status["chromadb_healthy"]:
+                    failed_checks.append("chroma")
                 logger.info("修复完成，重新检查数据库健康状态...")
-                new_health_status = check_database_health()
+                new_health_status = check_database_health(only=failed_checks or None)
                 
                 if new_health_status["sqlite_healthy"] and new_health_status["chromadb_healthy"]:
                     logger.info("数据库修复成功，健康状态良好")
@@ -304,11 +707,12 @@ def init_db():
             logger.info("开始重建数据库...")
             if not clean_existing_data():
                 logger.error("清理现有数据失败，但继续初始化...")
+            _invalidate_health_cache()
         elif not need_repair:
             logger.info("数据库健康，保持现有数据")
         
         # 5. 创建或确保所有表存在
-        Base.metadata.create_all(bind=engine)
+        _create_missing_tables()
         if need_rebuild:
             logger.info("已重新创建所有数据库表")
         elif need_repair:
@@ -317,109 +721,23 @@ def init_db():
             logger.info("已确认所有数据库表存在")
 
         # 6. 确保ChromaDB目录存在
-        chroma_path = Path(settings.chroma_db_path)
-        if not chroma_path.exists():
+        chroma_path = _CHROMA_PATH
+        if not _cached_exists(chroma_path):
             chroma_path.mkdir(parents=True, exist_ok=True)
+            _invalidate_stat_cache(chroma_path)
             logger.info(f"已创建ChromaDB目录: {chroma_path}")
         
         logger.info("ChromaDB将由LangChain-Chroma自动管理")
         logger.info(f"ChromaDB路径: {settings.chroma_db_path}")
         
-        # 7. 扫描文件并创建后台索引任务（非阻塞）
-        logger.info("开始扫描笔记目录并创建后台索引任务...")
-        try:
-            from ..services.index_service import IndexService
-            from ..services.task_processor_service import TaskProcessorService
-            from ..database.session import get_db
-            
-            db = next(get_db())
-            index_service = IndexService(db)
-            task_service = TaskProcessorService(db)
-            
-            # 扫描notes目录中的所有文件
-            file_infos = index_service.scan_notes_directory()
-            logger.info(f"扫描完成，发现 {len(file_infos)} 个文件")
-            
-            # 为每个文件创建数据库记录（如果不存在）
-            created_count = 0
-            updated_count = 0
-            task_count = 0
-            
-            for file_info in file_infos:
-                try:
-                    # 检查文件是否已存在于数据库中
-                    from ..models.file import File
-                    existing_file = db.query(File).filter(
-                        File.file_path == file_info['file_path']
-                    ).first()
-                    
-                    if not existing_file:
-                        # 创建新的文件记录
-                        new_file = File(
-                            title=file_info['title'],
-                            content=file_info['content'],
-                            file_path=file_info['file_path'],
-                            parent_folder=file_info['parent_folder'],
-                            file_size=file_info['file_size']
-                        )
-                        db.add(new_file)
-                        db.flush()  # 获取ID但不提交
-                        
-                        # 为新文件创建向量索引任务
-                        task_service.create_pending_task(
-                            file_id=new_file.id,
-                            task_type='vector_index',
-                            priority=1
-                        )
-                        
-                        created_count += 1
-                        task_count += 1
-                        
-                    else:
-                        # 文件已存在，检查是否需要更新索引
-                        if file_info['file_size'] != existing_file.file_size:
-                            # 文件大小变化，可能内容有更新，更新记录并重建索引
-                            existing_file.content = file_info['content']
-                            existing_file.title = file_info['title']
-                            existing_file.file_size = file_info['file_size']
-                            
-                            task_service.create_pending_task(
-                                file_id=existing_file.id,
-                                task_type='vector_index',
-                                priority=2
-                            )
-                            updated_count += 1
-                            task_count += 1
-                        elif need_rebuild:
-                            # 如果是重建模式，为所有文件创建索引任务
-                            task_service.create_pending_task(
-                                file_id=existing_file.id,
-                                task_type='vector_index',
-                                priority=3
-                            )
-                            task_count += 1
-                
-                except Exception as e:
-                    logger.error(f"处理文件失败: {file_info.get('file_path', '未知')}, 错误: {e}")
-                    continue
-            
-            db.commit()
-            
-            logger.info(f"数据库记录处理完成: 新建 {created_count} 个，更新 {updated_count} 个")
-            logger.info(f"后台任务创建完成: 创建 {task_count} 个索引任务")
-            
-            if need_rebuild:
-                logger.info("重建模式：系统将在后台重建所有向量索引")
-            elif need_repair:
-                logger.info("修复模式：系统将在后台处理受影响的文件索引")
-            else:
-                logger.info("增量模式：系统将在后台处理新增和修改的文件索引")
-            
-            db.close()
-            
-        except Exception as e:
-            logger.error(f"创建后台索引任务失败: {e}")
-            # 不抛出异常，让数据库初始化继续完成
+        # 7. 在后台线程中扫描文件并创建索引任务，不阻塞应用启动
+        _scan_finished.clear()
+        threading.Thread(
+            target=_background_scan,
+            args=(need_rebuild, need_repair),
+            daemon=True
+        ).start()
+        logger.info("笔记目录扫描已转入后台执行")
         
         logger.info("数据库初始化完成。")
         if need_rebuild:
@@ -1,29 +1,104 @@
 """动态配置系统 - 支持JSON配置文件覆盖环境变量"""
 
+import functools
 import json
 import os
 import logging
+import time
 from pathlib import Path
-from typing import Optional, Any
+from types import MappingProxyType
+from typing import Optional, Any, Mapping
 from .config import Settings, settings as original_settings
 
+# orjson 直接从bytes解析，速度更快；未安装时回退到标准库json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# 配置文件mtime的重新检查间隔（秒），用于发现外部对config.json的修改
+_MTIME_CHECK_INTERVAL = 5.0
+
+# 值缓存中表示"原始配置中也不存在该属性"的哨兵
+_MISSING = object()
+
+# 映射关系：config.py中的属性名 -> JSON配置路径（元组：不可变、可哈希，可作为lru_cache的键）
+_JSON_PATH_MAPPING: Mapping[str, tuple[str, ...]] = MappingProxyType({
+    # AI模型配置
+    'openai_api_key': ('ai_settings', 'language_model', 'api_key'),
+    'openai_base_url': ('ai_settings', 'language_model', 'base_url'),
+    'openai_model': ('ai_settings', 'language_model', 'model_name'),
+
+    # 嵌入模型配置
+    'embedding_model_name': ('ai_settings', 'embedding_model', 'model_name'),
+    'embedding_base_url': ('ai_settings', 'embedding_model', 'base_url'),
+    'embedding_api_key': ('ai_settings', 'embedding_model', 'api_key'),
+    'embedding_dimension': ('ai_settings', 'embedding_model', 'dimension'),
+
+    # 高级配置
+    'semantic_search_threshold': ('advanced', 'search', 'semantic_search_threshold'),
+    'search_limit': ('advanced', 'search', 'search_limit'),
+    'enable_hierarchical_chunking': ('advanced', 'search', 'enable_hierarchical_chunking'),
+    'hierarchical_summary_max_length': ('advanced', 'chunking', 'hierarchical_summary_max_length'),
+    'hierarchical_outline_max_depth': ('advanced', 'chunking', 'hierarchical_outline_max_depth'),
+    'hierarchical_content_target_size': ('advanced', 'chunking', 'hierarchical_content_target_size'),
+    'hierarchical_content_max_size': ('advanced', 'chunking', 'hierarchical_content_max_size'),
+    'hierarchical_content_overlap': ('advanced', 'chunking', 'hierarchical_content_overlap'),
+    'llm_context_window': ('advanced', 'llm', 'context_window'),
+    'chunk_for_llm_processing': ('advanced', 'llm', 'chunk_for_llm_processing'),
+    'max_chunks_for_refine': ('advanced', 'llm', 'max_chunks_for_refine')
+})
+
+# AI相关配置项的前缀，AI禁用时这些配置项不从JSON读取
+_AI_PREFIXES = ('openai_', 'embedding_')
+
+# 原始配置上可用的全部属性名，代理对其它名称直接抛出AttributeError
+_ORIGINAL_ATTRS = frozenset(dir(original_settings))
+
 class DynamicSettings:
     """动态配置类，支持JSON配置文件覆盖"""
     
     def __init__(self):
         self.config_file_path = Path("./config.json")
         self.json_config = None
+        self._value_cache: dict[str, Any] = {}
+        self._config_stat: Optional[tuple] = None
+        self._last_mtime_check = 0.0
+        self._ai_enabled = False
+        self._flat_config: dict[str, Any] = {}
+        self._reload_listeners = []
         self.load_json_config()
     
-    def load_json_config(self):
-        """加载JSON配置文件"""
+    def _stat_config(self) -> Optional[tuple]:
+        """获取配置文件的 (mtime纳秒, 文件大小)，文件不存在时返回None"""
         try:
-            if self.config_file_path.exists():
+            stat = os.stat(self.config_file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def load_json_config(self, force: bool = False):
+        """
+        加载JSON配置文件，文件自上次加载后未修改时直接返回。
+        
+        mtime精度受文件系统时钟粒度限制，同一时钟周期内的两次写入mtime可能相同，
+        明确知道文件已写入时（如保存配置后）应传入 force=True。
+        """
+        config_stat = self._stat_config()
+        self._last_mtime_check = time.monotonic()
+        if not force and config_stat is not None and config_stat == self._config_stat and self.json_config is not None:
+            return
+        
+        self._value_cache.clear()
+        DynamicSettings._get_nested_value.cache_clear()
+        self._config_stat = config_stat
+        try:
+            if config_stat is not None:
                 logger.info(f"发现配置文件: {self.config_file_path}")
-                with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                    self.json_config = json.load(f)
+                self.json_config = _json_loads(self.config_file_path.read_bytes())
                 logger.info("JSON配置文件加载成功")
             else:
                 logger.info("未找到JSON配置文件，使用环境变量配置")
@@ -31,13 +106,49 @@ class DynamicSettings:
         except Exception as e:
             logger.error(f"加载JSON配置文件失败: {e}")
             self.json_config = None
+        
+        if self.json_config:
+            self._ai_enabled = self._get_nested_value(('ai_settings', 'enabled'), default=True)
+        else:
+            # 如果没有JSON配置，根据是否有API密钥判断
+            self._ai_enabled = bool(original_settings.openai_api_key)
+        self._flat_config = self._flatten_json_config()
+        
+        for listener in self._reload_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.warning(f"配置重新加载回调执行失败: {e}")
     
     def reload_config(self):
-        """重新加载配置"""
-        self.load_json_config()
+        """重新加载配置（不论mtime是否变化）"""
+        self.load_json_config(force=True)
+    
+    def add_reload_listener(self, listener):
+        """注册配置重新加载后的回调，用于刷新依赖配置的缓存"""
+        self._reload_listeners.append(listener)
+    
+    def _check_config_changed(self):
+        """定期检查配置文件mtime，文件被外部修改时重新加载"""
+        now = time.monotonic()
+        if now - self._last_mtime_check < _MTIME_CHECK_INTERVAL:
+            return
+        self._last_mtime_check = now
+        if self._stat_config() != self._config_stat:
+            logger.info("检测到配置文件变更，重新加载")
+            self.load_json_config()
     
     def get_value(self, key: str, default: Any = None) -> Any:
         """获取配置值，优先从JSON配置读取"""
+        self._check_config_changed()
+        value = self._value_cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._resolve_value(key)
+            self._value_cache[key] = value
+        return default if value is _MISSING else value
+    
+    def _resolve_value(self, key: str) -> Any:
+        """解析配置值（未命中缓存时调用），原始配置中也不存在时返回_MISSING"""
         # 如果有JSON配置，优先使用
         if self.json_config:
             json_value = self._get_from_json_config(key)
@@ -46,60 +157,32 @@ class DynamicSettings:
                 return json_value
         
         # 回退到原始配置（环境变量）
-        original_value = getattr(original_settings, key, default)
+        original_value = getattr(original_settings, key, _MISSING)
         logger.debug(f"从环境变量获取 {key}: {original_value}")
         return original_value
     
-    def _get_from_json_config(self, key: str) -> Any:
-        """从JSON配置中获取值"""
+    def _flatten_json_config(self) -> dict:
+        """加载时按映射表将JSON配置展开为 属性名 -> 值 的扁平字典"""
         if not self.json_config:
-            return None
-        
-        # 映射关系：config.py中的属性名 -> JSON配置路径
-        mapping = {
-            # AI模型配置
-            'openai_api_key': ['ai_settings', 'language_model', 'api_key'],
-            'openai_base_url': ['ai_settings', 'language_model', 'base_url'],
-            'openai_model': ['ai_settings', 'language_model', 'model_name'],
-            
-            # 嵌入模型配置  
-            'embedding_model_name': ['ai_settings', 'embedding_model', 'model_name'],
-            'embedding_base_url': ['ai_settings', 'embedding_model', 'base_url'],
-            'embedding_api_key': ['ai_settings', 'embedding_model', 'api_key'],
-            'embedding_dimension': ['ai_settings', 'embedding_model', 'dimension'],
-            
-            # 高级配置
-            'semantic_search_threshold': ['advanced', 'search', 'semantic_search_threshold'],
-            'search_limit': ['advanced', 'search', 'search_limit'],
-            'enable_hierarchical_chunking': ['advanced', 'search', 'enable_hierarchical_chunking'],
-            'hierarchical_summary_max_length': ['advanced', 'chunking', 'hierarchical_summary_max_length'],
-            'hierarchical_outline_max_depth': ['advanced', 'chunking', 'hierarchical_outline_max_depth'],
-            'hierarchical_content_target_size': ['advanced', 'chunking', 'hierarchical_content_target_size'],
-            'hierarchical_content_max_size': ['advanced', 'chunking', 'hierarchical_content_max_size'],
-            'hierarchical_content_overlap': ['advanced', 'chunking', 'hierarchical_content_overlap'],
-            'llm_context_window': ['advanced', 'llm', 'context_window'],
-            'chunk_for_llm_processing': ['advanced', 'llm', 'chunk_for_llm_processing'],
-            'max_chunks_for_refine': ['advanced', 'llm', 'max_chunks_for_refine']
-        }
+            return {}
         
-        if key in mapping:
-            try:
-                # 检查AI是否启用
-                ai_enabled = self._get_nested_value(['ai_settings', 'enabled'], default=True)
-                if not ai_enabled and key.startswith(('openai_', 'embedding_')):
-                    # AI已禁用，返回None使相关功能不可用
-                    return None
-                
-                path = mapping[key]
-                value = self._get_nested_value(path)
-                return value
-            except (KeyError, TypeError):
-                return None
-        
-        return None
+        flat = {}
+        for key, path in _JSON_PATH_MAPPING.items():
+            # AI已禁用时不收录AI相关配置，使相关功能不可用
+            if not self._ai_enabled and key.startswith(_AI_PREFIXES):
+                continue
+            value = self._get_nested_value(path)
+            if value is not None:
+                flat[key] = value
+        return flat
+    
+    def _get_from_json_config(self, key: str) -> Any:
+        """从JSON配置中获取值"""
+        return self._flat_config.get(key)
     
-    def _get_nested_value(self, path: list, default=None):
-        """从嵌套字典中获取值"""
+    @functools.lru_cache(maxsize=256)
+    def _get_nested_value(self, path: tuple, default=None):
+        """从嵌套字典中获取值（json_config在两次加载之间不变，加载时清空缓存）"""
         try:
             value = self.json_config
             for key in path:
@@ -109,11 +192,9 @@ class DynamicSettings:
             return default
     
     def is_ai_enabled(self) -> bool:
-        """检查AI是否启用"""
-        if self.json_config:
-            return self._get_nested_value(['ai_settings', 'enabled'], default=True)
-        # 如果没有JSON配置，根据是否有API密钥判断
-        return bool(original_settings.openai_api_key)
+        """检查AI是否启用（加载配置时计算并缓存）"""
+        self._check_config_changed()
+        return self._ai_enabled
 
 class DynamicSettingsProxy:
     """动态配置代理类，提供与原Settings类相同的接口"""
@@ -121,23 +202,34 @@ class DynamicSettingsProxy:
     def __init__(self):
         self.dynamic_settings = DynamicSettings()
         self._original_settings = original_settings
+        self._populate_static_fields()
     
-    def __getattr__(self, name: str):
-        """动态获取配置属性"""
-        # 先尝试从动态配置获取
-        try:
-            value = self.dynamic_settings.get_value(name)
-            if value is not None:
-                return value
-        except Exception as e:
-            logger.warning(f"从动态配置获取 {name} 失败: {e}")
+    def _populate_static_fields(self):
+        """
+        将不受config.json影响的配置项预先解析写入实例字典。
         
-        # 回退到原始配置
-        return getattr(self._original_settings, name)
+        这些属性的读取直接命中实例字典，不再经过__getattr__；
+        可由JSON覆盖的配置项仍走__getattr__，以便感知配置文件变更。
+        """
+        for name in type(self._original_settings).model_fields:
+            if name not in _JSON_PATH_MAPPING:
+                self.__dict__[name] = getattr(self._original_settings, name)
+    
+    def __getattr__(self, name: str):
+        """动态获取配置属性（仅在实例字典未命中时调用）"""
+        if name not in _ORIGINAL_ATTRS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        # get_value 在JSON未覆盖时已回退到原始配置（环境变量）
+        return self.dynamic_settings.get_value(name)
     
     def reload_config(self):
         """重新加载配置"""
         self.dynamic_settings.reload_config()
+        self._populate_static_fields()
+    
+    def add_reload_listener(self, listener):
+        """注册配置重新加载后的回调"""
+        self.dynamic_settings.add_reload_listener(listener)
     
     def get_embedding_base_url(self) -> Optional[str]:
         """获取嵌入模型API地址，优先使用专用配置，否则回退到通用配置"""
@@ -153,6 +245,10 @@ class DynamicSettingsProxy:
             return embedding_api_key
         return self.dynamic_settings.get_value('openai_api_key')
     
+    def get_embedding_cache_path(self) -> Optional[str]:
+        """获取嵌入缓存路径（不受JSON配置影响）"""
+        return self._original_settings.get_embedding_cache_path()
+    
     def is_ai_enabled(self) -> bool:
         """检查AI是否启用"""
         return self.dynamic_settings.is_ai_enabled()
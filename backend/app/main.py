@@ -1,101 +1,212 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from .database.init_db import init_db
+from .database.init_db import init_db, wait_for_startup_scan
 from .api import files, links, tags, ai, index, mcp, file_upload, config, simple_memory
 from .dynamic_config import settings
+from .models.base import SessionLocal
+from .services.mcp_service import create_http_client
+import asyncio
+import contextlib
 import logging
+import time
+from typing import Optional
+
+# 启动期间多次使用、运行期不变的配置，模块加载时读取一次
+_API_PREFIX = settings.api_prefix
+_CORS_ORIGINS = tuple(settings.cors_origins)
+_LOG_LEVEL = settings.log_level
 
 # 配置日志
-logging.basicConfig(level=getattr(logging, settings.log_level))
+logging.basicConfig(level=getattr(logging, _LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 进程级共享HTTP客户端，供MCP等出站请求复用连接
+    app.state.http = create_http_client()
+
+    logger.info("应用启动事件: 正在初始化数据库...")
+    success = await asyncio.to_thread(init_db)
+    background_task = None
+    cleanup_task = None
+    if success:
+        logger.info("数据库初始化成功。")
+        logger.info(f"笔记目录: {settings.notes_directory}")
+        logger.info(f"OpenAI配置状态: {'已配置' if settings.openai_api_key else '未配置'}")
+        
+        # 启动后台任务处理（非阻塞），与应用共享事件循环
+        background_task = asyncio.create_task(_background_tasks())
+        logger.info("后台任务处理已启动")
+        
+        # 常驻的旧任务清理循环，替代外部定时脚本
+        cleanup_task = asyncio.create_task(_periodic_task_cleanup())
+    else:
+        logger.error("数据库初始化失败，请检查日志。")
+
+    yield
+
+    # 关闭时取消后台任务，不再派发新的索引任务
+    for task in (background_task, cleanup_task):
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    await app.state.http.aclose()
+
 app = FastAPI(
     title="AI笔记本后端API",
     description="纯本地、AI增强的个人知识管理系统后端服务",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins,
+    allow_origins=_CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("应用启动事件: 正在初始化数据库...")
-    success = init_db()
-    if success:
-        logger.info("数据库初始化成功。")
-        logger.info(f"笔记目录: {settings.notes_directory}")
-        logger.info(f"OpenAI配置状态: {'已配置' if settings.openai_api_key else '未配置'}")
-        
-        # 启动后台任务处理（非阻塞）
-        import asyncio
-        import threading
-        def start_background_tasks():
+# 启动后并发处理的任务数上限：耗时主要在嵌入/LLM请求上，少量并发即可重叠网络等待；
+# 每个任务都有自己的SQLite写会话，而SQLite同一时刻只有一个写者，并发过高只会加剧锁等待
+_TASK_CONCURRENCY = 3
+
+# 每次从任务队列中取出的任务数量
+_TASK_PAGE_SIZE = 12
+
+# 单次启动处理任务的时间预算（秒），超出后不再开始新任务，剩余任务保持pending留待下次处理
+_TASK_TIME_BUDGET = 15 * 60
+
+def _prepare_pending_tasks(task_service) -> bool:
+    """清理过期锁文件、等待启动扫描完成并获取任务处理锁"""
+    # 应用启动时清理过期的锁文件
+    logger.info("🧹 应用启动，清理过期的锁文件...")
+    task_service._cleanup_stale_lock_on_startup()
+    
+    # 等待启动扫描创建完索引任务后再开始处理
+    wait_for_startup_scan()
+    return task_service._acquire_lock()
+
+def _process_one_task(task_id: int) -> bool:
+    """在工作线程中使用独立会话处理单个任务"""
+    from .services.task_processor_service import TaskProcessorService
+
+    with SessionLocal() as db:
+        return TaskProcessorService(db).process_task_by_id(task_id)
+
+async def _process_pending_tasks(task_service):
+    """分页取出待处理任务，始终保持至多 _TASK_CONCURRENCY 个任务在工作线程中执行，超出时间预算后停止"""
+    semaphore = asyncio.Semaphore(_TASK_CONCURRENCY)
+    start_time = time.monotonic()
+    deadline = start_time + _TASK_TIME_BUDGET
+
+    async def run(task_id: int) -> Optional[bool]:
+        async with semaphore:
+            if time.monotonic() > deadline:
+                return None  # 未开始的任务仍为pending
+            return await asyncio.to_thread(_process_one_task, task_id)
+
+    processed_count = 0
+    success_count = 0
+    while True:
+        tasks = await asyncio.to_thread(task_service.get_pending_tasks, _TASK_PAGE_SIZE)
+        if not tasks:
+            break
+        results = await asyncio.gather(*(run(task.id) for task in tasks), return_exceptions=True)
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.error(f"💥 任务处理异常: {task.id}, 错误: {result}")
+        processed_count += sum(1 for result in results if result is not None)
+        success_count += sum(1 for result in results if result is True)
+        if time.monotonic() > deadline:
+            logger.warning(f"任务处理时间超过 {_TASK_TIME_BUDGET} 秒，暂停处理以避免长期占用，剩余任务留待下次启动处理")
+            break
+
+    duration = time.monotonic() - start_time
+    logger.info(f"🎉 任务处理完成，共处理 {processed_count} 个任务，成功 {success_count} 个，耗时 {duration:.2f} 秒")
+
+async def _background_tasks():
+    """后台任务协程：阻塞的数据库与索引操作放到工作线程中执行，不占用事件循环"""
+    from .services.task_processor_service import TaskProcessorService
+
+    try:
+        with SessionLocal() as db:
+            task_service = TaskProcessorService(db)
+            if not await asyncio.to_thread(_prepare_pending_tasks, task_service):
+                return
+            
+            logger.info("开始处理后台索引任务...")
             try:
-                from .services.task_processor_service import TaskProcessorService
-                from .database.session import get_db
-                
-                db = next(get_db())
-                task_service = TaskProcessorService(db)
-                
-                # 应用启动时清理过期的锁文件
-                logger.info("🧹 应用启动，清理过期的锁文件...")
-                task_service._cleanup_stale_lock_on_startup()
-                
-                logger.info("开始处理后台索引任务...")
-                task_service.process_all_pending_tasks()
-                logger.info("后台索引任务处理完成")
-                
-                db.close()
-                
+                await _process_pending_tasks(task_service)
+            finally:
+                await asyncio.to_thread(task_service._release_lock)
+            logger.info("后台索引任务处理完成")
+    except Exception as e:
+        logger.error(f"后台任务处理失败: {e}")
+
+# 旧任务清理的间隔（秒）与保留天数
+_TASK_CLEANUP_INTERVAL = 6 * 60 * 60
+_TASK_RETENTION_DAYS = 7
+
+async def _periodic_task_cleanup():
+    """定期清理已完成/失败的旧任务记录，整个循环复用同一个数据库会话"""
+    from .services.task_processor_service import TaskProcessorService
+
+    with SessionLocal() as db:
+        db.expire_on_commit = False
+        task_service = TaskProcessorService(db)
+        while True:
+            await asyncio.sleep(_TASK_CLEANUP_INTERVAL)
+            try:
+                await asyncio.to_thread(task_service.cleanup_old_tasks, _TASK_RETENTION_DAYS)
             except Exception as e:
-                logger.error(f"后台任务处理失败: {e}")
-        
-        # 在单独的线程中启动后台任务，不阻塞应用启动
-        background_thread = threading.Thread(target=start_background_tasks, daemon=True)
-        background_thread.start()
-        logger.info("后台任务处理线程已启动")
-        
-    else:
-        logger.error("数据库初始化失败，请检查日志。")
+                logger.error(f"定期清理旧任务失败: {e}")
 
 # 注册API路由
-app.include_router(files.router, prefix=settings.api_prefix, tags=["files"])
-app.include_router(links.router, prefix=settings.api_prefix, tags=["links"])
-app.include_router(tags.router, prefix=settings.api_prefix, tags=["tags"])
-app.include_router(ai.router, prefix=settings.api_prefix, tags=["ai"])
-app.include_router(index.router, prefix=f"{settings.api_prefix}/index", tags=["index"])
-app.include_router(mcp.router, prefix=settings.api_prefix, tags=["mcp"])
-app.include_router(file_upload.router, prefix=f"{settings.api_prefix}/file-upload", tags=["file-upload"])
-app.include_router(config.router, prefix=settings.api_prefix, tags=["config"])
-app.include_router(simple_memory.router, prefix=f"{settings.api_prefix}/simple-memory", tags=["simple-memory"])
+app.include_router(files.router, prefix=_API_PREFIX, tags=["files"])
+app.include_router(links.router, prefix=_API_PREFIX, tags=["links"])
+app.include_router(tags.router, prefix=_API_PREFIX, tags=["tags"])
+app.include_router(ai.router, prefix=_API_PREFIX, tags=["ai"])
+app.include_router(index.router, prefix=f"{_API_PREFIX}/index", tags=["index"])
+app.include_router(mcp.router, prefix=_API_PREFIX, tags=["mcp"])
+app.include_router(file_upload.router, prefix=f"{_API_PREFIX}/file-upload", tags=["file-upload"])
+app.include_router(config.router, prefix=_API_PREFIX, tags=["config"])
+app.include_router(simple_memory.router, prefix=f"{_API_PREFIX}/simple-memory", tags=["simple-memory"])
 
-@app.get("/")
-async def root():
-    return {
+# 根路径与健康检查的响应体只随配置变化，配置重新加载时重建
+_status_payloads = {}
+
+def _refresh_status_payloads():
+    """根据当前配置重建根路径与健康检查的响应体"""
+    ai_enabled = settings.is_ai_enabled()
+    _status_payloads["root"] = {
         "message": "AI笔记本后端服务运行中", 
         "version": "1.0.0",
-        "ai_enabled": settings.is_ai_enabled(),
+        "ai_enabled": ai_enabled,
         "mcp_enabled": True
     }
-
-@app.get("/health")
-async def health_check():
-    return {
+    _status_payloads["health"] = {
         "status": "healthy", 
         "service": "ai-notebook-backend",
         "notes_directory": settings.notes_directory,
-        "ai_configured": settings.is_ai_enabled(),
+        "ai_configured": ai_enabled,
         "mcp_configured": True
     }
 
+_refresh_status_payloads()
+settings.add_reload_listener(_refresh_status_payloads)
+
+@app.get("/")
+async def root():
+    return _status_payloads["root"]
+
+@app.get("/health")
+async def health_check():
+    return _status_payloads["health"]
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -1,6 +1,5 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Mapped, mapped_column
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker, Mapped, mapped_column
 from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, LargeBinary, Float
 from datetime import datetime
 import os
@@ -17,9 +16,31 @@ except ImportError:
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    pool_size=10,     # 后台索引线程写入时允许多个请求线程并行读取
+    max_overflow=20,
     echo=False # 设置为True可以看到SQL日志
 )
 
+# SQLite连接级PRAGMA：WAL允许后台写入时并发读取，NORMAL同步级别在WAL下仍保证一致性
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """每个新建的SQLite连接都应用性能相关的PRAGMA"""
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
 # 创建一个会话Local类
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
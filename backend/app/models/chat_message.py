@@ -1,21 +1,23 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, ForeignKey, Float
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, ForeignKey, Float
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.sqlite import JSON
 from .base import Base
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
-    id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, ForeignKey("chat_sessions.session_id", ondelete="CASCADE"), nullable=False, index=True)
-    message_type = Column(String, nullable=False, index=True)
-    content = Column(Text, nullable=False)
-    context_files = Column(JSON) # 存储相关文件列表（JSON格式）
-    model_name = Column(String)
-    tokens_used = Column(Integer)
-    response_time = Column(Float)
-    created_at = Column(DateTime, default=func.now(), index=True)
-    message_metadata = Column(JSON)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    session_id: Mapped[str] = mapped_column(String, ForeignKey("chat_sessions.session_id", ondelete="CASCADE"), nullable=False, index=True)
+    message_type: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    context_files: Mapped[Optional[list]] = mapped_column(JSON) # 存储相关文件列表（JSON格式）
+    model_name: Mapped[Optional[str]] = mapped_column(String)
+    tokens_used: Mapped[Optional[int]] = mapped_column(Integer)
+    response_time: Mapped[Optional[float]] = mapped_column(Float)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), index=True)
+    message_metadata: Mapped[Optional[dict]] = mapped_column(JSON)
 
-    session = relationship("ChatSession", backref="messages") 
\ No newline at end of file
+    session = relationship("ChatSession", back_populates="messages") 
\ No newline at end of file
@@ -1,19 +1,22 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
 
-    id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, unique=True, nullable=False, index=True)
-    title = Column(String)
-    created_at = Column(DateTime, default=func.now(), index=True)
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-    is_active = Column(Boolean, default=True, index=True)
-    session_metadata = Column(JSON) 
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    session_id: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    title: Mapped[Optional[str]] = mapped_column(String)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), index=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True, index=True)
+    session_metadata: Mapped[Optional[dict]] = mapped_column(JSON) 
     
     # 关联关系
-    # Note: Memory relationships removed (using simple JSON file-based memory system now) 
\ No newline at end of file
+    # Note: Memory relationships removed (using simple JSON file-based memory system now)
+    messages = relationship("ChatMessage", back_populates="session", lazy="selectin") 
\ No newline at end of file
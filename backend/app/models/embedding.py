@@ -1,28 +1,50 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, LargeBinary, Float, ForeignKey, UniqueConstraint
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, LargeBinary, Float, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
+import numpy as np
 from .base import Base
 
+class Float16Vector(TypeDecorator):
+    """以float16字节串存储向量（存储与I/O减半），读取时还原为float32数组以保证计算精度"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return np.asarray(value, dtype=np.float16).tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=np.float16).astype(np.float32)
+
 class Embedding(Base):
     __tablename__ = "embeddings"
 
-    id = Column(Integer, primary_key=True, index=True)
-    file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False, index=True)
-    chunk_index = Column(Integer, nullable=False)
-    chunk_text = Column(Text, nullable=False)
-    chunk_hash = Column(String, nullable=False)
-    embedding_vector = Column(LargeBinary) # 存储序列化后的向量数据
-    vector_model = Column(String, nullable=False, index=True)
-    created_at = Column(DateTime, default=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False, index=True)
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    chunk_text: Mapped[str] = mapped_column(Text, nullable=False)
+    chunk_hash: Mapped[str] = mapped_column(String, nullable=False)
+    # 存储float16序列化后的向量数据；向量实际保存在ChromaDB，此列不写入，查询时延迟加载不随行读取
+    embedding_vector: Mapped[Optional[np.ndarray]] = mapped_column(Float16Vector, deferred=True)
+    vector_model: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
     
     # 多层次分块扩展字段
-    chunk_type = Column(String, default='content', index=True)  # 'summary', 'outline', 'content'
-    chunk_level = Column(Integer, default=3, index=True)        # 1=摘要, 2=大纲, 3=内容
-    parent_heading = Column(Text, nullable=True)                # 父级标题/章节
-    section_path = Column(Text, nullable=True)                  # 章节路径，如 "第一章/第二节"
+    chunk_type: Mapped[Optional[str]] = mapped_column(String, default='content', index=True)  # 'summary', 'outline', 'content'
+    chunk_level: Mapped[Optional[int]] = mapped_column(Integer, default=3, index=True)        # 1=摘要, 2=大纲, 3=内容
+    parent_heading: Mapped[Optional[str]] = mapped_column(Text, nullable=True)                # 父级标题/章节
+    section_path: Mapped[Optional[str]] = mapped_column(Text, nullable=True)                  # 章节路径，如 "第一章/第二节"
 
-    file = relationship("File", backref="embeddings")
+    file = relationship("File", back_populates="embeddings")
 
     __table_args__ = (
         UniqueConstraint("file_id", "chunk_index", name="uq_file_chunk"),
+        # 多层次检索按模型、块类型与层级预过滤，file_id 使索引可覆盖过滤结果
+        Index("ix_emb_model_type_level_file", "vector_model", "chunk_type", "chunk_level", "file_id"),
     ) 
\ No newline at end of file
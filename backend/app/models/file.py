@@ -1,23 +1,31 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text
 from sqlalchemy.dialects.sqlite import JSON
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
 class File(Base):
     __tablename__ = "files"
 
-    id = Column(Integer, primary_key=True, index=True)
-    file_path = Column(String, unique=True, nullable=False, index=True)
-    title = Column(String, nullable=False)
-    content = Column(Text)
-    content_hash = Column(String)
-    file_size = Column(Integer, default=0)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now())
-    is_deleted = Column(Boolean, default=False, index=True)
-    parent_folder = Column(String, index=True)
-    file_metadata = Column(JSON) 
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    file_path: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[Optional[str]] = mapped_column(Text)
+    content_hash: Mapped[Optional[str]] = mapped_column(String)
+    file_size: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
+    is_deleted: Mapped[Optional[bool]] = mapped_column(Boolean, default=False, index=True)
+    parent_folder: Mapped[Optional[str]] = mapped_column(String, index=True)
+    file_metadata: Mapped[Optional[dict]] = mapped_column(JSON) 
     
     # 关联关系
-    # Note: Memory relationships removed (using simple JSON file-based memory system now) 
\ No newline at end of file
+    # Note: Memory relationships removed (using simple JSON file-based memory system now)
+    # 向量块数据量大，默认不加载，需要时通过 selectinload(File.embeddings) 显式加载；
+    # SQLite未开启外键约束，ON DELETE CASCADE不生效，删除文件时需显式删除其嵌入记录（见 FileService.hard_delete_file）
+    embeddings = relationship("Embedding", back_populates="file", lazy="noload")
+    file_tags = relationship("FileTag", back_populates="file")
+    outgoing_links = relationship("Link", foreign_keys="Link.source_file_id", back_populates="source_file")
+    incoming_links = relationship("Link", foreign_keys="Link.target_file_id", back_populates="target_file") 
\ No newline at end of file
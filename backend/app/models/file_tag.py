@@ -1,20 +1,22 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, ForeignKey, Float, UniqueConstraint
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, ForeignKey, Float, UniqueConstraint
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
 class FileTag(Base):
     __tablename__ = "file_tags"
 
-    id = Column(Integer, primary_key=True, index=True)
-    file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False, index=True)
-    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), nullable=False, index=True)
-    relevance_score = Column(Float, default=1.0)
-    is_manual = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=func.now())
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False, index=True)
+    tag_id: Mapped[int] = mapped_column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), nullable=False, index=True)
+    relevance_score: Mapped[Optional[float]] = mapped_column(Float, default=1.0)
+    is_manual: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
 
-    file = relationship("File", backref="file_tags")
-    tag = relationship("Tag", backref="file_tags")
+    file = relationship("File", back_populates="file_tags")
+    tag = relationship("Tag", back_populates="file_tags")
 
     __table_args__ = (
         UniqueConstraint("file_id", "tag_id", name="uq_file_tag"),
@@ -1,21 +1,23 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, ForeignKey, Float
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, ForeignKey, Float
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
 class Link(Base):
     __tablename__ = "links"
 
-    id = Column(Integer, primary_key=True, index=True)
-    source_file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False, index=True)
-    target_file_id = Column(Integer, ForeignKey("files.id", ondelete="SET NULL"), index=True)
-    link_text = Column(Text, nullable=True)
-    link_type = Column(String, default='wikilink', index=True)
-    anchor_text = Column(Text, nullable=True)
-    position_start = Column(Integer)
-    position_end = Column(Integer)
-    created_at = Column(DateTime, default=func.now())
-    is_valid = Column(Boolean, default=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    source_file_id: Mapped[int] = mapped_column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False, index=True)
+    target_file_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("files.id", ondelete="SET NULL"), index=True)
+    link_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    link_type: Mapped[Optional[str]] = mapped_column(String, default='wikilink', index=True)
+    anchor_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    position_start: Mapped[Optional[int]] = mapped_column(Integer)
+    position_end: Mapped[Optional[int]] = mapped_column(Integer)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
+    is_valid: Mapped[Optional[bool]] = mapped_column(Boolean, default=True, index=True)
 
-    source_file = relationship("File", foreign_keys=[source_file_id], backref="outgoing_links")
-    target_file = relationship("File", foreign_keys=[target_file_id], backref="incoming_links") 
\ No newline at end of file
+    source_file = relationship("File", foreign_keys=[source_file_id], back_populates="outgoing_links")
+    target_file = relationship("File", foreign_keys=[target_file_id], back_populates="incoming_links") 
\ No newline at end of file
@@ -1,15 +1,18 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, Float
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, Float
 from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
 class SearchHistory(Base):
     __tablename__ = "search_history"
 
-    id = Column(Integer, primary_key=True, index=True)
-    query = Column(Text, nullable=False, index=True)
-    search_type = Column(String, default='mixed')
-    results_count = Column(Integer, default=0)
-    response_time = Column(Float)
-    created_at = Column(DateTime, default=func.now(), index=True)
-    user_agent = Column(String)
-    session_id = Column(String, index=True) 
\ No newline at end of file
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    query: Mapped[str] = mapped_column(Text, nullable=False, index=True)
+    search_type: Mapped[Optional[str]] = mapped_column(String, default='mixed')
+    results_count: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    response_time: Mapped[Optional[float]] = mapped_column(Float)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), index=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String)
+    session_id: Mapped[Optional[str]] = mapped_column(String, index=True) 
\ No newline at end of file
@@ -1,15 +1,18 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text
 from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
 class SystemConfig(Base):
     __tablename__ = "system_config"
 
-    id = Column(Integer, primary_key=True, index=True)
-    config_key = Column(String, unique=True, nullable=False, index=True)
-    config_value = Column(Text)
-    config_type = Column(String, default='string')
-    description = Column(Text)
-    is_encrypted = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    config_key: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    config_value: Mapped[Optional[str]] = mapped_column(Text)
+    config_type: Mapped[Optional[str]] = mapped_column(String, default='string')
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    is_encrypted: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), onupdate=func.now()) 
\ No newline at end of file
@@ -1,15 +1,20 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Boolean, DateTime, Integer, String, Text
 from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
 class Tag(Base):
     __tablename__ = "tags"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, nullable=False, index=True)
-    color = Column(String)
-    description = Column(Text)
-    is_auto_generated = Column(Boolean, default=False)
-    usage_count = Column(Integer, default=0, index=True)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    color: Mapped[Optional[str]] = mapped_column(String)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    is_auto_generated: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    usage_count: Mapped[Optional[int]] = mapped_column(Integer, default=0, index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+
+    file_tags = relationship("FileTag", back_populates="tag")
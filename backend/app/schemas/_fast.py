@@ -0,0 +1,79 @@
+"""
+高频列表接口使用的msgspec响应结构
+
+字段与对应的pydantic响应模型保持一致；pydantic模型仍用于请求校验与OpenAPI文档。
+新增或修改字段时两边需同步，一致性由 tests/test_fast_schemas.py 校验。
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Type
+
+import msgspec
+from fastapi import Response
+
+_encoder = msgspec.json.Encoder()
+
+
+class FileResponseFast(msgspec.Struct, frozen=True, gc=False):
+    """对应 schemas.file.FileResponse"""
+    id: int
+    file_path: str
+    title: str
+    content: Optional[str]
+    content_hash: Optional[str]
+    file_size: Optional[int]
+    is_deleted: Optional[bool]
+    parent_folder: Optional[str]
+    file_metadata: Optional[Dict[str, Any]]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+class TagResponseFast(msgspec.Struct, frozen=True, gc=False):
+    """对应 schemas.tag.TagResponse"""
+    id: int
+    name: str
+    color: Optional[str]
+    description: Optional[str]
+    is_auto_generated: Optional[bool]
+    usage_count: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+class MCPToolResponseFast(msgspec.Struct, frozen=True, gc=False):
+    """对应 schemas.mcp.MCPToolResponse"""
+    id: int
+    server_id: int
+    tool_name: str
+    tool_description: Optional[str]
+    input_schema: Optional[Dict[str, Any]]
+    output_schema: Optional[Dict[str, Any]]
+    tool_config: Optional[Dict[str, Any]]
+    is_available: Optional[bool]
+    usage_count: Optional[int]
+    last_used_at: Optional[datetime]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+class MCPToolCallResponseFast(msgspec.Struct, frozen=True, gc=False):
+    """对应 schemas.mcp.MCPToolCallResponse"""
+    id: int
+    tool_id: int
+    session_id: Optional[str]
+    call_context: Optional[str]
+    input_data: Dict[str, Any]
+    output_data: Optional[Dict[str, Any]]
+    call_status: str
+    error_message: Optional[str]
+    execution_time_ms: Optional[int]
+    ai_reasoning: Optional[str]
+    user_feedback: Optional[int]
+    created_at: Optional[datetime]
+
+
+def struct_list_response(struct_cls: Type[msgspec.Struct], rows: Iterable) -> Response:
+    """用ORM行的属性直接构建Struct并编码为JSON响应，绕过pydantic的response_model处理"""
+    fields = struct_cls.__struct_fields__
+    items = [struct_cls(**{name: getattr(row, name) for name in fields}) for row in rows]
+    return Response(content=_encoder.encode(items), media_type="application/json")
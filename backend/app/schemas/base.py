@@ -0,0 +1,36 @@
+"""
+响应模型公共基类
+"""
+from functools import lru_cache
+from typing import Iterable, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+class ORMResponseModel(BaseModel):
+    """由数据库行构建的响应模型"""
+
+    @classmethod
+    def from_orm_fast(cls, obj):
+        """跳过校验，直接用ORM对象的属性构建实例（仅用于来自数据库的可信数据）"""
+        return cls.model_construct(**{name: getattr(obj, name) for name in cls.model_fields})
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model_cls: Type[ORMResponseModel]) -> TypeAdapter:
+    """获取 List[model_cls] 的TypeAdapter，同一模型只构建一次"""
+    return TypeAdapter(List[model_cls])
+
+
+def orm_list_response(model_cls: Type[ORMResponseModel], rows: Iterable, adapter: Optional[TypeAdapter] = None) -> Response:
+    """
+    将ORM行列表直接序列化为JSON响应。
+
+    直接返回Response时FastAPI不再按response_model重新校验，
+    路由上的response_model仍用于生成OpenAPI文档。
+    未传入adapter时使用按模型缓存的适配器（适用于延迟构建schema的模型）。
+    """
+    items = [model_cls.from_orm_fast(row) for row in rows]
+    adapter = adapter or list_adapter(model_cls)
+    return Response(content=adapter.dump_json(items, by_alias=False), media_type="application/json")
@@ -1,12 +1,12 @@
 """配置相关的Pydantic模型"""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
 
 class AIProvider(str, Enum):
-    """AI服务提供商"""
+    """AI服务提供商（str枚举，JSON序列化时直接输出字符串值）"""
     OPENAI = "openai"
     OPENAI_COMPATIBLE = "openai_compatible"
     ANTHROPIC = "anthropic"
@@ -29,8 +29,7 @@ class LanguageModelConfig(BaseModel):
     max_tokens: int = Field(default=2048, gt=0)
     timeout: int = Field(default=30, gt=0)
     
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(defer_build=True)
 
 class EmbeddingModelConfig(BaseModel):
     """嵌入模型配置"""
@@ -40,8 +39,7 @@ class EmbeddingModelConfig(BaseModel):
     model_name: str = "quentinz/bge-large-zh-v1.5:latest"
     dimension: int = Field(default=1024, gt=0)
     
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(defer_build=True)
 
 class AISettings(BaseModel):
     """AI设置"""
@@ -50,23 +48,25 @@ class AISettings(BaseModel):
     language_model: Optional[LanguageModelConfig] = None
     embedding_model: Optional[EmbeddingModelConfig] = None
     
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(defer_build=True)
 
 class ConfigPreset(BaseModel):
     """配置预设"""
+    model_config = ConfigDict(defer_build=True)
     name: str
     description: str
     ai_settings: AISettings
 
 class SearchConfig(BaseModel):
     """搜索配置"""
+    model_config = ConfigDict(defer_build=True)
     semantic_search_threshold: float = Field(default=1.0, ge=0.0, le=2.0)
     search_limit: int = Field(default=50, gt=0, le=500)
     enable_hierarchical_chunking: bool = True
 
 class ChunkingConfig(BaseModel):
     """分块配置"""
+    model_config = ConfigDict(defer_build=True)
     hierarchical_summary_max_length: int = Field(default=2000, gt=0)
     hierarchical_outline_max_depth: int = Field(default=5, gt=0, le=10)
     hierarchical_content_target_size: int = Field(default=1000, gt=0)
@@ -75,18 +75,21 @@ class ChunkingConfig(BaseModel):
 
 class LLMConfig(BaseModel):
     """LLM高级配置"""
+    model_config = ConfigDict(defer_build=True)
     context_window: int = Field(default=131072, gt=0)
     chunk_for_llm_processing: int = Field(default=30000, gt=0)
     max_chunks_for_refine: int = Field(default=20, gt=0)
 
 class AdvancedConfig(BaseModel):
     """高级配置"""
-    search: SearchConfig = SearchConfig()
-    chunking: ChunkingConfig = ChunkingConfig()
-    llm: LLMConfig = LLMConfig()
+    model_config = ConfigDict(defer_build=True)
+    search: SearchConfig = Field(default_factory=SearchConfig)
+    chunking: ChunkingConfig = Field(default_factory=ChunkingConfig)
+    llm: LLMConfig = Field(default_factory=LLMConfig)
 
 class ApplicationConfig(BaseModel):
     """应用程序配置"""
+    model_config = ConfigDict(defer_build=True)
     theme: str = "light"
     language: str = "zh-CN"
     auto_save: bool = True
@@ -94,6 +97,7 @@ class ApplicationConfig(BaseModel):
 
 class ConfigMeta(BaseModel):
     """配置元数据"""
+    model_config = ConfigDict(defer_build=True)
     config_version: str = "1.0"
     last_updated: datetime = Field(default_factory=datetime.now)
     created_by: str = "user"
@@ -101,20 +105,24 @@ class ConfigMeta(BaseModel):
 
 class AppConfig(BaseModel):
     """完整的应用配置"""
-    ai_settings: AISettings = AISettings()
-    presets: Dict[str, ConfigPreset] = {}
-    application: ApplicationConfig = ApplicationConfig()
-    advanced: AdvancedConfig = AdvancedConfig()
-    meta: ConfigMeta = ConfigMeta()
+    model_config = ConfigDict(defer_build=True)
+    # 使用default_factory：嵌套模型在首次实例化时才构建校验器，而不是在导入时
+    ai_settings: AISettings = Field(default_factory=AISettings)
+    presets: Dict[str, ConfigPreset] = Field(default_factory=dict)
+    application: ApplicationConfig = Field(default_factory=ApplicationConfig)
+    advanced: AdvancedConfig = Field(default_factory=AdvancedConfig)
+    meta: ConfigMeta = Field(default_factory=ConfigMeta)
 
 class ConfigUpdateRequest(BaseModel):
     """配置更新请求"""
+    model_config = ConfigDict(defer_build=True)
     ai_settings: Optional[AISettings] = None
     application: Optional[ApplicationConfig] = None
     advanced: Optional[AdvancedConfig] = None
 
 class ConfigValidationResult(BaseModel):
     """配置验证结果"""
+    model_config = ConfigDict(defer_build=True)
     valid: bool
     errors: List[str] = []
     warnings: List[str] = []
@@ -123,6 +131,7 @@ class ConfigValidationResult(BaseModel):
 
 class ConfigTestResult(BaseModel):
     """配置测试结果"""
+    model_config = ConfigDict(defer_build=True)
     language_model: Dict[str, Any] = {}
     embedding_model: Dict[str, Any] = {}
     overall_status: str = "unknown"
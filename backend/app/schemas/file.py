@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import List, Optional
+from .base import ORMResponseModel
 
 class FileBase(BaseModel):
     file_path: str = Field(..., description="文件路径（相对路径），如 notes/技术/Python.md")
@@ -19,10 +20,9 @@ class FileUpdate(FileBase):
     file_path: Optional[str] = None
     title: Optional[str] = None
     
-class FileResponse(FileBase):
+class FileResponse(FileBase, ORMResponseModel):
     id: int
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore") 
\ No newline at end of file
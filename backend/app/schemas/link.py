@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from .base import ORMResponseModel
 
 class LinkBase(BaseModel):
     source_file_id: int = Field(..., description="源文件ID")
@@ -19,9 +20,11 @@ class LinkUpdate(LinkBase):
     source_file_id: Optional[int] = None
     link_text: Optional[str] = None
 
-class LinkResponse(LinkBase):
+class LinkResponse(LinkBase, ORMResponseModel):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore")
+
+# 列表响应的序列化适配器，模块加载时构建一次
+LINK_LIST_ADAPTER = TypeAdapter(List[LinkResponse])
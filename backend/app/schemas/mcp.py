@@ -1,9 +1,13 @@
 """
 MCP相关的数据传输对象(DTO)
 """
-from typing import Optional, Dict, Any, List
+from typing import Annotated, Optional, Dict, Any, List, Literal
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, SkipValidation
+from .base import ORMResponseModel
+
+# 来自数据库或服务端自身的JSON字段：内容可信，跳过pydantic对嵌套dict的逐项校验
+TrustedJSON = Annotated[Dict[str, Any], SkipValidation]
 
 
 class MCPServerBase(BaseModel):
@@ -32,8 +36,10 @@ class MCPServerUpdate(BaseModel):
     is_enabled: Optional[bool] = None
 
 
-class MCPServerResponse(MCPServerBase):
+class MCPServerResponse(MCPServerBase, ORMResponseModel):
     """MCP Server响应Schema"""
+    server_config: TrustedJSON
+    auth_config: Optional[TrustedJSON] = None
     id: int
     is_enabled: bool
     is_connected: bool
@@ -43,8 +49,7 @@ class MCPServerResponse(MCPServerBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore", defer_build=True)
 
 
 class MCPToolBase(BaseModel):
@@ -70,8 +75,11 @@ class MCPToolUpdate(BaseModel):
     is_available: Optional[bool] = None
 
 
-class MCPToolResponse(MCPToolBase):
+class MCPToolResponse(MCPToolBase, ORMResponseModel):
     """MCP Tool响应Schema"""
+    input_schema: Optional[TrustedJSON] = None
+    output_schema: Optional[TrustedJSON] = None
+    tool_config: Optional[TrustedJSON] = None
     id: int
     server_id: int
     is_available: bool
@@ -80,8 +88,7 @@ class MCPToolResponse(MCPToolBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore", defer_build=True)
 
 
 class MCPToolCallBase(BaseModel):
@@ -97,12 +104,13 @@ class MCPToolCallCreate(MCPToolCallBase):
     ai_reasoning: Optional[str] = Field(None, description="AI推理过程")
 
 
-class MCPToolCallResponse(MCPToolCallBase):
+class MCPToolCallResponse(MCPToolCallBase, ORMResponseModel):
     """MCP Tool Call响应Schema"""
+    input_data: TrustedJSON
     id: int
     tool_id: int
     session_id: Optional[str]
-    output_data: Optional[Dict[str, Any]]
+    output_data: Optional[TrustedJSON]
     call_status: str
     error_message: Optional[str]
     execution_time_ms: Optional[int]
@@ -110,8 +118,12 @@ class MCPToolCallResponse(MCPToolCallBase):
     user_feedback: Optional[int]
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore", defer_build=True)
+
+
+class MCPToolCallFeedback(BaseModel):
+    """工具调用反馈Schema"""
+    feedback: Literal[0, 1] = Field(..., description="用户反馈：1好评，0差评")
 
 
 class MCPServerWithTools(MCPServerResponse):
@@ -126,6 +138,7 @@ class MCPToolWithCalls(MCPToolResponse):
 
 class MCPServerStatus(BaseModel):
     """MCP Server状态Schema"""
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore")
     server_id: int
     name: str
     is_enabled: bool
@@ -142,12 +155,14 @@ class MCPToolCallRequest(BaseModel):
     arguments: Dict[str, Any] = Field(..., description="工具参数")
     context: Optional[str] = Field(None, description="调用上下文")
     session_id: Optional[str] = Field(None, description="会话ID")
+    force_refresh: bool = Field(False, description="是否跳过结果缓存强制调用")
 
 
 class MCPToolCallResult(BaseModel):
     """工具调用结果Schema"""
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore")
     success: bool
-    result: Optional[Dict[str, Any]] = None
+    result: Optional[TrustedJSON] = None
     error: Optional[str] = None
     execution_time_ms: int
     tool_call_id: int 
\ No newline at end of file
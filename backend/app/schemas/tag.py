@@ -1,6 +1,20 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from datetime import datetime
 from typing import Optional, List
+from .base import ORMResponseModel
+
+__all__ = [
+    "TagBase",
+    "TagCreate",
+    "TagUpdate",
+    "TagResponse",
+    "FileTagBase",
+    "FileTagCreate",
+    "FileTagResponse",
+    "FileTagWithTagResponse",
+    "FILE_TAG_LIST_ADAPTER",
+    "FILE_TAG_WITH_TAG_LIST_ADAPTER",
+]
 
 class TagBase(BaseModel):
     name: str = Field(..., description="标签名称")
@@ -15,13 +29,12 @@ class TagCreate(TagBase):
 class TagUpdate(TagBase):
     name: Optional[str] = None
 
-class TagResponse(TagBase):
+class TagResponse(TagBase, ORMResponseModel):
     id: int
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore")
 
 class FileTagBase(BaseModel):
     file_id: int = Field(..., description="文件ID")
@@ -32,14 +45,13 @@ class FileTagBase(BaseModel):
 class FileTagCreate(FileTagBase):
     pass
 
-class FileTagResponse(FileTagBase):
+class FileTagResponse(FileTagBase, ORMResponseModel):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore")
 
-class FileTagWithTagResponse(BaseModel):
+class FileTagWithTagResponse(ORMResponseModel):
     """文件标签关联信息，包含完整标签数据"""
     id: int
     file_id: int
@@ -49,5 +61,15 @@ class FileTagWithTagResponse(BaseModel):
     created_at: datetime
     tag: TagResponse  # 包含完整的标签信息
     
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(frozen=True, from_attributes=True, extra="ignore")
+
+    @classmethod
+    def from_orm_fast(cls, obj):
+        """嵌套的标签同样跳过校验构建"""
+        values = {name: getattr(obj, name) for name in cls.model_fields}
+        values["tag"] = TagResponse.from_orm_fast(obj.tag)
+        return cls.model_construct(**values)
+
+# 列表响应的序列化适配器，模块加载时构建一次
+FILE_TAG_LIST_ADAPTER = TypeAdapter(List[FileTagResponse])
+FILE_TAG_WITH_TAG_LIST_ADAPTER = TypeAdapter(List[FileTagWithTagResponse])
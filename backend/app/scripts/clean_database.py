@@ -9,6 +9,7 @@ import logging
 import argparse
 from pathlib import Path
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加parent目录到路径
 sys.path.append(str(Path(__file__).parent.parent))
@@ -17,32 +18,74 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# backend目录：配置中的相对路径均相对于此目录
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+_SQLITE_URL_PREFIX = 'sqlite:///'
+
+def _resolve_path(path: str) -> Path:
+    """将配置中的路径解析为绝对路径，相对路径以backend目录为基准"""
+    resolved = Path(path)
+    if not resolved.is_absolute():
+        resolved = PROJECT_ROOT / resolved
+    return Path(os.path.normpath(resolved))
+
+# 需要清理/重建的路径在模块加载时解析一次
+SQLITE_DB_PATH = (
+    _resolve_path(settings.database_url.removeprefix(_SQLITE_URL_PREFIX))
+    if settings.database_url.startswith(_SQLITE_URL_PREFIX) else None
+)
+CHROMA_DB_PATH = _resolve_path(settings.chroma_db_path)
+DATA_DIRECTORY = _resolve_path(settings.data_directory)
+
+# 并发删除文件的线程数：ChromaDB目录下有大量小文件，并发提交unlink可重叠每次系统调用的延迟
+_UNLINK_WORKERS = 16
+
+def _remove_tree(root: Path):
+    """
+    删除目录树：先用 os.scandir 遍历收集文件与目录，
+    文件交给线程池并发 unlink，最后由深到浅删除已清空的目录。
+    """
+    files = []
+    dirs = []
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        dirs.append(current)
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    files.append(entry.path)
+    
+    with ThreadPoolExecutor(max_workers=_UNLINK_WORKERS) as executor:
+        # 消费迭代器以便抛出删除过程中的异常
+        list(executor.map(os.unlink, files))
+    
+    # 子目录总是在父目录之后入列，逆序即可保证先删子目录
+    for directory in reversed(dirs):
+        os.rmdir(directory)
+
 def clean_sqlite_database():
     """清理SQLite数据库文件"""
     try:
-        # 从DATABASE_URL中提取数据库文件路径
-        db_url = settings.database_url
-        if db_url.startswith('sqlite:///'):
-            db_path = db_url.replace('sqlite:///', '')
-            
-            # 处理相对路径
-            if not os.path.isabs(db_path):
-                db_path = os.path.join(os.path.dirname(__file__), '..', '..', db_path)
-            
-            db_path = os.path.normpath(db_path)
-            
-            if os.path.exists(db_path):
-                os.remove(db_path)
-                print(f"✅ 已删除SQLite数据库文件: {db_path}")
-                logger.info(f"✅ 已删除SQLite数据库文件: {db_path}")
-                return True
-            else:
+        db_path = SQLITE_DB_PATH
+        if db_path is not None:
+            try:
+                # 直接删除，不存在时由FileNotFoundError区分，避免先stat再删除
+                db_path.unlink()
+            except FileNotFoundError:
                 print(f"ℹ️ SQLite数据库文件不存在: {db_path}")
                 logger.info(f"ℹ️ SQLite数据库文件不存在: {db_path}")
                 return True
+            else:
+                print(f"✅ 已删除SQLite数据库文件: {db_path}")
+                logger.info(f"✅ 已删除SQLite数据库文件: {db_path}")
+                return True
         else:
-            print(f"⚠️ 不支持的数据库URL格式: {db_url}")
-            logger.warning(f"⚠️ 不支持的数据库URL格式: {db_url}")
+            print(f"⚠️ 不支持的数据库URL格式: {settings.database_url}")
+            logger.warning(f"⚠️ 不支持的数据库URL格式: {settings.database_url}")
             return False
             
     except Exception as e:
@@ -53,16 +96,14 @@ def clean_sqlite_database():
 def clean_chroma_database():
     """清理ChromaDB向量数据库"""
     try:
-        chroma_path = settings.chroma_db_path
-        
-        # 处理相对路径
-        if not os.path.isabs(chroma_path):
-            chroma_path = os.path.join(os.path.dirname(__file__), '..', '..', chroma_path)
-        
-        chroma_path = os.path.normpath(chroma_path)
+        chroma_path = CHROMA_DB_PATH
         
-        if os.path.exists(chroma_path):
-            shutil.rmtree(chroma_path)
+        if chroma_path.exists():
+            try:
+                _remove_tree(chroma_path)
+            except OSError as e:
+                logger.warning(f"并发删除ChromaDB目录失败，回退到shutil.rmtree: {e}")
+                shutil.rmtree(chroma_path)
             print(f"✅ 已删除ChromaDB向量数据库目录: {chroma_path}")
             logger.info(f"✅ 已删除ChromaDB向量数据库目录: {chroma_path}")
             return True
@@ -80,22 +121,14 @@ def recreate_directories():
     """重新创建必要的目录"""
     try:
         # 重新创建数据目录
-        data_dir = settings.data_directory
-        if not os.path.isabs(data_dir):
-            data_dir = os.path.join(os.path.dirname(__file__), '..', '..', data_dir)
-        data_dir = os.path.normpath(data_dir)
-        
-        os.makedirs(data_dir, exist_ok=True)
+        data_dir = DATA_DIRECTORY
+        data_dir.mkdir(parents=True, exist_ok=True)
         print(f"✅ 已重新创建数据目录: {data_dir}")
         logger.info(f"✅ 已重新创建数据目录: {data_dir}")
         
         # 重新创建ChromaDB目录
-        chroma_dir = settings.chroma_db_path
-        if not os.path.isabs(chroma_dir):
-            chroma_dir = os.path.join(os.path.dirname(__file__), '..', '..', chroma_dir)
-        chroma_dir = os.path.normpath(chroma_dir)
-        
-        os.makedirs(chroma_dir, exist_ok=True)
+        chroma_dir = CHROMA_DB_PATH
+        chroma_dir.mkdir(parents=True, exist_ok=True)
         print(f"✅ 已重新创建ChromaDB目录: {chroma_dir}")
         logger.info(f"✅ 已重新创建ChromaDB目录: {chroma_dir}")
         
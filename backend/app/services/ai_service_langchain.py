@@ -1,20 +1,23 @@
 # LangChain-Chroma版本的AIService
 
-from typing import List, Optional, Dict, Any, AsyncGenerator
+from typing import List, Optional, Dict, Any, AsyncGenerator, TYPE_CHECKING
 import logging
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from langchain_openai import ChatOpenAI
-from langchain_chroma import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-import requests
+import numpy as np
+import httpx
 import os
 import hashlib
+import sqlite3
 import threading
 import time
 import json
+import random
+from collections import OrderedDict
 from functools import lru_cache
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -26,9 +29,200 @@ from ..dynamic_config import settings
 from .mcp_service import MCPClientService
 from .simple_memory_service import SimpleMemoryService
 from ..schemas.mcp import MCPToolCallRequest
+from .hierarchical_splitter import chunk_hash
+
+# langchain_openai / langchain_chroma（连带openai、chromadb）导入较慢，推迟到首次创建客户端时导入，
+# 使应用启动与不涉及AI的路由不必为其付出导入时间
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 logger = logging.getLogger(__name__)
 
+# orjson 解析更快；未安装时回退到标准库json（orjson.JSONDecodeError 是 json.JSONDecodeError 的子类）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+def _extract_json_array(text: str) -> str:
+    """
+    从LLM回复中截取第一个完整的JSON数组。
+    
+    LLM常在JSON前后附带说明文字或代码块标记，这里单遍扫描并计数括号深度（跳过字符串内的括号），
+    找不到数组时原样返回，交由JSON解析报错。
+    """
+    start = text.find('[')
+    if start < 0:
+        return text
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+# 嵌入请求连接池大小与重试策略（嵌入请求幂等，允许对POST重试）
+_EMBEDDING_POOL_SIZE = 32
+_EMBEDDING_MAX_RETRIES = 3
+_EMBEDDING_BACKOFF_FACTOR = 0.3
+_EMBEDDING_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 并发子批次发出前的随机抖动上限（秒），错开同时到达的请求，降低触发限流的概率
+_EMBEDDING_SUBMIT_JITTER = 0.05
+
+@lru_cache(maxsize=1)
+def _get_embedding_client() -> httpx.Client:
+    """进程内共享的嵌入请求客户端（HTTP/2 多路复用 + keep-alive连接池），并发请求共用连接"""
+    # 自定义transport时连接池参数需设置在transport上；传输层重试只覆盖连接失败，状态码重试见 _post_embeddings
+    # 连接池不小于嵌入线程池的并发数，回退到HTTP/1.1时并发请求也不必排队等待连接
+    pool_size = max(_EMBEDDING_POOL_SIZE, settings.embedding_concurrency)
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=_EMBEDDING_MAX_RETRIES,
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+    )
+    return httpx.Client(transport=transport, timeout=30.0)
+
+def _post_embeddings(url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> httpx.Response:
+    """发送嵌入请求，遇到限流或服务端错误时按指数退避重试"""
+    client = _get_embedding_client()
+    for attempt in range(_EMBEDDING_MAX_RETRIES + 1):
+        response = client.post(url, json=payload, headers=headers)
+        if response.status_code not in _EMBEDDING_RETRY_STATUS or attempt == _EMBEDDING_MAX_RETRIES:
+            return response
+        time.sleep(_EMBEDDING_BACKOFF_FACTOR * (2 ** attempt))
+    return response
+
+# 查询向量LRU缓存：(接口地址, 模型, 文本摘要) -> 向量，进程内所有嵌入实例共享
+_QUERY_EMBEDDING_CACHE_MAX_SIZE = 1024
+_query_embedding_cache: "OrderedDict[tuple, List[float]]" = OrderedDict()
+_query_embedding_cache_lock = threading.Lock()
+
+class _EmbeddingDiskCache:
+    """
+    基于SQLite的嵌入向量缓存，键为 blake2b(接口地址|模型|维度|文本)，跨文件、跨进程重启复用相同文本的向量。
+    
+    键中包含接口地址与维度：同名模型指向不同服务时，不会取到其它服务（可能维度不同）的向量。
+    
+    向量以float16存储，体积减半；对归一化向量的余弦/L2排序影响可以忽略。
+    """
+    
+    _QUERY_CHUNK_SIZE = 500  # 单条IN查询的参数上限，低于SQLite默认的999
+    _PRUNE_INTERVAL = 1000   # 每写入这么多条检查一次容量
+    
+    def __init__(self, path: str, max_entries: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb_cache ("
+            "key TEXT PRIMARY KEY, vec BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_emb_cache_created_at ON emb_cache(created_at)")
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(base_url: Optional[str], model: str, dimension: int, text: str) -> str:
+        return hashlib.blake2b(f"{base_url}|{model}|{dimension}|{text}".encode(), digest_size=16).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """批量读取缓存，返回命中的 key -> 向量"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self._QUERY_CHUNK_SIZE):
+                chunk = keys[start:start + self._QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM emb_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+        return found
+    
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """批量写入缓存，并定期淘汰超出容量的最早条目"""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype=np.float16).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO emb_cache (key, vec, created_at) VALUES (?, ?, ?)", rows)
+            self._writes_since_prune += len(rows)
+            if self._writes_since_prune >= self._PRUNE_INTERVAL:
+                self._writes_since_prune = 0
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM emb_cache").fetchone()
+                if count > self._max_entries:
+                    self._conn.execute(
+                        "DELETE FROM emb_cache WHERE key IN "
+                        "(SELECT key FROM emb_cache ORDER BY created_at LIMIT ?)",
+                        (count - self._max_entries,),
+                    )
+            self._conn.commit()
+
+@lru_cache(maxsize=1)
+def _get_embedding_disk_cache() -> Optional[_EmbeddingDiskCache]:
+    """进程内共享的嵌入磁盘缓存，未配置路径或打开失败时返回None（不使用缓存）"""
+    cache_path = settings.get_embedding_cache_path()
+    if not cache_path:
+        return None
+    try:
+        return _EmbeddingDiskCache(cache_path, settings.embedding_cache_max_entries)
+    except Exception as e:
+        logger.warning(f"嵌入缓存不可用，直接请求嵌入接口: {e}")
+        return None
+
+@lru_cache(maxsize=1)
+def _get_embedding_executor() -> ThreadPoolExecutor:
+    """进程内共享的嵌入请求线程池，并发数由 embedding_concurrency 控制"""
+    return ThreadPoolExecutor(
+        max_workers=max(1, settings.embedding_concurrency),
+        thread_name_prefix="embedding",
+    )
+
+@lru_cache(maxsize=8)
+def _get_chat_model(api_key: str, base_url: Optional[str], model: str, streaming: bool = False) -> "ChatOpenAI":
+    """
+    按配置缓存的ChatOpenAI实例。
+    
+    AIService按请求创建，缓存后各请求复用同一个客户端及其连接池；配置变更时键不同，自然创建新实例。
+    """
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        openai_api_key=api_key,
+        base_url=base_url,
+        model=model,
+        streaming=streaming
+    )
+
+@lru_cache(maxsize=1)
+def _get_llm_executor() -> ThreadPoolExecutor:
+    """进程内共享的LLM调用线程池，用于并发发出互不依赖的LLM请求"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm")
+
 class OpenAICompatibleEmbeddings(Embeddings):
     """OpenAI兼容的嵌入模型包装器，用于LangChain"""
     
@@ -38,54 +232,234 @@ class OpenAICompatibleEmbeddings(Embeddings):
         self.model = model
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """批量嵌入文档"""
-        embeddings = []
-        for text in texts:
-            embedding = self._get_embedding(text)
-            if embedding:
-                embeddings.append(embedding)
+        """批量嵌入文档：先查磁盘缓存，未命中的文本每个子批次合并为一次请求，多个子批次在线程池中并发请求"""
+        keys, embeddings, misses = self._lookup_cache(texts)
+        if misses:
+            order, batches = self._split_batches([texts[index] for index in misses])
+            if len(batches) <= 1:
+                results = [self._embed_batch_with_retry(batch) for batch in batches]
             else:
-                # 如果某个文档嵌入失败，用零向量占位
-                embeddings.append([0.0] * settings.embedding_dimension)
+                # map 保持子批次的输入顺序
+                results = list(_get_embedding_executor().map(self._embed_batch_jittered, batches))
+            self._store_misses(keys, embeddings, misses, self._merge_batches(order, results))
         return embeddings
     
+    def _lookup_cache(self, texts: List[str]) -> tuple:
+        """
+        按内容查磁盘缓存。
+        
+        返回 (缓存键列表或None, 与texts等长的向量列表（未命中处为None）, 未命中的下标列表)。
+        """
+        cache = _get_embedding_disk_cache()
+        if cache is None:
+            return None, [None] * len(texts), list(range(len(texts)))
+        dimension = settings.embedding_dimension
+        keys = [cache.make_key(self.base_url, self.model, dimension, text) for text in texts]
+        try:
+            cached = cache.get_many(list(set(keys)))
+        except Exception as e:
+            logger.warning(f"读取嵌入缓存失败: {e}")
+            cached = {}
+        embeddings = [cached.get(key) for key in keys]
+        misses = [index for index, vector in enumerate(embeddings) if vector is None]
+        if cached:
+            logger.debug("嵌入缓存命中 %d/%d", len(texts) - len(misses), len(texts))
+        return keys, embeddings, misses
+    
+    @staticmethod
+    def _store_misses(keys: Optional[List[str]], embeddings: List[Optional[List[float]]],
+                      misses: List[int], vectors: List[List[float]]) -> None:
+        """将新请求到的向量填回结果，并写入磁盘缓存（零向量表示请求失败，不缓存）"""
+        for index, vector in zip(misses, vectors):
+            embeddings[index] = vector
+        cache = _get_embedding_disk_cache()
+        if cache is None or keys is None:
+            return
+        try:
+            cache.put_many({keys[index]: vector for index, vector in zip(misses, vectors) if any(vector)})
+        except Exception as e:
+            logger.warning(f"写入嵌入缓存失败: {e}")
+    
+    @staticmethod
+    def _split_batches(texts: List[str]) -> tuple:
+        """按 embedding_batch_size 切分子批次，返回 (排序下标或None, 子批次列表)"""
+        batch_size = max(1, settings.embedding_batch_size)
+        order = None
+        if settings.embedding_sort_by_length and len(texts) > batch_size:
+            # 长度相近的文本分到同一批，减少推理后端的批内填充；返回前按原顺序还原
+            order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+            texts = [texts[index] for index in order]
+        return order, [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    
+    @staticmethod
+    def _merge_batches(order: Optional[List[int]], results: List[List[List[float]]]) -> List[List[float]]:
+        """拼接各子批次的向量，并按 _split_batches 的排序下标还原输入顺序"""
+        embeddings = []
+        for vectors in results:
+            embeddings.extend(vectors)
+        if order is None:
+            return embeddings
+        restored = [None] * len(embeddings)
+        for position, index in enumerate(order):
+            restored[index] = embeddings[position]
+        return restored
+    
+    def _embed_batch_jittered(self, batch: List[str]) -> List[List[float]]:
+        """并发路径：随机延迟片刻后再嵌入子批次，避免所有请求同一时刻打到接口"""
+        time.sleep(random.uniform(0, _EMBEDDING_SUBMIT_JITTER))
+        return self._embed_batch_with_retry(batch)
+    
+    def _embed_batch_with_retry(self, batch: List[str]) -> List[List[float]]:
+        """嵌入一个子批次，失败时重试该子批次一次，仍失败则降级为逐条请求"""
+        vectors = self._get_embeddings_batch(batch)
+        if not vectors:
+            logger.warning(f"嵌入子批次失败，重试该批次（{len(batch)} 个文本）")
+            vectors = self._get_embeddings_batch(batch)
+        if not vectors and len(batch) > 1:
+            # 部分兼容接口不支持数组输入或返回条数不符，逐条请求，单条失败不影响同批其他文本
+            logger.warning(f"批量嵌入不可用，降级为逐条请求（{len(batch)} 个文本）")
+            vectors = [self._get_embedding(text) or [0.0] * settings.embedding_dimension for text in batch]
+        if not vectors:
+            # 如果子批次嵌入失败，用零向量占位
+            vectors = [[0.0] * settings.embedding_dimension for _ in batch]
+        return vectors
+    
     def embed_query(self, text: str) -> List[float]:
-        """嵌入查询文本"""
+        """嵌入查询文本，重复的查询直接命中进程内LRU缓存"""
+        cache_key = (self.base_url, self.model, chunk_hash(text))
+        with _query_embedding_cache_lock:
+            embedding = _query_embedding_cache.get(cache_key)
+            if embedding is not None:
+                _query_embedding_cache.move_to_end(cache_key)
+                return embedding
+        
         embedding = self._get_embedding(text)
-        return embedding if embedding else [0.0] * settings.embedding_dimension
+        if not embedding:
+            # 失败的结果不缓存
+            return [0.0] * settings.embedding_dimension
+        
+        with _query_embedding_cache_lock:
+            _query_embedding_cache[cache_key] = embedding
+            if len(_query_embedding_cache) > _QUERY_EMBEDDING_CACHE_MAX_SIZE:
+                _query_embedding_cache.popitem(last=False)
+        return embedding
     
     def _get_embedding(self, text: str) -> List[float]:
-        """使用OpenAI兼容接口获取嵌入向量"""
+        """获取单个文本的嵌入向量"""
+        vectors = self._get_embeddings_batch([text])
+        return vectors[0] if vectors else []
+    
+    def _get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """使用OpenAI兼容接口一次请求获取多个文本的嵌入向量，失败时返回空列表"""
         try:
-            # 确保URL格式正确，避免重复的/v1
-            base_url = self.base_url.rstrip('/')
-            if base_url.endswith('/v1'):
-                url = f"{base_url}/embeddings"
-            else:
-                url = f"{base_url}/v1/embeddings"
-            payload = {
-                "model": self.model,
-                "input": text,
-                "encoding_format": "float"
-            }
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = _post_embeddings(self._embeddings_url(), self._embeddings_payload(texts), self._embeddings_headers())
             response.raise_for_status()
-            
-            result = response.json()
-            if "data" in result and result["data"] and len(result["data"]) > 0:
-                return result["data"][0]["embedding"]
-            else:
-                logger.error(f"嵌入响应格式错误: {result}")
-                return []
-                
+            return self._parse_embeddings_response(response.json(), len(texts))
         except Exception as e:
             logger.error(f"获取嵌入向量失败: {e}")
             return []
+    
+    def _embeddings_url(self) -> str:
+        """嵌入接口地址，确保URL格式正确，避免重复的/v1"""
+        base_url = self.base_url.rstrip('/')
+        if base_url.endswith('/v1'):
+            return f"{base_url}/embeddings"
+        return f"{base_url}/v1/embeddings"
+    
+    def _embeddings_payload(self, texts: List[str]) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "input": texts,
+            "encoding_format": "float"
+        }
+    
+    def _embeddings_headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}"
+        }
+    
+    @staticmethod
+    def _parse_embeddings_response(result: Any, expected_count: int) -> List[List[float]]:
+        """解析嵌入响应并按index还原输入顺序，格式不符时返回空列表"""
+        data = result.get("data") if isinstance(result, dict) else None
+        if not data or len(data) != expected_count:
+            logger.error(f"嵌入响应格式错误: {result}")
+            return []
+        data = sorted(data, key=lambda item: item.get("index", 0))
+        return _normalize_vectors([item["embedding"] for item in data])
+
+def _normalize_vectors(vectors: List[List[float]]) -> List[List[float]]:
+    """
+    将一批嵌入向量一次性L2归一化为单位向量（零向量保持不变）。
+
+    单位向量上L2距离的平方等于 2 - 2·余弦相似度，距离排序与余弦一致，
+    语义搜索的距离阈值因此不再受各模型向量模长差异的影响。
+    归一化后写入的分块在元数据中带有 normalized 标记；没有该标记的旧向量既不复用，
+    也不视为最新，文件再次处理时会整体重新嵌入。
+    """
+    arr = np.asarray(vectors, dtype=np.float32)
+    arr /= np.linalg.norm(arr, axis=1, keepdims=True) + 1e-12
+    return arr.tolist()
+
+# ChromaDB内部SQLite的PRAGMA：journal_mode写入数据库文件持久生效，其余作用于当前连接
+_CHROMA_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+def _tune_chroma_sqlite(vector_store) -> None:
+    """对ChromaDB持久化使用的SQLite应用性能PRAGMA（依赖ChromaDB内部实现，失败时仅记录警告）"""
+    try:
+        from chromadb.db.impl.sqlite import SqliteDB
+        
+        db = vector_store._client._system.instance(SqliteDB)
+        conn = db._conn_pool.connect()
+        try:
+            cursor = conn.cursor()
+            for pragma in _CHROMA_SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            db._conn_pool.return_to_pool(conn)
+    except Exception as e:
+        logger.warning(f"设置ChromaDB SQLite PRAGMA失败: {e}")
+
+# 基本分块参数：过短的块与相邻块合并，合并后不超过上限
+_CHUNK_SIZE = 1000
+_CHUNK_OVERLAP = 100
+_MIN_CHUNK_SIZE = 100
+_MAX_MERGED_CHUNK_SIZE = 1100
+
+@lru_cache(maxsize=1)
+def _get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """进程内共享的文本分割器，避免每次创建AIService都重新构建"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=_CHUNK_SIZE,
+        chunk_overlap=_CHUNK_OVERLAP,
+        length_function=len,
+    )
+
+def _merge_small_chunks(chunks: List[str]) -> List[str]:
+    """将短于 _MIN_CHUNK_SIZE 的碎片并入相邻块（合并后不超过 _MAX_MERGED_CHUNK_SIZE），减少缺乏上下文的向量"""
+    merged = []
+    for chunk in chunks:
+        if merged and (len(chunk) < _MIN_CHUNK_SIZE or len(merged[-1]) < _MIN_CHUNK_SIZE) \
+                and len(merged[-1]) + len(chunk) + 1 <= _MAX_MERGED_CHUNK_SIZE:
+            merged[-1] = f"{merged[-1]}\n{chunk}"
+        else:
+            merged.append(chunk)
+    return merged
+
+def delete_file_vectors(vector_store, file_id: int) -> None:
+    """按元数据条件直接删除文件的全部向量；不支持where删除的ChromaDB版本回退为先查ID再删除"""
+    try:
+        vector_store._collection.delete(where={"file_id": file_id})
+    except Exception as e:
+        logger.debug(f"按条件删除向量失败，回退为按ID删除: {e}")
+        existing_docs = vector_store.get(where={"file_id": file_id}, include=[])
+        if existing_docs and existing_docs.get('ids'):
+            vector_store.delete(ids=existing_docs['ids'])
 
 class ChromaDBManager:
     """ChromaDB单例管理器，避免多实例冲突"""
@@ -116,12 +490,14 @@ class ChromaDBManager:
                             )
                         
                         # 初始化向量存储
+                        from langchain_chroma import Chroma
                         self._vector_store = Chroma(
                             collection_name="document_embeddings",
                             embedding_function=self._embeddings,
                             persist_directory=settings.chroma_db_path,
                             collection_metadata={"description": "AI笔记本文档嵌入向量"}
                         )
+                        _tune_chroma_sqlite(self._vector_store)
                         logger.info("ChromaDB单例初始化成功")
                         
                     except Exception as e:
@@ -157,6 +533,130 @@ class ChromaDBManager:
 class AIService:
     """AI服务类，使用LangChain-Chroma进行向量存储 - 单例版本"""
     
+    # 提示词模板：类加载时定义一次，调用时用 format_map 填充（JSON示例中的花括号以双写转义）
+    _SUMMARY_TMPL = """请为以下内容生成一个简洁的摘要，不超过{max_length}字：
+
+内容：
+{content}  # 限制输入长度
+
+摘要："""
+
+    _OUTLINE_TMPL = """请为以下内容生成一个清晰的提纲，包含主要章节和要点，不超过{max_items}个要点：
+
+内容：
+{content}  # 限制输入长度
+
+要求：
+1. 提取主要章节和关键要点
+2. 使用层级结构（如：一、二、三... 或 1. 2. 3...）
+3. 保持逻辑清晰，结构合理
+4. 每个要点简洁明了
+
+提纲："""
+
+    _TAGS_TMPL = """请从以下候选标签中选择最多{max_tags}个最适合的标签来标记下面的文档。
+
+**候选标签列表：**
+{candidate_tags_text}
+
+**文档信息：**
+{analysis_content}
+
+**要求：**
+1. 只能从上述候选标签列表中选择，不要创造新标签
+2. 选择最相关的{max_tags}个标签
+3. 标签要准确反映文档的主要内容和特征
+4. 每行返回一个标签名称
+
+**返回格式：**
+请只返回选中的标签，每行一个："""
+
+    _ANALYZE_TMPL = """请分析以下内容，提供以下信息：
+1. 主要话题
+2. 内容类型（技术文档、笔记、总结等）
+3. 重要性评分（1-10）
+4. 建议的处理方式
+
+内容：
+{content}
+
+请以JSON格式返回分析结果。"""
+
+    _QUESTIONS_TMPL = """基于以下内容，生成{num_questions}个相关的问题，这些问题应该能够帮助用户更深入地理解内容：
+
+内容：
+{content}
+
+请只返回问题列表，每行一个问题："""
+
+    _LINKS_TMPL = """当前文档：
+标题：{title}
+内容：{content}
+
+相关文档：
+{files_text}
+
+请分析当前文档与这些相关文档之间的关系类型，并为每个建议的链接提供以下信息：
+1. 链接类型（reference/related/follow_up/prerequisite/example/contradiction）
+2. 链接理由（简短说明为什么要建立这个链接）
+3. 建议的链接文本
+
+请以JSON格式返回，格式如下：
+[
+    {{
+        "target_file_id": 文件ID,
+        "link_type": "链接类型",
+        "reason": "链接理由",
+        "suggested_text": "建议的链接文本"
+    }}
+]
+
+只返回JSON，不要其他文字："""
+
+    _ENHANCED_LINKS_TMPL = """当前文档：
+标题：{title}
+内容：{content}
+
+候选关联文档（包含关联级别和相似度）：
+{files_text}
+
+请基于多层次关联分析，为每个候选文档评估是否应该建立链接，以及链接的类型和强度。
+
+关联级别说明：
+- 文件级：整个文档在主题或内容上相关
+- 章节级：特定章节或主题相关
+
+请为每个建议的链接提供：
+1. 链接类型（reference/related/follow_up/prerequisite/example/contradiction/complement）
+2. 链接强度（strong/medium/weak）
+3. 链接理由（详细说明关联原因和关联级别）
+4. 建议的链接文本
+5. 是否推荐建立链接（true/false）
+
+请以JSON格式返回，格式如下：
+[
+    {{
+        "target_file_id": 文件ID,
+        "link_type": "链接类型",
+        "link_strength": "链接强度",
+        "reason": "链接理由",
+        "suggested_text": "建议的链接文本",
+        "recommended": true或false
+    }}
+]
+
+只返回JSON，不要其他文字："""
+
+    # 标签建议的预设候选标签
+    _PREDEFINED_TAGS = (
+        "重点", "前端", "后端", "AI大模型", "技巧",
+        "笔记", "总结", "教程", "文档", "配置",
+        "问题", "解决方案", "代码", "工具", "框架",
+        "数据库", "网络", "安全", "性能", "测试",
+        "部署", "运维", "算法", "架构", "设计",
+        "学习", "资源", "参考", "示例", "模板"
+    )
+    
     def __init__(self, db: Session):
         self.db = db
         self.openai_api_key = settings.openai_api_key
@@ -165,20 +665,11 @@ class AIService:
         # 初始化简化的记忆服务
         self.memory_service = SimpleMemoryService()
         
-        # 初始化LLM
+        # 初始化LLM（按配置共享的进程级实例）
         if self.openai_api_key:
-            self.llm = ChatOpenAI(
-                openai_api_key=self.openai_api_key,
-                base_url=self.openai_base_url,
-                model=settings.openai_model
-            )
+            self.llm = _get_chat_model(self.openai_api_key, self.openai_base_url, settings.openai_model)
             # 初始化流式LLM
-            self.streaming_llm = ChatOpenAI(
-                openai_api_key=self.openai_api_key,
-                base_url=self.openai_base_url,
-                model=settings.openai_model,
-                streaming=True
-            )
+            self.streaming_llm = _get_chat_model(self.openai_api_key, self.openai_base_url, settings.openai_model, streaming=True)
         else:
             logger.warning("未配置OpenAI API密钥，AI功能将不可用")
             self.llm = None
@@ -191,21 +682,13 @@ class AIService:
             model=settings.embedding_model_name
         )
         
-        # 文本分割器
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100,
-            length_function=len,
-        )
+        # 文本分割器（进程内共享）
+        self.text_splitter = _get_text_splitter()
         
         # 使用单例管理器获取向量存储
         self.chroma_manager = ChromaDBManager()
         self.vector_store = self.chroma_manager.get_vector_store()
-        
-        # 添加查询向量缓存
-        self._query_cache = {}
-        self._cache_lock = threading.Lock()
-        self._max_cache_size = 100  # 最大缓存100个查询
+
         
         # 初始化MCP服务
         self.mcp_service = MCPClientService(db)
@@ -251,20 +734,42 @@ class AIService:
         
         try:
             logger.info(f"开始为文件创建智能嵌入: {file.file_path}")
+            embed_start = time.perf_counter()
             
             # 1. 检查是否存在现有的嵌入记录
             existing_embeddings_count = self.db.query(Embedding).filter(Embedding.file_id == file.id).count()
             
+            content_hash = hashlib.sha256((file.content or "").encode()).hexdigest()
+            
+            # 内容未变化的分块可复用的向量：文本哈希 -> 向量
+            reusable_vectors = {}
+            
             if existing_embeddings_count > 0:
-                logger.info(f"文件 {file.id} 存在 {existing_embeddings_count} 个现有嵌入，需要清理")
-                
-                # 1.1 删除现有的向量存储中的文档（先删除向量存储）
+                # 文件现有的向量只读取一次，同时用于判断是否最新与收集可复用的向量
                 try:
                     existing_docs = self.vector_store.get(
-                        where={"file_id": file.id}
+                        where={"file_id": file.id},
+                        include=["embeddings", "documents", "metadatas"]
                     )
+                except Exception as e:
+                    logger.warning(f"读取现有向量失败: {e}")
+                    existing_docs = None
+                
+                # 内容与嵌入模型都未变化时，现有向量仍然有效，跳过整个流程
+                if self._embeddings_up_to_date(existing_docs, content_hash):
+                    logger.info(f"文件 {file.id} 内容未变化，跳过向量化: {file.file_path}")
+                    if progress_callback:
+                        progress_callback("完成", "内容未变化，跳过向量化")
+                    return True
+                
+                logger.info(f"文件 {file.id} 存在 {existing_embeddings_count} 个现有嵌入，需要清理")
+                
+                # 1.1 删除现有的向量存储中的文档（先删除向量存储），删除前收集可复用的向量
+                try:
+                    reusable_vectors = self._collect_reusable_vectors(existing_docs)
                     if existing_docs and existing_docs.get('ids'):
-                        self.vector_store.delete(ids=existing_docs['ids'])
+                        # 按条件删除，不再把全部ID传回ChromaDB
+                        delete_file_vectors(self.vector_store, file.id)
                         logger.info(f"从LangChain向量存储删除文件 {file.id} 的文档: {len(existing_docs['ids'])} 个")
                 except Exception as e:
                     logger.warning(f"删除现有向量存储时出错: {e}")
@@ -280,10 +785,6 @@ class AIService:
             else:
                 logger.info(f"文件 {file.id} 没有现有嵌入，直接创建新的")
                 
-            # 等待一小段时间确保删除操作完全完成
-            import time
-            time.sleep(0.1)
-            
             # 3. 使用智能多层次分块（每个文件都有汇总提纲）
             logger.info(f"🧠 开始调用智能多层次分块器 - 文件: {file.file_path}")
             documents = self._create_hierarchical_chunks(file, progress_callback)
@@ -302,14 +803,19 @@ class AIService:
             
             logger.info(f"📊 分块结果统计: {doc_types}")
             
+            # 分块元数据写入SQLite（与向量写入在同一事务中提交）
+            self._save_embedding_metadata(documents, file.id)
+            
             # 4. 批量添加到向量存储
             if documents:
                 if progress_callback:
                     progress_callback("向量存储", f"正在保存 {len(documents)} 个分块到向量数据库")
                 
                 # 分批处理，避免一次性处理过多文档导致超时
-                batch_size = 50  # 每批处理50个文档
+                batch_size = max(1, settings.chroma_batch_size)
                 total_docs = len(documents)
+                total_reused = 0
+                total_failed = 0
                 logger.info(f"开始分批向量化，总文档数: {total_docs}, 批大小: {batch_size}")
                 
                 for i in range(0, total_docs, batch_size):
@@ -321,18 +827,16 @@ class AIService:
                         # 为当前批次生成ID
                         batch_ids = [f"file_{file.id}_chunk_{doc.metadata['chunk_index']}_{doc.metadata['chunk_type']}" for doc in batch_docs]
                         
-                        logger.info(f"正在处理第 {i//batch_size + 1} 批，文档 {batch_start+1}-{batch_end}/{total_docs}")
+                        logger.debug("正在处理第 %d 批，文档 %d-%d/%d", i // batch_size + 1, batch_start + 1, batch_end, total_docs)
                         
                         if progress_callback:
                             progress_callback("向量存储", f"正在处理第 {i//batch_size + 1} 批 ({batch_start+1}-{batch_end}/{total_docs})")
                         
-                        # 保存到ChromaDB
-                        self.vector_store.add_documents(batch_docs, ids=batch_ids)
-                        logger.info(f"✅ 成功保存第 {i//batch_size + 1} 批到ChromaDB，包含 {len(batch_docs)} 个文档")
-                        
-                        # 短暂休息，避免过度占用资源
-                        import time
-                        time.sleep(0.1)
+                        # 保存到ChromaDB，内容未变化的分块直接复用已有向量
+                        reused_count, failed_count = self._add_documents_reusing_vectors(batch_docs, batch_ids, reusable_vectors, content_hash)
+                        total_reused += reused_count
+                        total_failed += failed_count
+                        logger.debug("✅ 成功保存第 %d 批到ChromaDB，包含 %d 个文档，复用 %d 个已有向量", i // batch_size + 1, len(batch_docs), reused_count)
                         
                     except Exception as e:
                         logger.error(f"❌ 保存第 {i//batch_size + 1} 批到ChromaDB失败: {e}")
@@ -340,7 +844,7 @@ class AIService:
                         self.db.rollback()
                         return False
                 
-                logger.info(f"🎉 成功添加所有 {len(documents)} 个文档到LangChain-Chroma")
+                logger.info(f"🎉 成功添加所有 {len(documents)} 个文档到LangChain-Chroma，复用 {total_reused} 个已有向量")
             
             # 5. 提交SQLite事务
             try:
@@ -351,10 +855,15 @@ class AIService:
                 self.db.rollback()
                 return False
             
+            if documents and total_failed:
+                # 零向量占位无法参与检索，返回失败让任务重试；未记录内容哈希的分块保证下次会重新嵌入
+                logger.error(f"❌ 文件 {file.file_path} 有 {total_failed}/{len(documents)} 个分块嵌入失败")
+                return False
+            
             if progress_callback:
                 progress_callback("完成", f"智能分块完成，共生成 {len(documents)} 个向量")
             
-            logger.info(f"为文件 {file.file_path} 创建了 {len(documents)} 个智能嵌入向量")
+            logger.info("为文件 %s 创建了 %d 个智能嵌入向量，耗时 %.2fs", file.file_path, len(documents), time.perf_counter() - embed_start)
             return True
             
         except Exception as e:
@@ -366,6 +875,79 @@ class AIService:
     
 
     
+    def _collect_reusable_vectors(self, existing_docs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """从文件现有的向量中收集可复用的部分，按文本哈希索引（仅复用同一嵌入模型生成的非零向量）"""
+        reusable = {}
+        if not existing_docs or existing_docs.get('embeddings') is None:
+            return reusable
+        
+        model_name = settings.embedding_model_name
+        for text, vector, metadata in zip(
+            existing_docs.get('documents') or [],
+            existing_docs['embeddings'],
+            existing_docs.get('metadatas') or [],
+        ):
+            if text is None or vector is None or not metadata:
+                continue
+            # 归一化之前写入的向量与新向量的距离不可比，不复用
+            if metadata.get('embedding_model') != model_name or not metadata.get('normalized') or not any(vector):
+                continue
+            # 新版ChromaDB返回numpy数组，统一转为列表以便与新生成的向量一起写入
+            if hasattr(vector, 'tolist'):
+                vector = vector.tolist()
+            reusable[chunk_hash(text)] = vector
+        return reusable
+    
+    def _embeddings_up_to_date(self, existing_docs: Optional[Dict[str, Any]], content_hash: str) -> bool:
+        """
+        根据向量元数据中记录的内容哈希与嵌入模型判断文件的现有向量是否仍然有效。
+        
+        existing_docs 为文件现有向量的查询结果（需包含 metadatas 与 embeddings）。
+        文件的每个分块都必须记录了相同的内容哈希与嵌入模型、带有归一化标记，且向量不是嵌入失败时的零向量占位。
+        """
+        metadatas = existing_docs.get('metadatas') if existing_docs else None
+        vectors = existing_docs.get('embeddings') if existing_docs else None
+        if not metadatas or vectors is None or len(vectors) != len(metadatas):
+            return False
+        model_name = settings.embedding_model_name
+        for metadata, vector in zip(metadatas, vectors):
+            if not metadata or metadata.get('content_hash') != content_hash or metadata.get('embedding_model') != model_name:
+                return False
+            if not metadata.get('normalized'):
+                # 归一化之前写入的向量与新的查询向量距离不可比，需要重新嵌入
+                return False
+            if vector is None or not any(vector):
+                return False
+        return True
+    
+    def _add_documents_reusing_vectors(self, docs: List[Document], ids: List[str], reusable_vectors: Dict[str, Any], content_hash: str) -> tuple:
+        """将分块写入向量存储，只为内容有变化的分块请求嵌入，返回 (复用的向量数量, 嵌入失败的零向量数量)"""
+        texts = [doc.page_content for doc in docs]
+        vectors = [reusable_vectors.get(chunk_hash(text)) for text in texts]
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            new_vectors = self.embeddings.embed_documents([texts[index] for index in missing])
+            for index, vector in zip(missing, new_vectors):
+                vectors[index] = vector
+        
+        # 记录生成向量的嵌入模型与文件内容哈希：切换模型后旧向量不会被复用，内容未变化时可整体跳过
+        # 嵌入失败的零向量不记录内容哈希，下次处理时该文件不会被判定为已是最新
+        model_name = settings.embedding_model_name
+        metadatas = []
+        failed_count = 0
+        for doc, vector in zip(docs, vectors):
+            # ChromaDB元数据不接受None值，与LangChain写入时一样去掉值为None的键
+            metadata = {key: value for key, value in doc.metadata.items() if value is not None}
+            metadata.update(embedding_model=model_name, normalized=True)
+            if any(vector):
+                metadata["content_hash"] = content_hash
+            else:
+                failed_count += 1
+            metadatas.append(metadata)
+        # upsert 与 LangChain 写入行为一致：相同ID的分块直接覆盖
+        self.vector_store._collection.upsert(ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts)
+        return len(docs) - len(missing), failed_count
+
     def _create_hierarchical_chunks(self, file: File, progress_callback=None) -> List[Document]:
         """创建智能多层次分块（基于LLM）"""
         import time
@@ -419,13 +1001,7 @@ class AIService:
                 progress_callback("摘要生成", f"正在处理文件摘要")
             
             logger.info("🏗️ 开始处理摘要层文档...")
-            for i, doc in enumerate(hierarchical_docs.get('summary', [])):
-                try:
-                    all_documents.append(doc)
-                    self._save_embedding_metadata(doc, file.id)
-                    logger.debug(f"  ✅ 摘要文档 {i+1} 处理完成")
-                except Exception as e:
-                    logger.error(f"  ❌ 处理摘要文档 {i+1} 失败: {e}")
+            all_documents.extend(hierarchical_docs.get('summary', []))
             
             logger.info(f"✅ 摘要层处理完成，成功处理 {len(hierarchical_docs.get('summary', []))} 个文档")
             
@@ -434,13 +1010,7 @@ class AIService:
                 progress_callback("大纲提取", f"正在处理文件大纲")
             
             logger.info("🏗️ 开始处理大纲层文档...")
-            for i, doc in enumerate(hierarchical_docs.get('outline', [])):
-                try:
-                    all_documents.append(doc)
-                    self._save_embedding_metadata(doc, file.id)
-                    logger.debug(f"  ✅ 大纲文档 {i+1} 处理完成")
-                except Exception as e:
-                    logger.error(f"  ❌ 处理大纲文档 {i+1} 失败: {e}")
+            all_documents.extend(hierarchical_docs.get('outline', []))
             
             logger.info(f"✅ 大纲层处理完成，成功处理 {len(hierarchical_docs.get('outline', []))} 个文档")
             
@@ -450,20 +1020,8 @@ class AIService:
             
             logger.info("🏗️ 开始处理内容层文档...")
             content_docs = hierarchical_docs.get('content', [])
-            processed_content = 0
-            
-            for i, doc in enumerate(content_docs):
-                try:
-                    all_documents.append(doc)
-                    self._save_embedding_metadata(doc, file.id)
-                    processed_content += 1
-                    
-                    # 每50个文档输出一次进度
-                    if (i + 1) % 50 == 0:
-                        logger.info(f"  📈 内容层进度: {i+1}/{len(content_docs)} 个文档已处理")
-                        
-                except Exception as e:
-                    logger.error(f"  ❌ 处理内容文档 {i+1} 失败: {e}")
+            all_documents.extend(content_docs)
+            processed_content = len(content_docs)
             
             logger.info(f"✅ 内容层处理完成，成功处理 {processed_content}/{len(content_docs)} 个文档")
             
@@ -515,7 +1073,7 @@ class AIService:
                     "file_id": file.id,
                     "file_path": file.file_path,
                     "chunk_index": 0,
-                    "chunk_hash": hashlib.sha256(summary_text.encode()).hexdigest(),
+                    "chunk_hash": chunk_hash(summary_text),
                     "title": file.title,
                     "vector_model": settings.embedding_model_name,
                     "chunk_type": "summary",
@@ -526,34 +1084,35 @@ class AIService:
                 }
             )
             documents.append(summary_doc)
-            self._save_embedding_metadata(summary_doc, file.id)
             
             # 2. 创建内容块
             if progress_callback:
                 progress_callback("内容分块", f"正在创建内容分块")
             
             # 使用文本分割器创建内容块
-            content_chunks = self.text_splitter.split_text(file.content)
-            
+            content_chunks = _merge_small_chunks(self.text_splitter.split_text(file.content))
+            
+            # 所有内容块共用的元数据，循环内只合并各块不同的字段
+            base_meta = {
+                "file_id": file.id,
+                "file_path": file.file_path,
+                "title": file.title,
+                "vector_model": settings.embedding_model_name,
+                "chunk_type": "content",
+                "chunk_level": 3,
+                "parent_heading": None,
+                "generation_method": "basic_fallback"
+            }
             for i, chunk in enumerate(content_chunks):
                 content_doc = Document(
                     page_content=chunk,
-                    metadata={
-                        "file_id": file.id,
-                        "file_path": file.file_path,
+                    metadata=base_meta | {
                         "chunk_index": i + 1,
-                        "chunk_hash": hashlib.sha256(chunk.encode()).hexdigest(),
-                        "title": file.title,
-                        "vector_model": settings.embedding_model_name,
-                        "chunk_type": "content",
-                        "chunk_level": 3,
-                        "parent_heading": None,
+                        "chunk_hash": chunk_hash(chunk),
                         "section_path": f"内容块{i+1}",
-                        "generation_method": "basic_fallback"
                     }
                 )
                 documents.append(content_doc)
-                self._save_embedding_metadata(content_doc, file.id)
             
             logger.info(f"基本分块完成: 1个摘要块 + {len(content_chunks)}个内容块")
             return documents
@@ -562,31 +1121,27 @@ class AIService:
             logger.error(f"创建基本分块失败: {e}")
             return []
 
-    def _save_embedding_metadata(self, doc: Document, file_id: int):
-        """保存嵌入元数据到SQLite"""
-        try:
-            # 获取vector_model，如果不存在则设置默认值
-            vector_model = doc.metadata.get('vector_model', 'unknown')
-            
-            # 创建嵌入记录
-            embedding = Embedding(
-                file_id=file_id,
-                chunk_index=doc.metadata['chunk_index'],
-                chunk_text=doc.page_content,  # 添加缺少的chunk_text字段
-                chunk_hash=doc.metadata['chunk_hash'],
-                vector_model=vector_model,
-                chunk_type=doc.metadata.get('chunk_type', 'content'),
-                chunk_level=doc.metadata.get('chunk_level', 1),
-                parent_heading=doc.metadata.get('parent_heading'),
-                section_path=doc.metadata.get('section_path')
-                # 移除了不存在的generation_method字段
-            )
-            self.db.add(embedding)
-            # 不在这里提交，让上层统一提交
-            
-        except Exception as e:
-            logger.error(f"保存嵌入元数据失败: {e}")
-            raise
+    def _save_embedding_metadata(self, documents: List[Document], file_id: int):
+        """批量保存嵌入元数据到SQLite：一次executemany插入，不为每个分块构建ORM对象"""
+        rows = [
+            {
+                "file_id": file_id,
+                "chunk_index": doc.metadata['chunk_index'],
+                "chunk_text": doc.page_content,
+                "chunk_hash": doc.metadata['chunk_hash'],
+                # 获取vector_model，如果不存在则设置默认值
+                "vector_model": doc.metadata.get('vector_model', 'unknown'),
+                "chunk_type": doc.metadata.get('chunk_type', 'content'),
+                "chunk_level": doc.metadata.get('chunk_level', 1),
+                "parent_heading": doc.metadata.get('parent_heading'),
+                "section_path": doc.metadata.get('section_path'),
+            }
+            for doc in documents
+        ]
+        if rows:
+            # ORM批量INSERT：绕过unit-of-work，一条executemany写入全部行
+            self.db.execute(insert(Embedding), rows)
+        # 不在这里提交，让上层统一提交
 
     def semantic_search(self, query: str, limit: int = 10, similarity_threshold: float = None) -> List[Dict[str, Any]]:
         """语义搜索 - 支持多层次检索，带缓存优化"""
@@ -621,37 +1176,27 @@ class AIService:
     def _traditional_semantic_search(self, query: str, limit: int, similarity_threshold: float) -> List[Dict[str, Any]]:
         """传统语义搜索（保持兼容性）"""
         try:
-            # 使用LangChain的similarity_search_with_score方法（带缓存优化）
-            search_results = self.vector_store.similarity_search_with_score(
-                query=query,
+            # 查询向量走进程内缓存，再按向量检索（返回值与similarity_search_with_score相同，均为原始距离）
+            search_results = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                embedding=self._get_cached_query_embedding(query),
                 k=limit * 2,  # 获取更多结果用于过滤
                 filter=None  # 可以添加过滤条件
             )
             
-            logger.info(f"传统搜索返回 {len(search_results)} 个结果")
+            # 过滤距离过大的结果（距离不大于阈值的保留）
+            kept_results = self._filter_by_distance(search_results, similarity_threshold)
+            logger.info(f"传统搜索返回 {len(search_results)} 个结果，{len(kept_results)} 个通过阈值 {similarity_threshold}")
             
             # 处理搜索结果并去重
             results = []
             seen_files = {}  # 用于文件去重：file_id -> 最佳匹配结果
+            live_files = self._get_live_files(doc.metadata.get('file_id') for doc, _ in kept_results)
             
-            for doc, score in search_results:
-                # LangChain-Chroma返回的score是距离，距离越小越相似
-                distance = score
-                
-                logger.info(f"文档: {doc.metadata.get('file_path', 'unknown')}, 距离: {distance:.4f}")
-                
-                # 过滤距离过大的结果（距离小于阈值的保留）
-                if distance > similarity_threshold:
-                    logger.info(f"距离 {distance:.4f} 大于阈值 {similarity_threshold}，跳过")
-                    continue
-                
+            for doc, distance in kept_results:
                 # 检查文件是否仍然存在且未删除
                 file_id = doc.metadata.get('file_id')
                 if file_id:
-                    file = self.db.query(File).filter(
-                        File.id == file_id,
-                        File.is_deleted == False
-                    ).first()
+                    file = live_files.get(file_id)
                     
                     if file:
                         result_item = {
@@ -669,11 +1214,6 @@ class AIService:
                         # 文件去重：保留每个文件的最佳匹配（距离最小）
                         if file_id not in seen_files or distance < seen_files[file_id]['distance']:
                             seen_files[file_id] = result_item
-                            logger.info(f"添加/更新最佳匹配: {doc.metadata.get('file_path')}, 距离: {distance:.4f}")
-                        else:
-                            logger.info(f"跳过重复文件（距离更大）: {doc.metadata.get('file_path')}, 距离: {distance:.4f}")
-                    else:
-                        logger.info(f"文件不存在或已删除: file_id={file_id}")
             
             # 将去重后的结果转换为列表，按距离排序
             results = list(seen_files.values())
@@ -699,21 +1239,13 @@ class AIService:
             outline_results = self._search_by_chunk_type(query, "outline", limit//3, similarity_threshold)
             content_results = self._search_by_chunk_type(query, "content", limit, similarity_threshold)
             
-            # 记录每层级的详细匹配内容
-            logger.info(f"📝 摘要层匹配结果 ({len(summary_results)} 个):")
-            for i, result in enumerate(summary_results, 1):
-                logger.info(f"   {i}. 文件: {result.get('title', 'Unknown')} (相似度: {result.get('similarity', 0):.3f})")
-                logger.info(f"      摘要内容: {result.get('chunk_text', '')[:200]}...")
-            
-            logger.info(f"📋 大纲层匹配结果 ({len(outline_results)} 个):")
-            for i, result in enumerate(outline_results, 1):
-                logger.info(f"   {i}. 文件: {result.get('title', 'Unknown')} (相似度: {result.get('similarity', 0):.3f})")
-                logger.info(f"      大纲内容: {result.get('chunk_text', '')[:200]}...")
-            
-            logger.info(f"📄 内容层匹配结果 ({len(content_results)} 个):")
-            for i, result in enumerate(content_results, 1):
-                logger.info(f"   {i}. 文件: {result.get('title', 'Unknown')} (相似度: {result.get('similarity', 0):.3f})")
-                logger.info(f"      内容片段: {result.get('chunk_text', '')[:200]}...")
+            # 每层级的详细匹配内容仅在DEBUG级别输出，汇总信息见方法末尾
+            if logger.isEnabledFor(logging.DEBUG):
+                for layer_name, layer_results in (("📝 摘要层", summary_results), ("📋 大纲层", outline_results), ("📄 内容层", content_results)):
+                    logger.debug("%s匹配结果 (%d 个):", layer_name, len(layer_results))
+                    for i, result in enumerate(layer_results, 1):
+                        logger.debug("   %d. 文件: %s (相似度: %.3f)", i, result.get('title', 'Unknown'), result.get('similarity', 0))
+                        logger.debug("      内容: %s...", result.get('chunk_text', '')[:200])
             
             # 智能上下文扩展
             expanded_results = []
@@ -739,13 +1271,13 @@ class AIService:
             final_results = self._deduplicate_and_rank(expanded_results, limit)
             
             # 记录最终构建的上下文
-            logger.info(f"🔧 最终构建的搜索上下文:")
-            total_context_length = 0
-            for i, result in enumerate(final_results, 1):
-                chunk_text = result.get('chunk_text', '')
-                total_context_length += len(chunk_text)
-                logger.info(f"   {i}. [{result.get('chunk_type', 'content')}] {result.get('title', 'Unknown')} - {len(chunk_text)} 字符")
-                logger.info(f"      预览: {chunk_text[:150]}..." if len(chunk_text) > 150 else f"      内容: {chunk_text}")
+            total_context_length = sum(len(result.get('chunk_text', '')) for result in final_results)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔧 最终构建的搜索上下文:")
+                for i, result in enumerate(final_results, 1):
+                    chunk_text = result.get('chunk_text', '')
+                    logger.debug("   %d. [%s] %s - %d 字符", i, result.get('chunk_type', 'content'), result.get('title', 'Unknown'), len(chunk_text))
+                    logger.debug("      预览: %s", chunk_text[:150])
             
             logger.info(f"📊 上下文统计: 总长度={total_context_length} 字符, 片段数={len(final_results)}")
             logger.info(f"多层次搜索完成: 摘要={len(summary_results)}, 大纲={len(outline_results)}, 内容={len(content_results)}, 最终={len(final_results)}")
@@ -756,13 +1288,37 @@ class AIService:
             # 降级到传统搜索
             return self._traditional_semantic_search(query, limit, similarity_threshold)
     
+    @staticmethod
+    def _filter_by_distance(search_results: List[tuple], threshold: float) -> List[tuple]:
+        """一次向量化比较筛出距离不大于阈值的 (doc, distance) 结果，保持原有顺序"""
+        if not search_results:
+            return []
+        distances = np.fromiter((score for _, score in search_results), dtype=np.float64, count=len(search_results))
+        keep = np.flatnonzero(distances <= threshold)
+        return [(search_results[index][0], float(distances[index])) for index in keep]
+    
+    def _get_live_files(self, file_ids) -> Dict[int, Any]:
+        """
+        一次IN查询取出仍存在且未删除的文件，返回 file_id -> (id, created_at, updated_at) 行。
+        
+        标题与路径已在ChromaDB元数据中，这里只按列查询时间戳，不构建ORM对象也不读取content。
+        """
+        ids = {file_id for file_id in file_ids if file_id}
+        if not ids:
+            return {}
+        rows = self.db.query(File.id, File.created_at, File.updated_at).filter(
+            File.id.in_(ids),
+            File.is_deleted == False
+        ).all()
+        return {row.id: row for row in rows}
+    
     def _search_by_chunk_type(self, query: str, chunk_type: str, limit: int, similarity_threshold: float) -> List[Dict[str, Any]]:
         """按分块类型搜索"""
         try:
             logger.info(f"🔍 开始按类型搜索: {chunk_type}, 查询: '{query}', 阈值: {similarity_threshold}")
             
-            search_results = self.vector_store.similarity_search_with_score(
-                query=query,
+            search_results = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                embedding=self._get_cached_query_embedding(query),
                 k=limit * 2,
                 filter={"chunk_type": chunk_type}
             )
@@ -770,45 +1326,32 @@ class AIService:
             logger.info(f"📊 向量数据库返回 {len(search_results)} 个 {chunk_type} 类型的原始结果")
             
             results = []
-            filtered_count = 0
+            kept_results = self._filter_by_distance(search_results, similarity_threshold)
+            filtered_count = len(search_results) - len(kept_results)
+            live_files = self._get_live_files(doc.metadata.get('file_id') for doc, _ in kept_results)
             
-            for i, (doc, score) in enumerate(search_results, 1):
-                distance = score
+            for doc, distance in kept_results:
                 similarity = 1 - distance
-                
-                logger.info(f"   原始结果 {i}: 距离={distance:.4f}, 相似度={similarity:.4f}, 文件={doc.metadata.get('title', 'Unknown')}")
-                logger.info(f"     内容预览: {doc.page_content[:100]}...")
-                
-                if score <= similarity_threshold:
-                    file_id = doc.metadata.get('file_id')
-                    if file_id:
-                        file = self.db.query(File).filter(
-                            File.id == file_id,
-                            File.is_deleted == False
-                        ).first()
-                        
-                        if file:
-                            result_item = {
-                                'file_id': file_id,
-                                'file_path': doc.metadata.get('file_path', ''),
-                                'title': doc.metadata.get('title', ''),
-                                'chunk_text': doc.page_content,
-                                'chunk_index': doc.metadata.get('chunk_index', 0),
-                                'chunk_type': chunk_type,
-                                'chunk_level': doc.metadata.get('chunk_level', 3),
-                                'parent_heading': doc.metadata.get('parent_heading'),
-                                'section_path': doc.metadata.get('section_path'),
-                                'similarity': float(similarity),
-                                'created_at': file.created_at.isoformat() if file.created_at else None,
-                                'updated_at': file.updated_at.isoformat() if file.updated_at else None,
-                            }
-                            results.append(result_item)
-                            logger.info(f"     ✅ 通过阈值筛选，加入结果列表")
-                        else:
-                            logger.info(f"     ❌ 文件不存在或已删除: file_id={file_id}")
-                else:
-                    filtered_count += 1
-                    logger.info(f"     ❌ 未通过阈值筛选 (距离 {distance:.4f} > {similarity_threshold})")
+                file_id = doc.metadata.get('file_id')
+                if file_id:
+                    file = live_files.get(file_id)
+                    
+                    if file:
+                        result_item = {
+                            'file_id': file_id,
+                            'file_path': doc.metadata.get('file_path', ''),
+                            'title': doc.metadata.get('title', ''),
+                            'chunk_text': doc.page_content,
+                            'chunk_index': doc.metadata.get('chunk_index', 0),
+                            'chunk_type': chunk_type,
+                            'chunk_level': doc.metadata.get('chunk_level', 3),
+                            'parent_heading': doc.metadata.get('parent_heading'),
+                            'section_path': doc.metadata.get('section_path'),
+                            'similarity': float(similarity),
+                            'created_at': file.created_at.isoformat() if file.created_at else None,
+                            'updated_at': file.updated_at.isoformat() if file.updated_at else None,
+                        }
+                        results.append(result_item)
             
             final_results = results[:limit]
             logger.info(f"🎯 {chunk_type} 搜索完成: 原始={len(search_results)}, 过滤={filtered_count}, 通过={len(results)}, 最终={len(final_results)}")
@@ -922,11 +1465,17 @@ class AIService:
             # 2. 清空LangChain向量存储
             if self.vector_store:
                 try:
-                    # 获取所有文档ID并删除
-                    all_docs = self.vector_store.get()
-                    if all_docs and all_docs.get('ids'):
-                        self.vector_store.delete(ids=all_docs['ids'])
-                        logger.info(f"清空LangChain向量存储，删除了 {len(all_docs['ids'])} 个文档")
+                    if hasattr(self.vector_store, 'reset_collection'):
+                        # 删除并按原配置重建集合，无需读取任何文档
+                        doc_count = self.vector_store._collection.count()
+                        self.vector_store.reset_collection()
+                        logger.info(f"清空LangChain向量存储，删除了 {doc_count} 个文档")
+                    else:
+                        # 旧版langchain-chroma：只取ID（不取文本、元数据和向量）再删除
+                        all_docs = self.vector_store.get(include=[])
+                        if all_docs and all_docs.get('ids'):
+                            self.vector_store.delete(ids=all_docs['ids'])
+                            logger.info(f"清空LangChain向量存储，删除了 {len(all_docs['ids'])} 个文档")
                 except Exception as e:
                     logger.warning(f"清空LangChain向量存储时出错: {e}")
             
@@ -962,12 +1511,8 @@ class AIService:
             # 2. 删除LangChain向量存储中的文档
             if self.vector_store:
                 try:
-                    existing_docs = self.vector_store.get(
-                        where={"file_id": file_id}
-                    )
-                    if existing_docs and existing_docs.get('ids'):
-                        self.vector_store.delete(ids=existing_docs['ids'])
-                        logger.info(f"从LangChain向量存储删除文件 {file_id} 的文档: {len(existing_docs['ids'])} 个")
+                    delete_file_vectors(self.vector_store, file_id)
+                    logger.info(f"从LangChain向量存储删除文件 {file_id} 的文档")
                 except Exception as e:
                     logger.warning(f"从LangChain向量存储删除文档时出错: {e}")
             
@@ -1102,12 +1647,7 @@ class AIService:
             return None
         
         try:
-            prompt = f"""请为以下内容生成一个简洁的摘要，不超过{max_length}字：
-
-内容：
-{content[:2000]}  # 限制输入长度
-
-摘要："""
+            prompt = self._SUMMARY_TMPL.format_map({"content": content[:2000], "max_length": max_length})
             
             response = self.llm.invoke(prompt)
             summary = response.content.strip()
@@ -1126,18 +1666,7 @@ class AIService:
             return None
         
         try:
-            prompt = f"""请为以下内容生成一个清晰的提纲，包含主要章节和要点，不超过{max_items}个要点：
-
-内容：
-{content[:3000]}  # 限制输入长度
-
-要求：
-1. 提取主要章节和关键要点
-2. 使用层级结构（如：一、二、三... 或 1. 2. 3...）
-3. 保持逻辑清晰，结构合理
-4. 每个要点简洁明了
-
-提纲："""
+            prompt = self._OUTLINE_TMPL.format_map({"content": content[:3000], "max_items": max_items})
             
             response = self.llm.invoke(prompt)
             outline = response.content.strip()
@@ -1157,15 +1686,8 @@ class AIService:
             return []
         
         try:
-            # 1. 定义预设的常规标签
-            predefined_tags = [
-                "重点", "前端", "后端", "AI大模型", "技巧", 
-                "笔记", "总结", "教程", "文档", "配置",
-                "问题", "解决方案", "代码", "工具", "框架",
-                "数据库", "网络", "安全", "性能", "测试",
-                "部署", "运维", "算法", "架构", "设计",
-                "学习", "资源", "参考", "示例", "模板"
-            ]
+            # 1. 预设的常规标签
+            predefined_tags = self._PREDEFINED_TAGS
             
             # 2. 从数据库获取现有的不重复标签
             existing_tags = []
@@ -1201,22 +1723,7 @@ class AIService:
             # 5. 构建提示词，要求从候选标签中选择
             candidate_tags_text = "、".join(candidate_tags)
             
-            prompt = f"""请从以下候选标签中选择最多{max_tags}个最适合的标签来标记下面的文档。
-
-**候选标签列表：**
-{candidate_tags_text}
-
-**文档信息：**
-{analysis_content}
-
-**要求：**
-1. 只能从上述候选标签列表中选择，不要创造新标签
-2. 选择最相关的{max_tags}个标签
-3. 标签要准确反映文档的主要内容和特征
-4. 每行返回一个标签名称
-
-**返回格式：**
-请只返回选中的标签，每行一个："""
+            prompt = self._TAGS_TMPL.format_map({"max_tags": max_tags, "candidate_tags_text": candidate_tags_text, "analysis_content": analysis_content})
             
             response = self.llm.invoke(prompt)
             tags_text = response.content.strip()
@@ -1286,16 +1793,7 @@ class AIService:
             return {}
         
         try:
-            prompt = f"""请分析以下内容，提供以下信息：
-1. 主要话题
-2. 内容类型（技术文档、笔记、总结等）
-3. 重要性评分（1-10）
-4. 建议的处理方式
-
-内容：
-{content[:1500]}
-
-请以JSON格式返回分析结果。"""
+            prompt = self._ANALYZE_TMPL.format_map({"content": content[:1500]})
             
             response = self.llm.invoke(prompt)
             # 这里应该解析JSON响应，为简化直接返回文本
@@ -1319,12 +1817,7 @@ class AIService:
             return []
         
         try:
-            prompt = f"""基于以下内容，生成{num_questions}个相关的问题，这些问题应该能够帮助用户更深入地理解内容：
-
-内容：
-{content[:1500]}
-
-请只返回问题列表，每行一个问题："""
+            prompt = self._QUESTIONS_TMPL.format_map({"num_questions": num_questions, "content": content[:1500]})
             
             response = self.llm.invoke(prompt)
             questions_text = response.content.strip()
@@ -1496,37 +1989,14 @@ class AIService:
     def _generate_links_with_llm(self, file_id: int, content: str, title: str, files_text: str, related_results: List[Dict]) -> List[Dict[str, Any]]:
         """使用LLM生成传统智能链接"""
         try:
-            prompt = f"""当前文档：
-标题：{title}
-内容：{content[:500]}
-
-相关文档：
-{files_text}
-
-请分析当前文档与这些相关文档之间的关系类型，并为每个建议的链接提供以下信息：
-1. 链接类型（reference/related/follow_up/prerequisite/example/contradiction）
-2. 链接理由（简短说明为什么要建立这个链接）
-3. 建议的链接文本
-
-请以JSON格式返回，格式如下：
-[
-    {{
-        "target_file_id": 文件ID,
-        "link_type": "链接类型",
-        "reason": "链接理由",
-        "suggested_text": "建议的链接文本"
-    }}
-]
-
-只返回JSON，不要其他文字："""
+            prompt = self._LINKS_TMPL.format_map({"title": title, "content": content[:500], "files_text": files_text})
             
             response = self.llm.invoke(prompt)
             result_text = response.content.strip()
             
-            # 尝试解析JSON
-            import json
+            # 尝试解析JSON（容忍前后附带的说明文字）
             try:
-                smart_links = json.loads(result_text)
+                smart_links = _json_loads(_extract_json_array(result_text))
                 logger.info(f"智能链接生成成功: {len(smart_links)} 个链接")
                 return smart_links
             except json.JSONDecodeError as e:
@@ -1540,47 +2010,14 @@ class AIService:
     def _generate_enhanced_links_with_llm(self, file_id: int, content: str, title: str, files_text: str, candidate_files: List[Dict]) -> List[Dict[str, Any]]:
         """使用LLM生成增强的多层次智能链接"""
         try:
-            prompt = f"""当前文档：
-标题：{title}
-内容：{content[:600]}
-
-候选关联文档（包含关联级别和相似度）：
-{files_text}
-
-请基于多层次关联分析，为每个候选文档评估是否应该建立链接，以及链接的类型和强度。
-
-关联级别说明：
-- 文件级：整个文档在主题或内容上相关
-- 章节级：特定章节或主题相关
-
-请为每个建议的链接提供：
-1. 链接类型（reference/related/follow_up/prerequisite/example/contradiction/complement）
-2. 链接强度（strong/medium/weak）
-3. 链接理由（详细说明关联原因和关联级别）
-4. 建议的链接文本
-5. 是否推荐建立链接（true/false）
-
-请以JSON格式返回，格式如下：
-[
-    {{
-        "target_file_id": 文件ID,
-        "link_type": "链接类型",
-        "link_strength": "链接强度",
-        "reason": "链接理由",
-        "suggested_text": "建议的链接文本",
-        "recommended": true或false
-    }}
-]
-
-只返回JSON，不要其他文字："""
+            prompt = self._ENHANCED_LINKS_TMPL.format_map({"title": title, "content": content[:600], "files_text": files_text})
             
             response = self.llm.invoke(prompt)
             result_text = response.content.strip()
             
-            # 尝试解析JSON
-            import json
+            # 尝试解析JSON（容忍前后附带的说明文字）
             try:
-                smart_links = json.loads(result_text)
+                smart_links = _json_loads(_extract_json_array(result_text))
                 # 只返回推荐的链接
                 recommended_links = [link for link in smart_links if link.get('recommended', False)]
                 logger.info(f"增强智能链接生成成功: {len(recommended_links)} 个推荐链接（从 {len(smart_links)} 个候选中筛选）")
@@ -1594,27 +2031,8 @@ class AIService:
             return []
 
     def _get_cached_query_embedding(self, query: str) -> List[float]:
-        """获取缓存的查询向量"""
-        with self._cache_lock:
-            query_hash = hashlib.md5(query.encode()).hexdigest()
-            
-            if query_hash in self._query_cache:
-                logger.info(f"使用缓存的查询向量: {query[:50]}...")
-                return self._query_cache[query_hash]
-            
-            # 生成新的查询向量
-            embedding = self.embeddings.embed_query(query)
-            
-            # 缓存管理：如果缓存过大，清理最旧的条目
-            if len(self._query_cache) >= self._max_cache_size:
-                # 简单的FIFO清理策略
-                oldest_key = next(iter(self._query_cache))
-                del self._query_cache[oldest_key]
-                logger.info(f"查询向量缓存已满，清理最旧条目")
-            
-            self._query_cache[query_hash] = embedding
-            logger.info(f"生成并缓存新的查询向量: {query[:50]}...")
-            return embedding
+        """获取缓存的查询向量（缓存由嵌入模型的embed_query在进程内共享）"""
+        return self.embeddings.embed_query(query)
 
     def _build_smart_prompt(self, question: str, context: str, messages: List[Dict] = None) -> str:
         """构建智能提示词，根据上下文内容决定策略，集成用户记忆"""
@@ -1834,19 +2252,18 @@ class AIService:
             
             # 检查长度限制
             if current_length + len(formatted_content) > max_length:
-                logger.info(f"   片段 {i}: 长度超限 ({current_length + len(formatted_content)} > {max_length}), 停止添加")
+                logger.debug("   片段 %d: 长度超限 (%d > %d), 停止添加", i, current_length + len(formatted_content), max_length)
                 break
                 
             context_parts.append(formatted_content)
             current_length += len(formatted_content)
             included_count += 1
             
-            logger.info(f"   片段 {i}: [{chunk_type}] {file_path} - {len(formatted_content)} 字符 (累计: {current_length})")
-            logger.info(f"     内容: {content[:100]}..." if len(content) > 100 else f"     内容: {content}")
+            logger.debug("   片段 %d: [%s] %s - %d 字符 (累计: %d)", i, chunk_type, file_path, len(formatted_content), current_length)
         
         final_context = "\n".join(context_parts)
         logger.info(f"🎯 上下文构建完成: 包含 {included_count}/{len(search_results)} 个片段, 总长度: {len(final_context)} 字符")
-        logger.info(f"📄 最终上下文预览:\n{final_context[:300]}..." if len(final_context) > 300 else f"📄 最终上下文:\n{final_context}")
+        logger.debug("📄 最终上下文预览:\n%s", final_context[:300])
         
         return final_context
 
@@ -2027,11 +2444,12 @@ class AIService:
                 logger.warning("AI服务不可用，无法生成文档摘要和提纲")
                 return None
             
-            # 生成摘要
-            summary = self.generate_summary(file.content, max_length=300)
-            
-            # 生成提纲
-            outline_items = self.generate_outline(file.content, max_items=8)
+            # 摘要与提纲互不依赖，并发请求LLM，总耗时取两者中较慢的一个
+            executor = _get_llm_executor()
+            summary_future = executor.submit(self.generate_summary, file.content, 300)
+            outline_future = executor.submit(self.generate_outline, file.content, 8)
+            summary = summary_future.result()
+            outline_items = outline_future.result()
             
             if summary and outline_items:
                 return {
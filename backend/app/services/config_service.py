@@ -13,6 +13,7 @@ from ..schemas.config import (
     AIProvider, FallbackMode
 )
 from ..config import settings
+from ..dynamic_config import dynamic_settings
 import requests
 from ..services.ai_service_langchain import OpenAICompatibleEmbeddings
 
@@ -68,11 +69,13 @@ class ConfigService:
             self._app_config.meta.last_updated = datetime.now()
             
             # 保存配置
-            config_dict = self._app_config.dict()
-            with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                json.dump(config_dict, f, ensure_ascii=False, indent=2, default=str)
+            # 由pydantic-core直接序列化为JSON，枚举与日期无需经过Python层转换
+            self.config_file_path.write_text(self._app_config.model_dump_json(indent=2), encoding='utf-8')
             
             logger.info(f"配置已保存到: {self.config_file_path}")
+            
+            # 通知动态配置立即重新加载，使依赖配置的缓存失效
+            dynamic_settings.reload_config()
             return True
             
         except Exception as e:
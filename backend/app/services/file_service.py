@@ -302,6 +302,9 @@ class FileService(BaseService):
         db_file = self.db.query(File).filter(File.id == file_id).first()
         if not db_file:
             return None
+        # 嵌入关系为noload且数据库不执行级联删除，显式删除，避免孤立记录被复用该ID的新文件继承
+        from ..models.embedding import Embedding
+        self.db.query(Embedding).filter(Embedding.file_id == file_id).delete(synchronize_session=False)
         self.db.delete(db_file)
         self.db.commit()
         return db_file
@@ -15,6 +15,10 @@ from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+def chunk_hash(text: str) -> str:
+    """分块内容标识：仅用于识别相同文本（非安全用途），blake2b比sha256更快，16字节摘要为32位十六进制"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
 class IntelligentHierarchicalSplitter:
     """基于LLM的智能多层次文本分块器"""
     
@@ -163,7 +167,7 @@ class IntelligentHierarchicalSplitter:
                     "chunk_level": 1,
                     "chunk_index": -1,
                     "title": title,
-                    "chunk_hash": hashlib.sha256(summary.encode()).hexdigest(),
+                    "chunk_hash": chunk_hash(summary),
                     "parent_heading": None,
                     "section_path": "全文摘要",
                     "generation_method": "direct_llm",
@@ -242,7 +246,7 @@ class IntelligentHierarchicalSplitter:
                         "chunk_level": 1,
                         "chunk_index": -1,
                         "title": title,
-                        "chunk_hash": hashlib.sha256(current_summary.encode()).hexdigest(),
+                        "chunk_hash": chunk_hash(current_summary),
                         "parent_heading": None,
                         "section_path": "全文摘要",
                         "generation_method": "divide_conquer_refine",
@@ -373,6 +377,16 @@ class IntelligentHierarchicalSplitter:
             current_level_1 = None
             
             base_offset = 1000  # 使大纲索引为负且不与摘要冲突
+            # 所有大纲文档共用的元数据，循环内只合并各行不同的字段
+            base_meta = {
+                "file_id": file_id,
+                "file_path": file_path,
+                "chunk_type": "outline",
+                "chunk_level": 2,
+                "title": title,
+                "generation_method": generation_method,
+                "vector_model": "hierarchical_outline"
+            }
             for i, line in enumerate(lines):
                 line = line.strip()
                 if not line:
@@ -383,19 +397,12 @@ class IntelligentHierarchicalSplitter:
                     current_level_1 = line
                     doc = Document(
                         page_content=line,
-                        metadata={
-                            "file_id": file_id,
-                            "file_path": file_path,
-                            "chunk_type": "outline",
-                            "chunk_level": 2,
+                        metadata=base_meta | {
                             "chunk_index": -(base_offset + i),
-                            "title": title,
-                            "chunk_hash": hashlib.sha256(line.encode()).hexdigest(),
+                            "chunk_hash": chunk_hash(line),
                             "parent_heading": None,
                             "section_path": line,
                             "outline_level": 1,
-                            "generation_method": generation_method,
-                            "vector_model": "hierarchical_outline"
                         }
                     )
                     outline_docs.append(doc)
@@ -403,19 +410,12 @@ class IntelligentHierarchicalSplitter:
                 elif re.match(r'^\s+\d+\.\d+', line):  # 二级标题 (1.1 1.2)
                     doc = Document(
                         page_content=line,
-                        metadata={
-                            "file_id": file_id,
-                            "file_path": file_path,
-                            "chunk_type": "outline",
-                            "chunk_level": 2,
+                        metadata=base_meta | {
                             "chunk_index": -(base_offset + i),
-                            "title": title,
-                            "chunk_hash": hashlib.sha256(line.encode()).hexdigest(),
+                            "chunk_hash": chunk_hash(line),
                             "parent_heading": current_level_1,
                             "section_path": f"{current_level_1} / {line.strip()}" if current_level_1 else line.strip(),
                             "outline_level": 2,
-                            "generation_method": generation_method,
-                            "vector_model": "hierarchical_outline"
                         }
                     )
                     outline_docs.append(doc)
@@ -423,19 +423,12 @@ class IntelligentHierarchicalSplitter:
                 elif line and not re.match(r'^\s*$', line):  # 其他非空行
                     doc = Document(
                         page_content=line,
-                        metadata={
-                            "file_id": file_id,
-                            "file_path": file_path,
-                            "chunk_type": "outline",
-                            "chunk_level": 2,
+                        metadata=base_meta | {
                             "chunk_index": -(base_offset + i),
-                            "title": title,
-                            "chunk_hash": hashlib.sha256(line.encode()).hexdigest(),
+                            "chunk_hash": chunk_hash(line),
                             "parent_heading": current_level_1,
                             "section_path": f"{current_level_1} / {line.strip()}" if current_level_1 else line.strip(),
                             "outline_level": 3,
-                            "generation_method": generation_method,
-                            "vector_model": "hierarchical_outline"
                         }
                     )
                     outline_docs.append(doc)
@@ -472,9 +465,10 @@ class IntelligentHierarchicalSplitter:
             logger.info(f"🧠 基于 {len(outline_docs)} 个大纲项目进行智能分块")
             
             # 输出大纲文档的详细信息
-            for i, outline_doc in enumerate(outline_docs[:3]):  # 只显示前3个
-                logger.info(f"  📝 大纲 {i+1}: {outline_doc.page_content[:50]}...")
-                logger.info(f"      章节路径: {outline_doc.metadata.get('section_path', 'N/A')}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, outline_doc in enumerate(outline_docs[:3]):  # 只显示前3个
+                    logger.debug("  📝 大纲 %d: %s...", i + 1, outline_doc.page_content[:50])
+                    logger.debug("      章节路径: %s", outline_doc.metadata.get('section_path', 'N/A'))
             
             if progress_callback:
                 progress_callback("智能分块", f"基于 {len(outline_docs)} 个大纲项目进行智能分块")
@@ -504,10 +498,18 @@ class IntelligentHierarchicalSplitter:
             logger.info("🏗️ 开始创建内容文档并匹配大纲...")
             content_docs = []
             matched_outlines = 0
+            base_meta = {
+                "file_id": file_id,
+                "file_path": file_path,
+                "chunk_type": "content",
+                "chunk_level": 3,
+                "title": title,
+                "vector_model": "hierarchical_intelligent"
+            }
             
             for i, chunk in enumerate(chunks):
                 try:
-                    logger.info(f"🔍 处理第 {i+1}/{len(chunks)} 个内容块 (长度: {len(chunk)} 字符)")
+                    logger.debug("🔍 处理第 %d/%d 个内容块 (长度: %d 字符)", i + 1, len(chunks), len(chunk))
                     
                     # 验证内容块
                     if not chunk or not chunk.strip():
@@ -519,32 +521,26 @@ class IntelligentHierarchicalSplitter:
                     
                     if best_outline:
                         matched_outlines += 1
-                        logger.info(f"✅ 为内容块 {i+1} 匹配到大纲: {best_outline.get('section_path', 'N/A')}")
+                        logger.debug("✅ 为内容块 %d 匹配到大纲: %s", i + 1, best_outline.get('section_path', 'N/A'))
                     else:
-                        logger.info(f"⚠️ 内容块 {i+1} 未匹配到相关大纲")
+                        logger.debug("⚠️ 内容块 %d 未匹配到相关大纲", i + 1)
                     
                     # 创建文档对象
                     doc = Document(
                         page_content=chunk,
-                        metadata={
-                            "file_id": file_id,
-                            "file_path": file_path,
-                            "chunk_type": "content",
-                            "chunk_level": 3,
+                        metadata=base_meta | {
                             "chunk_index": i + 1,
-                            "title": title,
-                            "chunk_hash": hashlib.sha256(chunk.encode()).hexdigest(),
+                            "chunk_hash": chunk_hash(chunk),
                             "parent_heading": best_outline.get('section_path') if best_outline else None,
                             "section_path": f"内容块-{i+1}",
                             "related_outline": best_outline.get('content') if best_outline else None,
-                            "vector_model": "hierarchical_intelligent"
                         }
                     )
                     content_docs.append(doc)
                     
                     # 每10个块输出一次进度
                     if (i + 1) % 10 == 0:
-                        logger.info(f"📈 进度: {i+1}/{len(chunks)} 个内容块已处理")
+                        logger.debug("📈 进度: %d/%d 个内容块已处理", i + 1, len(chunks))
                 
                 except Exception as e:
                     logger.error(f"❌ 处理第 {i+1} 个内容块时发生错误: {e}")
@@ -809,6 +805,15 @@ class IntelligentHierarchicalSplitter:
             # 创建文档对象
             logger.info("🏗️ 开始创建递归分块文档...")
             content_docs = []
+            base_meta = {
+                "file_id": file_id,
+                "file_path": file_path,
+                "chunk_type": "content",
+                "chunk_level": 3,
+                "title": title,
+                "parent_heading": None,
+                "vector_model": "recursive_fallback"
+            }
             
             for i, chunk in enumerate(chunks):
                 try:
@@ -820,17 +825,10 @@ class IntelligentHierarchicalSplitter:
                     # 创建文档
                     doc = Document(
                         page_content=chunk,
-                        metadata={
-                            "file_id": file_id,
-                            "file_path": file_path,
-                            "chunk_type": "content",
-                            "chunk_level": 3,
+                        metadata=base_meta | {
                             "chunk_index": i + 1,
-                            "title": title,
-                            "chunk_hash": hashlib.sha256(chunk.encode()).hexdigest(),
-                            "parent_heading": None,
+                            "chunk_hash": chunk_hash(chunk),
                             "section_path": f"内容块-{i+1}",
-                            "vector_model": "recursive_fallback"
                         }
                     )
                     content_docs.append(doc)
@@ -904,7 +902,7 @@ class IntelligentHierarchicalSplitter:
                         "chunk_level": 1,
                         "chunk_index": -1,
                         "title": title,
-                        "chunk_hash": hashlib.sha256(simple_summary.encode()).hexdigest(),
+                        "chunk_hash": chunk_hash(simple_summary),
                         "parent_heading": None,
                         "section_path": "简单摘要",
                         "generation_method": "fallback",
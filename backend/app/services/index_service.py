@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text, func
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from pathlib import Path
 import os
 import logging
@@ -160,42 +160,61 @@ class IndexService:
     
     def scan_notes_directory(self) -> List[Dict[str, Any]]:
         """扫描notes目录，返回文件信息列表"""
+        files_info = list(self.iter_notes_directory())
+        logger.info(f"扫描完成，找到 {len(files_info)} 个文件")
+        return files_info
+    
+    def iter_notes_directory(self) -> Iterator[Dict[str, Any]]:
+        """逐个产出notes目录中的文件信息，调用方处理完即可释放文件内容"""
         from ..config import settings
         notes_path = Path(settings.notes_directory)
         logger.info(f"扫描notes目录: {notes_path}")
         if not notes_path.exists():
             logger.warning(f"notes目录不存在: {notes_path}")
-            return []
-        
-        files_info = []
-        file_extensions = ['.md', '.txt', '.markdown']
-        
-        for ext in file_extensions:
-            for file_path in notes_path.rglob(f'*{ext}'):
-                try:
-                    # 读取文件内容
-                    content = file_path.read_text(encoding='utf-8')
-                    
-                    # 计算相对路径
-                    relative_path = file_path.relative_to(notes_path.parent)
-                    
-                    # 提取标题（从文件名或内容中）
-                    title = self._extract_title(content, file_path.stem)
-                    
-                    files_info.append({
-                        "file_path": str(relative_path).replace('\\', '/'),
-                        "title": title,
-                        "content": content,
-                        "parent_folder": str(relative_path.parent).replace('\\', '/'),
-                        "file_size": len(content.encode('utf-8')),
-                        "content_hash": hashlib.sha256(content.encode('utf-8')).hexdigest()
-                    })
-                except Exception as e:
-                    logger.error(f"读取文件失败: {file_path}, 错误: {e}")
-                    continue
+            return
         
-        logger.info(f"扫描完成，找到 {len(files_info)} 个文件")
-        return files_info
+        for entry in self._iter_note_entries(notes_path):
+            file_path = Path(entry.path)
+            try:
+                # 读取文件内容
+                content = file_path.read_text(encoding='utf-8')
+                encoded = content.encode('utf-8')
+                
+                # 计算相对路径
+                relative_path = file_path.relative_to(notes_path.parent)
+                
+                # 提取标题（从文件名或内容中）
+                title = self._extract_title(content, file_path.stem)
+                
+                file_info = {
+                    "file_path": str(relative_path).replace('\\', '/'),
+                    "title": title,
+                    "content": content,
+                    "parent_folder": str(relative_path.parent).replace('\\', '/'),
+                    "file_size": len(encoded),
+                    "content_hash": hashlib.sha256(encoded).hexdigest()
+                }
+            except Exception as e:
+                logger.error(f"读取文件失败: {file_path}, 错误: {e}")
+                continue
+            
+            yield file_info
+    
+    def _iter_note_entries(self, root: Path) -> Iterator[os.DirEntry]:
+        """用 os.scandir 递归遍历目录，产出笔记文件的 DirEntry（不跟随目录符号链接）"""
+        file_extensions = ('.md', '.txt', '.markdown')
+        stack = [str(root)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith(file_extensions) and entry.is_file():
+                            yield entry
+            except PermissionError as e:
+                logger.warning(f"无权限访问目录: {current}, 错误: {e}")
     
     def _extract_title(self, content: str, filename: str) -> str:
         """从内容中提取标题"""
@@ -3,10 +3,13 @@ MCP (Model Context Protocol) 服务
 负责管理MCP Server连接、工具发现和调用
 """
 import asyncio
+import hashlib
 import json
+import threading
 import time
 import httpx
 import subprocess
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -21,21 +24,81 @@ from ..schemas.mcp import (
 
 logger = logging.getLogger(__name__)
 
+# 工具调用结果缓存：key -> (过期时间, 工具返回的结果)；调用方可能位于不同线程，读写均需持锁
+_tool_result_cache: Dict[str, tuple] = {}
+_tool_result_cache_lock = threading.Lock()
+_TOOL_RESULT_CACHE_TTL = 60  # 默认缓存60秒，工具可通过 tool_config.cache_ttl 覆盖（0表示不缓存）
+_TOOL_RESULT_CACHE_MAX_SIZE = 256
+
+
+def _tool_cache_key(tool_id: int, arguments: Dict[str, Any]) -> str:
+    """根据工具ID和规范化后的参数生成缓存键"""
+    args_json = json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.blake2b(f"{tool_id}:{args_json}".encode("utf-8"), digest_size=16).hexdigest()
+    return f"mcp:tc:{digest}"
+
+
+def _get_cached_tool_result(cache_key: str) -> tuple:
+    """读取未过期的缓存结果，返回 (是否命中, 结果)；过期条目顺带删除"""
+    with _tool_result_cache_lock:
+        cached = _tool_result_cache.get(cache_key)
+        if cached is None:
+            return False, None
+        if cached[0] <= time.monotonic():
+            del _tool_result_cache[cache_key]
+            return False, None
+        return True, cached[1]
+
+
+def _put_cached_tool_result(cache_key: str, ttl: int, result: Any) -> None:
+    """写入结果缓存，超出容量时淘汰最早的条目"""
+    with _tool_result_cache_lock:
+        _tool_result_cache.pop(cache_key, None)
+        if len(_tool_result_cache) >= _TOOL_RESULT_CACHE_MAX_SIZE:
+            _tool_result_cache.pop(next(iter(_tool_result_cache)))
+        _tool_result_cache[cache_key] = (time.monotonic() + ttl, result)
+
+
+def _get_tool_cache_ttl(tool: MCPTool) -> int:
+    """获取工具结果的缓存时长，有状态的工具可在 tool_config 中设置 cache_ttl=0 退出缓存"""
+    if tool.tool_config and "cache_ttl" in tool.tool_config:
+        return int(tool.tool_config["cache_ttl"] or 0)
+    return _TOOL_RESULT_CACHE_TTL
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """创建进程级共享的HTTP客户端（HTTP/2 + keep-alive连接池）"""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+    )
+
 
 class MCPClientService:
     """MCP客户端服务"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, http: Optional[httpx.AsyncClient] = None):
         self.db = db
+        self._http = http  # 由应用生命周期注入的共享HTTP客户端
         self._connections: Dict[int, Any] = {}  # server_id -> connection
         self._tools_cache: Dict[int, List[Dict]] = {}  # server_id -> tools
         self._fastmcp_clients: Dict[int, Client] = {}  # 缓存fastmcp客户端
+
+    @asynccontextmanager
+    async def _http_client(self):
+        """优先复用共享HTTP客户端，未注入时退化为临时客户端"""
+        if self._http is not None:
+            yield self._http
+        else:
+            async with httpx.AsyncClient() as client:
+                yield client
         
-    async def create_server(self, server_data: MCPServerCreate) -> MCPServer:
-        """创建MCP Server配置"""
+    def create_server_sync(self, server_data: MCPServerCreate) -> MCPServer:
+        """创建MCP Server配置记录（同步数据库操作）"""
         try:
             # 检查名称是否已存在
-            existing = self.db.query(MCPServer).filter(MCPServer.name == server_data.name).first()
+            existing = self.db.query(MCPServer.id).filter(MCPServer.name == server_data.name).first()
             if existing:
                 raise ValueError(f"Server名称 '{server_data.name}' 已存在")
             
@@ -57,19 +120,25 @@ class MCPClientService:
             self.db.refresh(server)
             
             logger.info(f"创建MCP Server: {server.name} (ID: {server.id})")
-            
-            # 尝试连接并发现工具
-            await self._connect_server(server)
-            
             return server
             
         except Exception as e:
             self.db.rollback()
             logger.error(f"创建MCP Server失败: {e}")
             raise
+
+    async def create_server(self, server_data: MCPServerCreate) -> MCPServer:
+        """创建MCP Server配置"""
+        # 同步数据库操作放入线程池，避免阻塞事件循环
+        server = await asyncio.to_thread(self.create_server_sync, server_data)
+        
+        # 尝试连接并发现工具
+        await self._connect_server(server)
+        
+        return server
     
-    async def update_server(self, server_id: int, update_data: MCPServerUpdate) -> Optional[MCPServer]:
-        """更新MCP Server配置"""
+    def update_server_sync(self, server_id: int, update_data: MCPServerUpdate) -> Optional[MCPServer]:
+        """更新MCP Server配置（同步数据库操作）"""
         try:
             server = self.db.query(MCPServer).filter(MCPServer.id == server_id).first()
             if not server:
@@ -91,6 +160,10 @@ class MCPClientService:
             self.db.rollback()
             logger.error(f"更新MCP Server失败: {e}")
             raise
+
+    async def update_server(self, server_id: int, update_data: MCPServerUpdate) -> Optional[MCPServer]:
+        """更新MCP Server配置"""
+        return await asyncio.to_thread(self.update_server_sync, server_id, update_data)
     
     def get_available_tools(self) -> List[MCPTool]:
         """获取所有可用的工具"""
@@ -135,27 +208,50 @@ class MCPClientService:
         logger.info(f"为LLM准备了 {len(formatted_tools)} 个工具")
         return formatted_tools
     
+    def _find_callable_tool(self, tool_name: str) -> MCPTool:
+        """查找可调用的工具，并预先加载其所属服务器"""
+        tool = self.db.query(MCPTool).filter(
+            and_(
+                MCPTool.tool_name == tool_name,
+                MCPTool.is_available == True
+            )
+        ).first()
+        
+        if not tool:
+            raise ValueError(f"工具 '{tool_name}' 不存在或不可用")
+        
+        if not tool.server.is_enabled or not tool.server.is_connected:
+            raise ValueError(f"工具 '{tool_name}' 的服务器未连接")
+        
+        return tool
+
+    def _save_tool_call(self, tool_call: MCPToolCall) -> int:
+        """保存工具调用记录，返回记录ID"""
+        self.db.add(tool_call)
+        self.db.commit()
+        self.db.refresh(tool_call)
+        return tool_call.id
+
     async def call_tool(self, request: MCPToolCallRequest) -> MCPToolCallResult:
         """调用MCP工具"""
         try:
             start_time = time.time()
             
-            # 查找工具
-            tool = self.db.query(MCPTool).filter(
-                and_(
-                    MCPTool.tool_name == request.tool_name,
-                    MCPTool.is_available == True
-                )
-            ).first()
-            
-            if not tool:
-                raise ValueError(f"工具 '{request.tool_name}' 不存在或不可用")
+            # 查找工具（同步数据库查询放入线程池）
+            tool = await asyncio.to_thread(self._find_callable_tool, request.tool_name)
             
-            if not tool.server.is_enabled or not tool.server.is_connected:
-                raise ValueError(f"工具 '{request.tool_name}' 的服务器未连接")
+            # 检查结果缓存：命中时跳过工具执行，但仍记录本次调用，历史与反馈对应到各自的调用记录
+            cache_ttl = _get_tool_cache_ttl(tool)
+            cache_key = _tool_cache_key(tool.id, request.arguments)
+            cache_hit = False
+            if cache_ttl > 0 and not request.force_refresh:
+                cache_hit, result = _get_cached_tool_result(cache_key)
             
-            # 执行工具调用
-            result = await self._execute_tool_call(tool, request.arguments)
+            if cache_hit:
+                logger.debug("工具调用命中缓存: %s", request.tool_name)
+            else:
+                # 执行工具调用
+                result = await self._execute_tool_call(tool, request.arguments)
             
             # 记录调用历史
             execution_time = time.time() - start_time
@@ -169,9 +265,7 @@ class MCPClientService:
                 error_message=None
             )
             
-            self.db.add(tool_call)
-            self.db.commit()
-            self.db.refresh(tool_call)
+            tool_call_id = await asyncio.to_thread(self._save_tool_call, tool_call)
             
             logger.info(f"工具调用成功: {request.tool_name}, 耗时: {execution_time:.3f}秒")
             
@@ -183,13 +277,18 @@ class MCPClientService:
                 result_preview = result_str
             logger.info(f"工具调用结果: {request.tool_name} -> {result_preview}")
             
-            return MCPToolCallResult(
+            call_result = MCPToolCallResult(
                 success=True,
                 result=result,
                 execution_time_ms=int(execution_time * 1000),
-                tool_call_id=tool_call.id
+                tool_call_id=tool_call_id
             )
             
+            if cache_ttl > 0 and not cache_hit:
+                _put_cached_tool_result(cache_key, cache_ttl, result)
+            
+            return call_result
+            
         except Exception as e:
             # 记录失败的调用
             try:
@@ -204,10 +303,7 @@ class MCPClientService:
                     error_message=str(e)
                 )
                 
-                self.db.add(tool_call)
-                self.db.commit()
-                self.db.refresh(tool_call)
-                call_id = tool_call.id
+                call_id = await asyncio.to_thread(self._save_tool_call, tool_call)
             except:
                 call_id = 0  # 忽略记录失败的错误
             
@@ -220,10 +316,14 @@ class MCPClientService:
                 tool_call_id=call_id
             )
     
+    def _get_server(self, server_id: int) -> Optional[MCPServer]:
+        """按ID获取MCP Server"""
+        return self.db.query(MCPServer).filter(MCPServer.id == server_id).first()
+
     async def connect_server(self, server_id: int) -> bool:
         """连接MCP Server"""
         try:
-            server = self.db.query(MCPServer).filter(MCPServer.id == server_id).first()
+            server = await asyncio.to_thread(self._get_server, server_id)
             if not server:
                 raise ValueError(f"MCP Server (ID: {server_id}) 不存在")
             
@@ -376,7 +476,7 @@ class MCPClientService:
                 "method": "tools/list"
             }
             
-            async with httpx.AsyncClient() as client:
+            async with self._http_client() as client:
                 response = await client.post(
                     server_url,
                     json=mcp_request,
@@ -410,7 +510,7 @@ class MCPClientService:
             
             # 这是一个真正的SSE MCP服务器，需要通过WebSocket或HTTP POST发送JSON-RPC请求
             # 根据MCP协议，我们需要发送tools/list请求
-            async with httpx.AsyncClient() as client:
+            async with self._http_client() as client:
                 # 构造MCP协议的JSON-RPC请求
                 mcp_request = {
                     "jsonrpc": "2.0",
@@ -773,7 +873,7 @@ class MCPClientService:
             server.last_connected_at = datetime.utcnow() if success else None
             server.error_message = None if success else f"连接失败: 不支持的类型 {server.server_type}"
             
-            self.db.commit()
+            await asyncio.to_thread(self.db.commit)
             
             return success
             
@@ -781,7 +881,7 @@ class MCPClientService:
             server.is_connected = False
             server.connection_status = "error"
             server.error_message = str(e)
-            self.db.commit()
+            await asyncio.to_thread(self.db.commit)
             logger.error(f"连接MCP Server失败: {e}")
             return False
     
@@ -789,12 +889,11 @@ class MCPClientService:
         """连接HTTP类型的MCP Server"""
         # 示例实现
         try:
-            import httpx
             config = server.server_config
             base_url = config.get('url', 'http://localhost:8000')
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{base_url}/health")
+            async with self._http_client() as client:
+                response = await client.get(f"{base_url}/health", timeout=5.0)
                 return response.status_code == 200
                 
         except Exception as e:
@@ -5,7 +5,6 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pathlib import Path
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from ..dynamic_config import settings
 
@@ -33,6 +32,8 @@ class SimpleMemoryService:
         # 初始化LLM
         self.llm = None
         if settings.openai_api_key:
+            # 按需导入：langchain_openai依赖较重，未配置LLM时不加载
+            from langchain_openai import ChatOpenAI
             self.llm = ChatOpenAI(
                 openai_api_key=settings.openai_api_key,
                 base_url=settings.openai_base_url,
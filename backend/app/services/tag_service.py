@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, update, select
 from typing import List, Optional, Dict, Any
 from ..models.tag import Tag
 from ..models.file_tag import FileTag
@@ -53,24 +53,15 @@ class TagService(BaseService):
     def get_tags_with_usage_stats(self, skip: int = 0, limit: int = 100, include_recent_files: bool = False) -> List[Dict[str, Any]]:
         """获取带使用统计的标签列表"""
         try:
-            # 使用高效的SQL JOIN查询获取标签和使用次数
-            query = self.db.query(
-                Tag,
-                func.count(FileTag.file_id).label('usage_count')
-            ).outerjoin(FileTag, Tag.id == FileTag.tag_id)\
-             .group_by(Tag.id)\
-             .offset(skip)\
-             .limit(limit)
-            
-            results = query.all()
+            # usage_count 在增删文件标签关联时同步维护，这里直接按索引列排序读取
+            results = self.db.query(Tag)\
+                .order_by(Tag.usage_count.desc(), Tag.id)\
+                .offset(skip)\
+                .limit(limit)\
+                .all()
             
             tags_with_stats = []
-            for tag, usage_count in results:
-                # 更新数据库中的usage_count（如果不一致）
-                if tag.usage_count != usage_count:
-                    tag.usage_count = usage_count or 0
-                    self.db.commit()
-                
+            for tag in results:
                 tag_dict = {
                     'id': tag.id,
                     'name': tag.name,
@@ -79,7 +70,7 @@ class TagService(BaseService):
                     'is_auto_generated': tag.is_auto_generated,
                     'created_at': tag.created_at,
                     'updated_at': tag.updated_at,
-                    'usage_count': usage_count or 0
+                    'usage_count': tag.usage_count or 0
                 }
                 
                 # 可选：获取最近使用的文件信息
@@ -118,6 +109,18 @@ class TagService(BaseService):
             logger.error(f"获取标签使用次数失败: {e}")
             return 0
 
+    def recalculate_usage_counts(self) -> None:
+        """按文件标签关联表重新计算所有标签的使用次数"""
+        try:
+            usage = select(func.count(FileTag.id))\
+                .where(FileTag.tag_id == Tag.id)\
+                .scalar_subquery()
+            self.db.execute(update(Tag).values(usage_count=usage))
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"重新计算标签使用次数失败: {e}")
+            self.db.rollback()
+
     def update_tag(self, tag_id: int, tag_update: TagUpdate) -> Optional[Tag]:
         """更新标签"""
         try:
@@ -171,6 +174,15 @@ class FileTagService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _adjust_usage_count(self, tag_id: int, delta: int) -> None:
+        """在当前事务中增减标签使用次数"""
+        self.db.execute(
+            update(Tag)
+            .where(Tag.id == tag_id)
+            .values(usage_count=func.coalesce(Tag.usage_count, 0) + delta)
+            .execution_options(synchronize_session=False)
+        )
+
     def create_file_tag(self, file_tag: FileTagCreate) -> FileTag:
         """创建文件标签关联"""
         try:
@@ -181,6 +193,7 @@ class FileTagService:
                 is_manual=file_tag.is_manual
             )
             self.db.add(db_file_tag)
+            self._adjust_usage_count(file_tag.tag_id, 1)
             self.db.commit()
             self.db.refresh(db_file_tag)
             logger.info(f"创建文件标签关联成功: file_id={file_tag.file_id}, tag_id={file_tag.tag_id}")
@@ -217,6 +230,7 @@ class FileTagService:
                 return None
             
             self.db.delete(db_file_tag)
+            self._adjust_usage_count(tag_id, -1)
             self.db.commit()
             logger.info(f"删除文件标签关联成功: file_id={file_id}, tag_id={tag_id}")
             return db_file_tag
@@ -229,6 +243,14 @@ class FileTagService:
         """删除文件的所有标签关联"""
         try:
             count = self.db.query(FileTag).filter(FileTag.file_id == file_id).count()
+            # 先扣减受影响标签的使用次数，再删除关联
+            tag_ids = select(FileTag.tag_id).where(FileTag.file_id == file_id)
+            self.db.execute(
+                update(Tag)
+                .where(Tag.id.in_(tag_ids))
+                .values(usage_count=func.coalesce(Tag.usage_count, 0) - 1)
+                .execution_options(synchronize_session=False)
+            )
             self.db.query(FileTag).filter(FileTag.file_id == file_id).delete()
             self.db.commit()
             logger.info(f"删除文件所有标签关联成功: file_id={file_id}, count={count}")
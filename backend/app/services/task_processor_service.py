@@ -1,10 +1,11 @@
 import os
 import time
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, text
+from sqlalchemy import and_, or_, text, delete
 from pathlib import Path
 
 from ..models.pending_task import PendingTask
@@ -22,6 +23,13 @@ _task_stats_cache = {
     "cache_duration": 15  # 缓存15秒
 }
 
+# 锁文件存在性缓存（状态接口被频繁轮询）
+_lock_exists_cache = {
+    "data": None,
+    "last_update": 0.0,
+    "cache_duration": 1  # 缓存1秒
+}
+
 class TaskProcessorService:
     """后台任务处理服务"""
     
@@ -60,6 +68,21 @@ class TaskProcessorService:
         except Exception as e:
             logger.error(f"清理启动锁文件失败: {e}")
         
+    def _lock_exists(self) -> bool:
+        """检查锁文件是否存在（带1秒缓存）"""
+        now = time.monotonic()
+        if _lock_exists_cache["data"] is not None and now - _lock_exists_cache["last_update"] < _lock_exists_cache["cache_duration"]:
+            return _lock_exists_cache["data"]
+        
+        exists = self.lock_file.exists()
+        _lock_exists_cache["data"] = exists
+        _lock_exists_cache["last_update"] = now
+        return exists
+
+    def _invalidate_lock_cache(self):
+        """锁文件变化后使缓存失效"""
+        _lock_exists_cache["data"] = None
+        
     def _acquire_lock(self) -> bool:
         """获取处理锁，防止重复执行"""
         try:
@@ -83,6 +106,7 @@ class TaskProcessorService:
             self.lock_file.parent.mkdir(parents=True, exist_ok=True)
             current_pid = os.getpid()
             self.lock_file.write_text(str(current_pid))
+            self._invalidate_lock_cache()
             logger.info(f"获取任务处理锁成功(PID: {current_pid})")
             return True
             
@@ -167,6 +191,7 @@ class TaskProcessorService:
         try:
             if self.lock_file.exists():
                 self.lock_file.unlink()
+                self._invalidate_lock_cache()
                 logger.info("释放任务处理锁成功")
         except Exception as e:
             logger.error(f"释放任务处理锁失败: {e}")
@@ -186,6 +211,73 @@ class TaskProcessorService:
             logger.error(f"创建待处理任务失败: {e}")
             return False
     
+    def create_pending_tasks_bulk(self, tasks: List[Dict[str, Any]]) -> int:
+        """
+        批量创建待处理任务（用于启动扫描等大批量场景）
+        
+        去重规则与 add_task 一致：已存在 pending/processing 的同类任务时，
+        processing 重置为 pending 并按需提升优先级；其余任务一次性批量插入。
+        
+        Args:
+            tasks: 任务字典列表，包含 file_id、file_path、task_type、priority
+        
+        Returns:
+            int: 新插入的任务数量
+        """
+        if not tasks:
+            return 0
+        
+        try:
+            # 合并输入中的重复任务，保留最高优先级
+            merged: Dict[tuple, Dict[str, Any]] = {}
+            for task in tasks:
+                key = (task["file_id"], task["task_type"])
+                current = merged.get(key)
+                if current is None or task.get("priority", 0) > current.get("priority", 0):
+                    merged[key] = task
+            
+            # 分批查询已存在的待处理任务，避免超出SQLite参数上限
+            file_ids = list({file_id for file_id, _ in merged})
+            existing_tasks = []
+            for i in range(0, len(file_ids), 500):
+                existing_tasks.extend(self.db.query(PendingTask).filter(
+                    and_(
+                        PendingTask.file_id.in_(file_ids[i:i + 500]),
+                        PendingTask.status.in_(["pending", "processing"])
+                    )
+                ).all())
+            
+            for existing_task in existing_tasks:
+                task = merged.pop((existing_task.file_id, existing_task.task_type), None)
+                if task is None:
+                    continue
+                if existing_task.status == "processing":
+                    existing_task.status = "pending"
+                if task.get("priority", 0) > existing_task.priority:
+                    existing_task.priority = task["priority"]
+            
+            new_tasks = [
+                {
+                    "file_id": task["file_id"],
+                    "file_path": task["file_path"],
+                    "task_type": task["task_type"],
+                    "priority": task.get("priority", 0),
+                    "status": "pending"
+                }
+                for task in merged.values()
+            ]
+            if new_tasks:
+                self.db.bulk_insert_mappings(PendingTask, new_tasks)
+            self.db.commit()
+            
+            logger.info(f"批量添加待处理任务完成: 新增 {len(new_tasks)} 个，合并已有 {len(tasks) - len(new_tasks)} 个")
+            return len(new_tasks)
+            
+        except Exception as e:
+            logger.error(f"批量添加待处理任务失败: {e}")
+            self.db.rollback()
+            return 0
+    
     def add_task(self, file_id: int, file_path: str, task_type: str, priority: int = 0) -> bool:
         """
         添加待处理任务（增强去重逻辑）
@@ -265,6 +357,13 @@ class TaskProcessorService:
             logger.error(f"获取待处理任务失败: {e}")
             return []
     
+    def process_task_by_id(self, task_id: int) -> bool:
+        """按ID处理单个待处理任务，任务已被其他处理者领取时直接返回False"""
+        task = self.db.get(PendingTask, task_id)
+        if not task or task.status != "pending":
+            return False
+        return self.process_task(task)
+    
     def process_task(self, task: PendingTask) -> bool:
         """处理单个任务"""
         try:
@@ -489,7 +588,7 @@ class TaskProcessorService:
         """强制清理文件的所有embedding数据（用于重试任务）"""
         try:
             from ..models.embedding import Embedding
-            from .ai_service_langchain import AIService
+            from .ai_service_langchain import AIService, delete_file_vectors
             
             logger.info(f"🧹 开始强制清理文件 {file_id} 的embedding数据")
             
@@ -497,12 +596,8 @@ class TaskProcessorService:
             try:
                 ai_service = AIService(self.db)
                 if ai_service.vector_store:
-                    existing_docs = ai_service.vector_store.get(
-                        where={"file_id": file_id}
-                    )
-                    if existing_docs and existing_docs.get('ids'):
-                        ai_service.vector_store.delete(ids=existing_docs['ids'])
-                        logger.info(f"清理ChromaDB向量数据: {len(existing_docs['ids'])} 个")
+                    delete_file_vectors(ai_service.vector_store, file_id)
+                    logger.info(f"清理ChromaDB向量数据: file_id={file_id}")
             except Exception as e:
                 logger.warning(f"清理ChromaDB数据时出错: {e}")
             
@@ -604,12 +699,16 @@ class TaskProcessorService:
         try:
             cutoff_date = datetime.now() - timedelta(days=days)
             
-            deleted_count = self.db.query(PendingTask).filter(
-                and_(
-                    PendingTask.status.in_(["completed", "failed"]),
-                    PendingTask.updated_at < cutoff_date
-                )
-            ).delete()
+            # 单条 DELETE 语句批量删除，不加载ORM对象
+            result = self.db.execute(
+                delete(PendingTask).where(
+                    and_(
+                        PendingTask.status.in_(["completed", "failed"]),
+                        PendingTask.updated_at < cutoff_date
+                    )
+                ).execution_options(synchronize_session=False)
+            )
+            deleted_count = result.rowcount
             
             self.db.commit()
             
@@ -629,45 +728,22 @@ class TaskProcessorService:
             int: 清理的重复任务数量
         """
         try:
-            # 查找重复任务组
-            duplicate_groups = self.db.execute(text("""
-                SELECT file_id, task_type, COUNT(*) as count
-                FROM pending_tasks 
-                WHERE status = 'pending'
-                GROUP BY file_id, task_type
-                HAVING COUNT(*) > 1
-            """)).fetchall()
-            
-            removed_count = 0
-            
-            for group in duplicate_groups:
-                file_id = group.file_id
-                task_type = group.task_type
-                
-                # 获取该组的所有任务，按优先级降序、创建时间降序排序
-                tasks = self.db.query(PendingTask).filter(
-                    and_(
-                        PendingTask.file_id == file_id,
-                        PendingTask.task_type == task_type,
-                        PendingTask.status == "pending"
+            # 使用窗口函数一次性删除每组中除优先级最高且最新之外的重复任务
+            result = self.db.execute(text("""
+                DELETE FROM pending_tasks
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY file_id, task_type
+                            ORDER BY priority DESC, created_at DESC, id DESC
+                        ) AS rn
+                        FROM pending_tasks
+                        WHERE status = 'pending'
                     )
-                ).order_by(
-                    PendingTask.priority.desc(),
-                    PendingTask.created_at.desc()
-                ).all()
-                
-                if len(tasks) > 1:
-                    # 保留第一个（优先级最高且最新的），删除其他的
-                    keep_task = tasks[0]
-                    tasks_to_remove = tasks[1:]
-                    
-                    for task in tasks_to_remove:
-                        self.db.delete(task)
-                        removed_count += 1
-                    
-                    logger.info(f"清理重复任务组: file_id={file_id}, task_type={task_type}, "
-                              f"保留任务ID={keep_task.id}(优先级={keep_task.priority}), "
-                              f"删除{len(tasks_to_remove)}个重复任务")
+                    WHERE rn > 1
+                )
+            """))
+            removed_count = result.rowcount
             
             self.db.commit()
             logger.info(f"清理重复任务完成，共删除 {removed_count} 个重复任务")
@@ -728,14 +804,25 @@ class TaskProcessorService:
             logger.error(f"获取任务统计失败: {e}")
             return {}
     
-    def get_processor_status(self) -> Dict[str, Any]:
+    async def get_processor_status_async(self) -> Dict[str, Any]:
+        """并发检查锁文件和待处理任务数，再返回任务处理器运行状态"""
+        lock_exists, pending_count = await asyncio.gather(
+            asyncio.to_thread(self._lock_exists),
+            asyncio.to_thread(self._get_pending_tasks_count)
+        )
+        return await asyncio.to_thread(self.get_processor_status, pending_count, lock_exists)
+
+    def get_processor_status(self, pending_count: Optional[int] = None, lock_exists: Optional[bool] = None) -> Dict[str, Any]:
         """获取任务处理器运行状态"""
         try:
             # 检查是否有待处理任务
-            pending_count = self._get_pending_tasks_count()
+            if pending_count is None:
+                pending_count = self._get_pending_tasks_count()
             
             # 检查锁文件
-            if not self.lock_file.exists():
+            if lock_exists is None:
+                lock_exists = self._lock_exists()
+            if not lock_exists:
                 if pending_count > 0:
                     return {
                         "running": False,
@@ -760,6 +847,7 @@ class TaskProcessorService:
                     if not pid_str:
                         # 空锁文件，清理并返回空闲状态
                         self.lock_file.unlink()
+                        self._invalidate_lock_cache()
                         return {
                             "running": False,
                             "pid": None,
@@ -784,6 +872,7 @@ class TaskProcessorService:
                         # 进程确实已死，安全清理锁文件
                         logger.info(f"检测到死锁文件(PID: {pid}已退出)，清理锁文件")
                         self.lock_file.unlink()
+                        self._invalidate_lock_cache()
                         return {
                             "running": False,
                             "pid": None,
@@ -792,11 +881,22 @@ class TaskProcessorService:
                             "pending_tasks": pending_count
                         }
                         
+            except FileNotFoundError:
+                # 缓存期间锁文件已被释放
+                self._invalidate_lock_cache()
+                return {
+                    "running": False,
+                    "pid": None,
+                    "status": "idle",
+                    "message": "任务处理器空闲中",
+                    "pending_tasks": pending_count
+                }
             except (ValueError, OSError) as e:
                 # 锁文件格式错误或读取失败
                 logger.error(f"读取锁文件失败: {e}")
                 try:
                     self.lock_file.unlink()
+                    self._invalidate_lock_cache()
                 except:
                     pass
                 return {
@@ -0,0 +1,182 @@
+import hashlib
+import uuid
+
+import chromadb
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from backend.app.config import Settings
+from backend.app.dynamic_config import settings
+from backend.app.models.embedding import Embedding
+from backend.app.models.file import File
+from backend.app.services.ai_service_langchain import AIService, _EmbeddingDiskCache
+from backend.app.services.hierarchical_splitter import chunk_hash
+
+
+class _FakeCollection:
+    def __init__(self, existing=None):
+        self.existing = existing
+        self.added = None
+
+    def get(self, where=None, include=None):
+        return self.existing
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.added = {"ids": ids, "embeddings": embeddings, "metadatas": metadatas, "documents": documents}
+
+
+class _FakeVectorStore:
+    def __init__(self, collection):
+        self._collection = collection
+        self.get_calls = 0
+
+    def get(self, where=None, include=None):
+        self.get_calls += 1
+        return self._collection.get(where=where, include=include)
+
+
+class _CountingEmbeddings:
+    def __init__(self, vector=(0.6, 0.8)):
+        self.vector = list(vector)
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return [list(self.vector) for _ in texts]
+
+
+def _make_service(existing=None, embeddings=None) -> AIService:
+    # 只测试向量复用逻辑，不初始化LLM与ChromaDB
+    service = AIService.__new__(AIService)
+    service.vector_store = _FakeVectorStore(_FakeCollection(existing))
+    service.embeddings = embeddings or _CountingEmbeddings()
+    return service
+
+
+def _metadata(**overrides) -> dict:
+    metadata = {"embedding_model": settings.embedding_model_name, "normalized": True, "content_hash": "h"}
+    metadata.update(overrides)
+    return metadata
+
+
+def test_collect_reusable_vectors_filters_stale_entries():
+    service = _make_service()
+    existing = {
+        "documents": ["keep", "other model", "legacy", "failed"],
+        "embeddings": [
+            np.array([1.0, 0.0]),
+            [0.0, 1.0],
+            [0.0, 1.0],
+            [0.0, 0.0],
+        ],
+        "metadatas": [
+            _metadata(),
+            _metadata(embedding_model="another-model"),
+            _metadata(normalized=None),
+            _metadata(),
+        ],
+    }
+
+    reusable = service._collect_reusable_vectors(existing)
+
+    # 只复用同一模型、已归一化的非零向量，numpy数组转为列表
+    assert reusable == {chunk_hash("keep"): [1.0, 0.0]}
+    assert service._collect_reusable_vectors(None) == {}
+
+
+def test_add_documents_embeds_only_changed_chunks():
+    embeddings = _CountingEmbeddings()
+    service = _make_service(embeddings=embeddings)
+    docs = [Document(page_content="unchanged", metadata={"chunk_index": 0}),
+            Document(page_content="changed", metadata={"chunk_index": 1})]
+    reusable = {chunk_hash("unchanged"): [1.0, 0.0]}
+
+    reused, failed = service._add_documents_reusing_vectors(docs, ["a", "b"], reusable, "hash-1")
+
+    assert (reused, failed) == (1, 0)
+    assert embeddings.requests == [["changed"]]
+    added = service.vector_store._collection.added
+    assert added["embeddings"] == [[1.0, 0.0], [0.6, 0.8]]
+    assert all(m["content_hash"] == "hash-1" and m["normalized"] for m in added["metadatas"])
+
+
+def test_add_documents_writes_to_real_collection():
+    collection = chromadb.EphemeralClient().create_collection(f"reuse_{uuid.uuid4().hex}")
+    service = _make_service()
+    service.vector_store = _FakeVectorStore(collection)
+    # 分块器产生的元数据中 parent_heading 可能为None
+    docs = [Document(page_content="chunk", metadata={"chunk_index": 0, "file_id": 1, "parent_heading": None})]
+
+    service._add_documents_reusing_vectors(docs, ["file_1_chunk_0"], {}, "hash-1")
+    service._add_documents_reusing_vectors(docs, ["file_1_chunk_0"], {}, "hash-2")
+
+    stored = collection.get(where={"file_id": 1}, include=["metadatas"])
+    assert stored["ids"] == ["file_1_chunk_0"]
+    assert stored["metadatas"][0]["content_hash"] == "hash-2"
+    assert "parent_heading" not in stored["metadatas"][0]
+
+def test_add_documents_does_not_stamp_zero_vectors():
+    service = _make_service(embeddings=_CountingEmbeddings(vector=(0.0, 0.0)))
+    docs = [Document(page_content="failed", metadata={"chunk_index": 0})]
+
+    reused, failed = service._add_documents_reusing_vectors(docs, ["a"], {}, "hash-1")
+
+    assert (reused, failed) == (0, 1)
+    # 嵌入失败的零向量不记录内容哈希，下次处理时会重新嵌入
+    assert "content_hash" not in service.vector_store._collection.added["metadatas"][0]
+
+
+def test_embeddings_up_to_date_requires_every_chunk_current():
+    fresh = {"metadatas": [_metadata(), _metadata()], "embeddings": [[1.0, 0.0], [0.0, 1.0]]}
+    assert _make_service()._embeddings_up_to_date(fresh, "h")
+    assert not _make_service()._embeddings_up_to_date(fresh, "other-hash")
+
+
+@pytest.mark.parametrize("metadata, vector", [
+    (_metadata(content_hash=None), [1.0, 0.0]),
+    (_metadata(embedding_model="another-model"), [1.0, 0.0]),
+    (_metadata(normalized=None), [1.0, 0.0]),
+    (_metadata(), [0.0, 0.0]),
+])
+def test_embeddings_up_to_date_rejects_stale_chunk(metadata, vector):
+    # 任意一个分块缺少哈希、换了模型、未归一化或是零向量占位，都需要重新嵌入
+    existing = {"metadatas": [_metadata(), metadata], "embeddings": [[1.0, 0.0], vector]}
+    assert not _make_service()._embeddings_up_to_date(existing, "h")
+
+
+def test_embeddings_up_to_date_without_vectors():
+    assert not _make_service()._embeddings_up_to_date({"metadatas": [], "embeddings": []}, "h")
+    assert not _make_service()._embeddings_up_to_date(None, "h")
+
+
+def test_create_embeddings_skips_unchanged_file_with_single_read(db_session, monkeypatch):
+    file = File(file_path="notes/a.md", title="a", content="内容")
+    db_session.add(file)
+    db_session.commit()
+    db_session.add(Embedding(file_id=file.id, chunk_index=0, chunk_text="内容", chunk_hash="x", vector_model="m"))
+    db_session.commit()
+    content_hash = hashlib.sha256("内容".encode()).hexdigest()
+    existing = {"ids": ["a"], "documents": ["内容"], "embeddings": [[1.0, 0.0]],
+                "metadatas": [_metadata(content_hash=content_hash)]}
+    service = _make_service(existing)
+    service.db = db_session
+    monkeypatch.setattr(service, "is_available", lambda: True)
+
+    assert service.create_embeddings(file)
+    # 判断是否最新与收集可复用向量共用同一次读取
+    assert service.vector_store.get_calls == 1
+
+
+def test_disk_cache_key_separates_endpoints_and_dimensions():
+    key = _EmbeddingDiskCache.make_key("http://a/v1", "model", 1024, "text")
+    assert key == _EmbeddingDiskCache.make_key("http://a/v1", "model", 1024, "text")
+    # 同名模型指向不同服务或维度时不共用缓存
+    assert key != _EmbeddingDiskCache.make_key("http://b/v1", "model", 1024, "text")
+    assert key != _EmbeddingDiskCache.make_key("http://a/v1", "model", 768, "text")
+
+
+def test_embedding_cache_path_defaults_to_data_directory(tmp_path):
+    config = Settings(data_directory=str(tmp_path))
+    assert config.get_embedding_cache_path() == str(tmp_path / "embedding_cache.db")
+    assert Settings(embedding_cache_path="").get_embedding_cache_path() is None
@@ -0,0 +1,35 @@
+import typing
+
+import msgspec
+import pytest
+
+from backend.app.schemas import _fast
+from backend.app.schemas.file import FileResponse
+from backend.app.schemas.mcp import MCPToolCallResponse, MCPToolResponse
+from backend.app.schemas.tag import TagResponse
+
+# msgspec响应结构与对应的pydantic模型（后者用于OpenAPI文档），两边字段必须保持一致
+FAST_STRUCT_PAIRS = [
+    (_fast.FileResponseFast, FileResponse),
+    (_fast.TagResponseFast, TagResponse),
+    (_fast.MCPToolResponseFast, MCPToolResponse),
+    (_fast.MCPToolCallResponseFast, MCPToolCallResponse),
+]
+
+
+def _is_nullable(annotation) -> bool:
+    return type(None) in typing.get_args(annotation)
+
+
+@pytest.mark.parametrize("struct_cls, model_cls", FAST_STRUCT_PAIRS)
+def test_fast_struct_fields_match_pydantic_model(struct_cls, model_cls):
+    assert set(struct_cls.__struct_fields__) == set(model_cls.model_fields)
+
+
+@pytest.mark.parametrize("struct_cls, model_cls", FAST_STRUCT_PAIRS)
+def test_fast_struct_nullability_matches_pydantic_model(struct_cls, model_cls):
+    struct_fields = {field.name: field.type for field in msgspec.structs.fields(struct_cls)}
+    for name, field in model_cls.model_fields.items():
+        # Struct可以比模型更宽松（允许None），但模型允许None的字段Struct也必须允许
+        if _is_nullable(field.annotation):
+            assert _is_nullable(struct_fields[name]), f"{struct_cls.__name__}.{name} 应允许None"
@@ -3,7 +3,9 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from backend.app.models.file import File
+from backend.app.models.embedding import Embedding
 from backend.app.schemas.file import FileCreate
+from backend.app.services.file_service import FileService
 
 def test_create_file(client: TestClient):
     file_data = {
@@ -105,4 +107,18 @@ def test_delete_file(client: TestClient, db_session: Session):
 def test_delete_non_existent_file(client: TestClient):
     response = client.delete("/api/v1/files/9999")
     assert response.status_code == 404
-    assert response.json() == {"detail": "File not found"} 
\ No newline at end of file
+    assert response.json() == {"detail": "File not found"} 
+
+def test_hard_delete_file_removes_embeddings(db_session: Session):
+    file = File(file_path="notes/hard_delete.md", title="彻底删除")
+    db_session.add(file)
+    db_session.commit()
+    file_id = file.id
+    db_session.add_all([
+        Embedding(file_id=file_id, chunk_index=i, chunk_text=f"块{i}", chunk_hash=f"h{i}", vector_model="test")
+        for i in range(3)
+    ])
+    db_session.commit()
+
+    assert FileService(db_session).hard_delete_file(file_id) is not None
+    assert db_session.query(Embedding).filter(Embedding.file_id == file_id).count() == 0
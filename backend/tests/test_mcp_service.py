@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.app.models.mcp_server import MCPServer, MCPTool, MCPToolCall
+from backend.app.schemas.mcp import MCPToolCallRequest
+from backend.app.services import mcp_service
+from backend.app.services.mcp_service import MCPClientService
+
+
+@pytest.fixture(autouse=True)
+def clear_tool_result_cache():
+    mcp_service._tool_result_cache.clear()
+    yield
+    mcp_service._tool_result_cache.clear()
+
+
+def _create_tool(db_session: Session, tool_config=None) -> MCPTool:
+    server = MCPServer(name="cache_test_server", server_type="http", server_config={}, is_enabled=True, is_connected=True)
+    db_session.add(server)
+    db_session.commit()
+    tool = MCPTool(server_id=server.id, tool_name="echo", tool_config=tool_config)
+    db_session.add(tool)
+    db_session.commit()
+    return tool
+
+
+def _counting_executor(calls):
+    async def execute(tool, arguments):
+        calls.append(arguments)
+        return {"echo": arguments}
+    return execute
+
+
+def test_tool_result_cache_hit_records_new_call(db_session: Session, monkeypatch):
+    _create_tool(db_session)
+    service = MCPClientService(db_session)
+    calls = []
+    monkeypatch.setattr(service, "_execute_tool_call", _counting_executor(calls))
+
+    request = MCPToolCallRequest(tool_name="echo", arguments={"q": "hello"})
+    first = asyncio.run(service.call_tool(request))
+    second = asyncio.run(service.call_tool(request))
+
+    assert first.success and second.success
+    assert second.result == first.result
+    # 命中缓存时不再执行工具，但每次调用都有自己的调用记录
+    assert len(calls) == 1
+    assert first.tool_call_id != second.tool_call_id
+    assert db_session.query(MCPToolCall).count() == 2
+
+
+def test_tool_result_cache_respects_force_refresh_and_ttl(db_session: Session, monkeypatch):
+    _create_tool(db_session, tool_config={"cache_ttl": 0})
+    service = MCPClientService(db_session)
+    calls = []
+    monkeypatch.setattr(service, "_execute_tool_call", _counting_executor(calls))
+
+    request = MCPToolCallRequest(tool_name="echo", arguments={"q": "hello"})
+    asyncio.run(service.call_tool(request))
+    asyncio.run(service.call_tool(request))
+    assert len(calls) == 2
+
+    tool = db_session.query(MCPTool).filter(MCPTool.tool_name == "echo").one()
+    tool.tool_config = None
+    db_session.commit()
+    asyncio.run(service.call_tool(request))
+    asyncio.run(service.call_tool(request.model_copy(update={"force_refresh": True})))
+    assert len(calls) == 4
@@ -0,0 +1,95 @@
+import hashlib
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.app.config import settings
+from backend.app.database import init_db
+from backend.app.models.file import File
+from backend.app.models.pending_task import PendingTask
+from backend.app.services.index_service import IndexService
+
+
+@pytest.fixture
+def notes_dir(tmp_path, monkeypatch):
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    monkeypatch.setattr(settings, "notes_directory", str(notes))
+    return notes
+
+
+@pytest.fixture
+def scan_session(db_session: Session, monkeypatch):
+    # 后台扫描使用自己的会话，这里让它连接测试数据库
+    monkeypatch.setattr(init_db, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+    return db_session
+
+
+def _task_priorities(db_session: Session) -> dict:
+    db_session.expire_all()
+    return {task.file_path: task.priority for task in db_session.query(PendingTask).all()}
+
+
+def test_iter_notes_directory_matches_scan(db_session: Session, notes_dir):
+    (notes_dir / "a.md").write_text("# 标题A\n内容", encoding="utf-8")
+    (notes_dir / "sub").mkdir()
+    (notes_dir / "sub" / "b.md").write_text("内容B", encoding="utf-8")
+
+    index_service = IndexService(db_session)
+    streamed = list(index_service.iter_notes_directory())
+    scanned = index_service.scan_notes_directory()
+
+    assert [info["file_path"] for info in streamed] == [info["file_path"] for info in scanned]
+    assert {info["file_path"] for info in streamed} == {"notes/a.md", "notes/sub/b.md"}
+
+
+def test_background_scan_inserts_new_files_in_batches(scan_session: Session, notes_dir, monkeypatch):
+    monkeypatch.setattr(init_db, "_SCAN_BATCH_SIZE", 2)
+    for i in range(5):
+        (notes_dir / f"note{i}.md").write_text(f"内容{i}", encoding="utf-8")
+
+    init_db._scan_finished.clear()
+    init_db._background_scan(need_rebuild=False, need_repair=False)
+
+    assert init_db.wait_for_startup_scan(timeout=0)
+    files = scan_session.query(File).all()
+    assert len(files) == 5
+    assert all(f.content_hash for f in files)
+    # 新文件的向量索引任务优先级为1
+    assert _task_priorities(scan_session) == {f"notes/note{i}.md": 1 for i in range(5)}
+
+
+def test_background_scan_updates_changed_files_only(scan_session: Session, notes_dir):
+    (notes_dir / "changed.md").write_text("新内容", encoding="utf-8")
+    (notes_dir / "same.md").write_text("不变", encoding="utf-8")
+    (notes_dir / "legacy.md").write_text("旧记录", encoding="utf-8")
+    same_hash = hashlib.sha256("不变".encode("utf-8")).hexdigest()
+    scan_session.add_all([
+        File(file_path="notes/changed.md", title="changed", content="旧内容",
+             file_size=len("旧内容".encode("utf-8")), content_hash="stale"),
+        File(file_path="notes/same.md", title="same", content="不变",
+             file_size=len("不变".encode("utf-8")), content_hash=same_hash),
+        File(file_path="notes/legacy.md", title="legacy", content="旧记录",
+             file_size=len("旧记录".encode("utf-8")), content_hash=None),
+    ])
+    scan_session.commit()
+
+    init_db._background_scan(need_rebuild=False, need_repair=False)
+
+    # 内容变化的文件重建索引，未变化的文件（包括只缺哈希的旧记录）不创建任务
+    assert _task_priorities(scan_session) == {"notes/changed.md": 2}
+    files = {f.file_path: f for f in scan_session.query(File).all()}
+    assert files["notes/changed.md"].content == "新内容"
+    assert files["notes/legacy.md"].content_hash == hashlib.sha256("旧记录".encode("utf-8")).hexdigest()
+
+
+def test_background_scan_rebuild_indexes_unchanged_files(scan_session: Session, notes_dir):
+    (notes_dir / "same.md").write_text("不变", encoding="utf-8")
+    scan_session.add(File(file_path="notes/same.md", title="same", content="不变",
+                          file_size=len("不变".encode("utf-8")),
+                          content_hash=hashlib.sha256("不变".encode("utf-8")).hexdigest()))
+    scan_session.commit()
+
+    init_db._background_scan(need_rebuild=True, need_repair=False)
+
+    assert _task_priorities(scan_session) == {"notes/same.md": 3}
@@ -144,4 +144,27 @@ def test_delete_file_tag(client: TestClient, db_session: Session):
     response = client.get(f"/api/v1/files/{file.id}/tags")
     assert response.status_code == 200
     data = response.json()
-    assert not any(ft["tag_id"] == tag.id for ft in data) 
\ No newline at end of file
+    assert not any(ft["tag_id"] == tag.id for ft in data) 
+
+
+def test_tag_usage_count_maintained(client: TestClient, db_session: Session):
+    file = File(file_path="notes/file_for_usage_count.md", title="标签计数文件")
+    tag = Tag(name="usage_count_tag")
+    db_session.add_all([file, tag])
+    db_session.commit()
+    file_id, tag_id = file.id, tag.id
+
+    response = client.post("/api/v1/file_tags", json={"file_id": file_id, "tag_id": tag_id})
+    assert response.status_code == 201
+
+    response = client.get("/api/v1/tags-with-stats")
+    assert response.status_code == 200
+    stats = {t["id"]: t["usage_count"] for t in response.json()}
+    assert stats[tag_id] == 1
+
+    response = client.delete(f"/api/v1/files/{file_id}/tags/{tag_id}")
+    assert response.status_code == 204
+
+    response = client.get("/api/v1/tags-with-stats")
+    stats = {t["id"]: t["usage_count"] for t in response.json()}
+    assert stats[tag_id] == 0